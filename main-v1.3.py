@@ -1,3 +1,5 @@
+import time
+STARTUP_T0 = time.perf_counter() # Mốc 0 cho --profile-startup
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, font as tkFont, simpledialog, scrolledtext
 import ttkbootstrap as tb
@@ -7,13 +9,63 @@ import shutil
 import json
 import threading
 import queue
-import time
-from github import Github, GithubException, UnknownObjectException, RateLimitExceededException
+import base64
+import bisect
+import hashlib
+import collections
+import concurrent.futures
+import urllib.parse
+import urllib.request
+import urllib.error
+import tempfile
+import sqlite3
 import platform # Để lấy thông tin OS cho đường dẫn
 import string   # Cho ký tự ổ đĩa Windows
 import subprocess # Để mở file và lấy icon sau này (nếu cần)
 import sys
 import re
+import asyncio
+import argparse
+import importlib.util
+
+# --- Import nặng ở thread nền ---
+# PyGithub (kéo theo requests/urllib3/cryptography/jwt) và httpx không cần để dựng cửa sổ nên được import ở nền
+# ngay khi chạy module. Trước khi xong, các lớp exception là _PendingImport (không khớp lỗi nào);
+# mọi chỗ cần dùng PyGithub thật gọi require_github() trước.
+class _PendingImport(Exception):
+    pass
+
+Github = Repository = InputGitTreeElement = None
+GithubException = UnknownObjectException = RateLimitExceededException = _PendingImport
+httpx = None # Tùy chọn: backend HTTP bất đồng bộ (pip install httpx[http2])
+HTTPX_AVAILABLE = importlib.util.find_spec("httpx") is not None # Kiểm tra mà không import
+_heavy_imports_done = threading.Event()
+_heavy_import_span = [None, None] # perf_counter lúc bắt đầu/xong import nền (cho --profile-startup)
+
+def _import_heavy_modules():
+    global Github, Repository, InputGitTreeElement, GithubException, UnknownObjectException, RateLimitExceededException, httpx
+    _heavy_import_span[0] = time.perf_counter()
+    try:
+        from github import Github as _Github, GithubException as _GithubException, UnknownObjectException as _UnknownObjectException, \
+            RateLimitExceededException as _RateLimitExceededException, InputGitTreeElement as _InputGitTreeElement
+        from github.Repository import Repository as _Repository
+        GithubException, UnknownObjectException, RateLimitExceededException = _GithubException, _UnknownObjectException, _RateLimitExceededException
+        Github, Repository, InputGitTreeElement = _Github, _Repository, _InputGitTreeElement
+    except ImportError as e: print(f"FATAL: Could not import PyGithub: {e}")
+    if HTTPX_AVAILABLE:
+        try:
+            import httpx as _httpx
+            httpx = _httpx
+        except ImportError as e: print(f"Warning: httpx is installed but could not be imported: {e}")
+    _heavy_import_span[1] = time.perf_counter()
+    _heavy_imports_done.set()
+
+def require_github():
+    """Chờ import nền hoàn tất (thường đã xong khi cửa sổ hiện lên). Ném ImportError nếu chưa cài PyGithub."""
+    _heavy_imports_done.wait()
+    if Github is None: raise ImportError("PyGithub chưa được cài (pip install PyGithub).")
+
+threading.Thread(target=_import_heavy_modules, name="import-heavy", daemon=True).start()
 
 # --- Cài đặt và Cấu hình ---
 SETTINGS_FILE = "app_settings.json"
@@ -22,11 +74,328 @@ DEFAULT_SETTINGS = {
     "font_size": 12,
     "api_token": "",
     "show_icons": True,
-    "default_download_dir": os.path.expanduser("~")
+    "default_download_dir": os.path.expanduser("~"),
+    "upload_single_commit": True, # Upload cả thư mục trong MỘT commit (Git Data API)
+    "upload_workers": 8, # Số request song song khi upload (tạo blob, kiểm tra tồn tại)
+    "download_workers": 8, # Số request song song khi tải xuống
+    "download_inflight_mb": 64, # Tối đa số MB đã tải vào bộ nhớ nhưng chưa ghi đĩa
+    "sync_pairs": [], # Các cặp đồng bộ: {'local', 'repo', 'path'}
+    "http_backend": "sync", # "async": truyền blob (tạo khi upload, tải khi download) qua httpx trên một event loop riêng nếu đã cài
+    "prefetch_dirs": False # Tải trước nội dung thư mục đang được chọn/di chuột qua/đang hiển thị
 }
 
+# Cache đối tượng Repository trong GitHubHandler
+REPO_HANDLE_TTL = 300 # giây
+REPO_HANDLE_CACHE_SIZE = 64
+
+# Điều phối request theo Rate Limit
+RATE_LIMIT_MAX_RATE = 10.0 # req/s tối đa (tránh secondary rate limit)
+RATE_LIMIT_MIN_RATE = 0.05 # req/s tối thiểu khi đang giãn nhịp
+RATE_LIMIT_BURST = 20
+RATE_LIMIT_RESERVE = 50 # Quota giữ lại cho thao tác tương tác của người dùng
+RATE_LIMIT_LOW_WATERMARK = 0.1 # Dưới 10% quota -> chia đều phần còn lại tới lúc reset
+RATE_LIMIT_MAX_RETRIES = 5
+
+HTTP_POOL_SIZE = 32 # Số kết nối HTTP giữ lại cho các thread song song
+GITHUB_API_URL = "https://api.github.com"
+RAW_HTTP_TIMEOUT = 60 # giây, cho các request HTTP trực tiếp (stream)
+STREAM_CHUNK_SIZE = 256 * 1024 # Kích thước khối khi stream file
+LARGE_FILE_THRESHOLD = 1024 * 1024 # File >= 1 MB: stream thẳng xuống đĩa thay vì giữ trong bộ nhớ
+CONTENTS_API_LIMIT = 1000 # contents API cắt danh sách thư mục ở 1.000 mục (không báo lỗi) -> dùng trees API
+
+ASYNC_MAX_CONNECTIONS = 64 # Số kết nối tối đa của backend bất đồng bộ
+ASYNC_MAX_CONCURRENCY = 256 # Số request đồng thời tối đa trên event loop
+
+METADATA_CACHE_FILE = "metadata_cache.sqlite3" # Cache metadata GitHub bền vững giữa các lần chạy
+# Số dòng tối đa giữ lại mỗi bảng (bỏ dòng lâu không dùng nhất khi mở cache); tree_indexes chứa cả cây đệ quy nên giữ ít
+METADATA_CACHE_LIMITS = {'trees': 20000, 'tree_indexes': 16, 'listings': 5000, 'local_blobs': 100000}
+
+SYNC_MANIFEST_DIR = "sync_manifests" # Manifest của các cặp đồng bộ (cạnh file cài đặt)
+STREAM_TEMP_NAME_RE = re.compile(r"^\..+\.[a-z0-9_]{8}\.part$") # File tạm của download_blob_to_file (tempfile.mkstemp)
+
+# Tải trước thư mục GitHub (tùy chọn "prefetch_dirs")
+PREFETCH_REQUEST_BUDGET = 30 # Tối đa số lần tải trước trong mỗi PREFETCH_BUDGET_WINDOW giây
+PREFETCH_BUDGET_WINDOW = 60
+PREFETCH_HEADROOM = 0.25 # Không tải trước khi quota còn dưới 25% (để dành cho thao tác thật)
+PREFETCH_QUEUE_SIZE = 16 # Chỉ giữ các yêu cầu mới nhất; yêu cầu cũ hơn bị bỏ
+PREFETCH_DONE_SIZE = 512 # Số thư mục đã tải trước được nhớ (LRU) để bỏ qua yêu cầu lặp lại
+PREFETCH_VISIBLE_LIMIT = 8 # Số thư mục đầu danh sách được tải trước sau khi hiển thị một view
+PREFETCH_HOVER_DELAY_MS = 300 # Chuột dừng trên một dòng bao lâu thì mới tải trước
+
 # Hàng đợi giao tiếp GUI-Worker
 update_queue = queue.Queue()
+ui_queue = queue.Queue() # Các hàm (callable) do worker gửi để chạy trên thread GUI
+UI_QUEUE_BATCH = 20 # Số callable tối đa xử lý mỗi lượt process_queue (giữ giao diện mượt)
+
+VIRTUAL_ROW_MARGIN = 100 # Số dòng được chèn vào Treeview thêm ở mỗi phía vùng đang nhìn thấy
+VIRTUAL_ROW_HEIGHT = 25 # Chiều cao dòng dự phòng (px) khi chưa đo được
+GITHUB_ROWS_PAGE = 2000 # Thư mục GitHub lớn: số dòng đưa vào view mỗi lượt after()
+LOCAL_SCAN_CHUNK = 500 # Số mục thư mục cục bộ gửi sang thread GUI mỗi lần khi đang đọc
+
+PROFILE_STARTUP_AUTH_TIMEOUT_MS = 30000 # --profile-startup: chờ xác thực nền tối đa bao lâu trước khi in báo cáo
+
+# --- Thư mục người dùng (XDG) ---
+_xdg_dir_cache = {}
+
+def xdg_user_dir(name):
+    """Thư mục XDG (DESKTOP, DOWNLOAD, DOCUMENTS...) đọc từ user-dirs.dirs; chỉ chạy xdg-user-dir khi không đọc được.
+    Kết quả được cache trong tiến trình nên các lần gọi get_quick_access_paths sau không tốn subprocess."""
+    if name in _xdg_dir_cache: return _xdg_dir_cache[name]
+    path = ""
+    config_file = os.path.join(os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), "user-dirs.dirs")
+    try:
+        with open(config_file, encoding="utf-8") as f:
+            for line in f:
+                match = re.match(rf'\s*XDG_{name}_DIR\s*=\s*"(.*)"', line)
+                if match: path = match.group(1).replace("$HOME", os.path.expanduser("~")); break
+    except OSError: pass
+    if not path:
+        try: path = subprocess.check_output(['xdg-user-dir', name], text=True, stderr=subprocess.DEVNULL).strip()
+        except (OSError, subprocess.SubprocessError): pass
+    _xdg_dir_cache[name] = path
+    return path
+
+# --- Đo thời gian khởi động (--profile-startup) ---
+class StartupProfiler:
+    """Ghi thời gian từng giai đoạn khởi động tính từ STARTUP_T0. enabled=False: mọi lời gọi đều không làm gì."""
+
+    def __init__(self, enabled=False, budget_ms=None):
+        self.enabled = enabled
+        self.budget_ms = budget_ms # Ngưỡng tới lúc cửa sổ dùng được; vượt quá -> mã thoát khác 0
+        self.phases = [] # (tên, bắt đầu, kết thúc) - giây tính từ STARTUP_T0
+        self._last = STARTUP_T0
+        self.interactive_at = None
+        self.exit_code = 0
+
+    def mark(self, name):
+        """Kết thúc giai đoạn name (bắt đầu từ mốc trước đó trên thread chính)."""
+        now = time.perf_counter()
+        if self.enabled: self.phases.append((name, self._last - STARTUP_T0, now - STARTUP_T0))
+        self._last = now
+
+    def record(self, name, start, end):
+        """Giai đoạn chạy song song (thread nền), start/end theo time.perf_counter()."""
+        if self.enabled: self.phases.append((name, start - STARTUP_T0, end - STARTUP_T0))
+
+    def mark_interactive(self):
+        self.mark("vẽ cửa sổ (idle)")
+        self.interactive_at = self._last - STARTUP_T0
+
+    def report(self):
+        lines = ["--- Startup profile (ms) ---"]
+        for name, start, end in self.phases:
+            lines.append(f"{name:<28}{(end - start) * 1000:9.1f}   [{start * 1000:8.1f} -> {end * 1000:8.1f}]")
+        if self.interactive_at is not None:
+            lines.append(f"{'=> cửa sổ dùng được sau':<28}{self.interactive_at * 1000:9.1f}")
+            if self.budget_ms is not None and self.interactive_at * 1000 > self.budget_ms:
+                lines.append(f"!!! Vượt ngưỡng khởi động {self.budget_ms} ms")
+                self.exit_code = 1
+        return "\n".join(lines)
+
+# --- Mô hình dòng ảo hóa cho Treeview ---
+class VirtualTreeRows:
+    """Mô hình dòng cho một ttk.Treeview phẳng (không có cấp con).
+    Toàn bộ dòng (iid, text, values) nằm trong Python; Treeview chỉ chứa cửa sổ [first, first + count) quanh vùng đang
+    nhìn thấy cộng VIRTUAL_ROW_MARGIN dòng mỗi phía, nên thư mục 100k mục vẫn chỉ có vài trăm item Tcl.
+    Thanh cuộn dọc phản ánh vị trí trong toàn bộ mô hình; cuộn gần mép cửa sổ thì cửa sổ được dựng lại quanh vị trí mới.
+    Thêm/xóa/di chuyển/sắp xếp/kiểm tra tồn tại/vùng chọn đều đi qua lớp này (API gần giống Treeview); các thay đổi
+    được gộp lại và áp vào Treeview một lần ở lượt idle kế tiếp."""
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.rows = [] # list (iid, text, values)
+        self._positions = None # iid -> vị trí trong rows (dựng lại khi cần)
+        self.first = 0; self.count = 0 # Cửa sổ đang có trong Treeview
+        self._top = 0 # Dòng (trong mô hình) ở đầu vùng nhìn thấy
+        self._selected = set(); self._focus = ""
+        self._refresh_job = None
+        self._materializing = False
+        self._user_select = False; self._extend_select = False
+        tree.configure(yscrollcommand=self._on_tree_yview)
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.bind("<ButtonPress-1>", lambda e: self._note_user_select(False), add="+")
+        tree.bind("<Control-ButtonPress-1>", lambda e: self._note_user_select(True), add="+")
+        tree.bind("<Shift-ButtonPress-1>", lambda e: self._note_user_select(True), add="+")
+        tree.bind("<KeyPress>", lambda e: self._note_user_select(bool(e.state & 0x0001)), add="+")
+        tree.bind("<<TreeviewSelect>>", self._on_tree_select, add="+")
+        tree.bind("<Configure>", lambda e: self._schedule_refresh(), add="+")
+
+    # --- Truy vấn ---
+    def __len__(self): return len(self.rows)
+
+    def _index_map(self):
+        if self._positions is None: self._positions = {row[0]: i for i, row in enumerate(self.rows)}
+        return self._positions
+
+    def exists(self, iid): return iid in self._index_map()
+
+    def index(self, iid): return self._index_map()[iid]
+
+    def get_children(self): return tuple(row[0] for row in self.rows)
+
+    def item(self, iid, option):
+        """Như Treeview.item(iid, 'text' | 'values'), kể cả với dòng chưa được chèn vào Treeview."""
+        position = self._index_map().get(iid)
+        if position is None: raise tk.TclError(f'Item {iid} not found')
+        _, text, values = self.rows[position]
+        return text if option == 'text' else tuple(values)
+
+    def selection(self):
+        self._capture_selection()
+        positions = self._index_map()
+        return tuple(sorted((iid for iid in self._selected if iid in positions), key=positions.get))
+
+    def focus(self, iid=None):
+        if iid is None: return self.tree.focus() or self._focus
+        self._focus = iid
+        if self.first <= self._index_map().get(iid, -1) < self.first + self.count: self.tree.focus(iid)
+
+    # --- Thay đổi ---
+    def clear(self):
+        """Xóa hết ngay lập tức (kể cả trong Treeview) và cuộn về đầu."""
+        self.rows = []; self._positions = None; self._selected = set(); self._focus = ""
+        self.first = self.count = self._top = 0
+        self._materializing = True
+        try: self.tree.delete(*self.tree.get_children(""))
+        finally: self._materializing = False
+        self._update_scrollbar()
+
+    def set_rows(self, rows):
+        """Thay toàn bộ dòng, giữ vị trí cuộn và các dòng đang chọn còn tồn tại."""
+        self._capture_selection()
+        self.rows = [(iid, text, tuple(values)) for iid, text, values in rows]; self._positions = None
+        self._schedule_refresh()
+
+    def insert(self, index, iid, text="", values=()):
+        row = (iid, text, tuple(values))
+        if index == tk.END or index >= len(self.rows): self.rows.append(row)
+        else: self.rows.insert(index, row)
+        self._positions = None
+        self._schedule_refresh()
+
+    def extend(self, rows):
+        self.rows.extend((iid, text, tuple(values)) for iid, text, values in rows); self._positions = None
+        self._schedule_refresh()
+
+    def delete(self, *iids):
+        doomed = set(iids)
+        self.rows = [row for row in self.rows if row[0] not in doomed]; self._positions = None
+        self._selected -= doomed
+        self._schedule_refresh()
+
+    def move(self, iid, index):
+        row = self.rows.pop(self.index(iid))
+        if index == tk.END: self.rows.append(row)
+        else: self.rows.insert(index, row)
+        self._positions = None
+        self._schedule_refresh()
+
+    def reorder(self, iids):
+        """Sắp lại theo thứ tự iids (sau khi sắp xếp theo cột); dòng không có trong iids giữ ở cuối."""
+        positions = self._index_map()
+        ordered = [self.rows[positions[iid]] for iid in iids if iid in positions]
+        listed = {row[0] for row in ordered}
+        self.rows = ordered + [row for row in self.rows if row[0] not in listed]; self._positions = None
+        self._schedule_refresh()
+
+    def selection_set(self, iids):
+        self._selected = set([iids] if isinstance(iids, str) else iids)
+        self._schedule_refresh()
+
+    def see(self, iid):
+        """Cuộn để dòng iid nằm trong vùng nhìn thấy (dựng lại cửa sổ ngay nếu cần)."""
+        position = self._index_map().get(iid)
+        if position is None: return
+        visible = self._visible_count()
+        if not self._top <= position < self._top + visible:
+            self._refresh(max(0, position - visible // 2))
+        if self.tree.exists(iid): self.tree.see(iid)
+
+    # --- Dựng cửa sổ ---
+    def _visible_count(self):
+        height = VIRTUAL_ROW_HEIGHT
+        children = self.tree.get_children("")
+        if children:
+            bbox = self.tree.bbox(children[0])
+            if bbox: height = bbox[3]
+        else:
+            try: height = int(ttk.Style().lookup(self.tree.cget('style') or "Treeview", "rowheight") or height)
+            except (tk.TclError, ValueError): pass
+        return max(1, self.tree.winfo_height() // max(1, height))
+
+    def _schedule_refresh(self):
+        if self._refresh_job is None: self._refresh_job = self.tree.after_idle(self._refresh)
+
+    def _capture_selection(self):
+        """Gộp vùng chọn trong Treeview vào mô hình (dòng ngoài cửa sổ vẫn giữ trạng thái chọn)."""
+        window = {row[0] for row in self.rows[self.first:self.first + self.count]}
+        self._selected = (self._selected - window) | set(self.tree.selection())
+        self._focus = self.tree.focus() or self._focus
+
+    def _refresh(self, top=None):
+        if self._refresh_job is not None:
+            try: self.tree.after_cancel(self._refresh_job)
+            except tk.TclError: pass
+            self._refresh_job = None
+        if not self._materializing and self.count: self._capture_selection()
+        total = len(self.rows); visible = self._visible_count()
+        top = max(0, min(self._top if top is None else int(top), max(0, total - visible)))
+        span = visible + 2 * VIRTUAL_ROW_MARGIN
+        first = max(0, min(top - VIRTUAL_ROW_MARGIN, total - span))
+        window = self.rows[first:first + span]
+        self._materializing = True
+        try:
+            self.tree.delete(*self.tree.get_children(""))
+            for iid, text, values in window: self.tree.insert("", tk.END, iid=iid, text=text, values=values)
+            self.first, self.count, self._top = first, len(window), top
+            in_window = [row[0] for row in window if row[0] in self._selected]
+            self.tree.selection_set(in_window)
+            if self._focus and self.tree.exists(self._focus): self.tree.focus(self._focus)
+            if self.count: self.tree.yview_moveto((top - first) / self.count)
+        finally: self._materializing = False
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if not total or not self.count: self.scrollbar.set(0.0, 1.0); return
+        visible = min(self._visible_count(), total)
+        self.scrollbar.set(self._top / total, min(1.0, (self._top + visible) / total))
+
+    # --- Sự kiện ---
+    def _note_user_select(self, extend):
+        self._user_select = True; self._extend_select = extend
+
+    def _on_tree_select(self, event):
+        if self._materializing or not self._user_select: return # Do chính mô hình dựng lại cửa sổ
+        self._user_select = False
+        selected = set(self.tree.selection())
+        if self._extend_select:
+            window = {row[0] for row in self.rows[self.first:self.first + self.count]}
+            selected |= self._selected - window
+        self._selected = selected; self._focus = self.tree.focus()
+
+    def _on_tree_yview(self, lo, hi):
+        """yscrollcommand của Treeview: cập nhật vị trí trong mô hình, dựng lại cửa sổ khi cuộn gần mép."""
+        if self._materializing or not self.count: return
+        lo, hi = float(lo), float(hi)
+        self._top = self.first + int(round(lo * self.count))
+        self._update_scrollbar()
+        near_start = self.first > 0 and lo * self.count < VIRTUAL_ROW_MARGIN / 2
+        near_end = self.first + self.count < len(self.rows) and (1.0 - hi) * self.count < VIRTUAL_ROW_MARGIN / 2
+        if near_start or near_end: self._schedule_refresh()
+
+    def _on_scrollbar(self, *args):
+        total = len(self.rows)
+        if not total: return
+        visible = self._visible_count()
+        if args[0] == "moveto": top = float(args[1]) * total
+        elif args[0] == "scroll": top = self._top + int(args[1]) * (visible if args[2] == "pages" else 1)
+        else: return
+        top = int(max(0, min(top, total - visible)))
+        if self.first <= top and top + visible <= self.first + self.count:
+            self.tree.yview_moveto((top - self.first) / self.count) # Vẫn trong cửa sổ: chỉ cuộn Treeview
+        else: self._refresh(top)
 
 # --- Simple Icon Placeholders ---
 FOLDER_ICON = "📁"
@@ -34,36 +403,565 @@ FILE_ICON = "📄"
 DRIVE_ICON = "💽" # Icon ổ đĩa
 REPO_ICON = "📦" # Icon repo GitHub
 
+# --- Chỉ mục cây thư mục repo (Git Trees API) ---
+class TreeEntry:
+    """Một mục trong cây repo. Có các thuộc tính giống ContentFile mà UI/worker dùng (name, path, type, sha, size)."""
+    __slots__ = ('name', 'path', 'type', 'sha', 'size', 'mode')
+    GIT_TYPE_MAP = {'tree': 'dir', 'blob': 'file', 'commit': 'submodule'}
+
+    def __init__(self, path, type, sha, size=0, mode=""):
+        self.path = path
+        self.name = path.rsplit('/', 1)[-1]
+        self.type = type # 'dir' | 'file' | 'submodule'
+        self.sha = sha
+        self.size = size or 0
+        self.mode = mode
+
+GitTreeRow = collections.namedtuple("GitTreeRow", "path type sha size mode") # Một mục tree như API trả về
+CachedRepo = collections.namedtuple("CachedRepo", "name raw") # Repo đọc từ cache SQLite (không cần PyGithub)
+
+class RepoTreeIndex:
+    """Chỉ mục toàn bộ cây của repo, dựng từ MỘT lần gọi trees?recursive=1 và gắn với SHA của tree gốc.
+    Liệt kê bất kỳ thư mục nào sau đó không tốn thêm request."""
+
+    def __init__(self, repo_name, branch, root_sha, git_tree_elements):
+        self.repo_name = repo_name
+        self.branch = branch
+        self.root_sha = root_sha
+        self.entries = {} # path -> TreeEntry
+        self.children = {"": []} # path thư mục -> list TreeEntry con trực tiếp
+        for el in git_tree_elements:
+            entry = TreeEntry(el.path, TreeEntry.GIT_TYPE_MAP.get(el.type, el.type), el.sha, el.size, el.mode)
+            self.entries[entry.path] = entry
+            self.children.setdefault(entry.path.rpartition('/')[0], []).append(entry)
+            if entry.type == 'dir': self.children.setdefault(entry.path, [])
+
+    @classmethod
+    def from_rows(cls, repo_name, branch, root_sha, rows):
+        """Dựng lại chỉ mục từ các dòng (path, type git, sha, size, mode) đã lưu trong MetadataCache."""
+        return cls(repo_name, branch, root_sha, [GitTreeRow(*row) for row in rows])
+
+    def get(self, path):
+        return self.entries.get(path.strip('/'))
+
+    def list_dir(self, path=""):
+        """Danh sách con trực tiếp của thư mục, None nếu path không phải thư mục."""
+        return self.children.get(path.strip('/'))
+
+    def walk(self, path=""):
+        """Duyệt đệ quy mọi mục (file và thư mục) nằm dưới path."""
+        stack = list(self.list_dir(path) or [])
+        while stack:
+            entry = stack.pop()
+            yield entry
+            if entry.type == 'dir': stack.extend(self.children.get(entry.path, []))
+
+# --- Cache HTTP có điều kiện (ETag / Last-Modified) ---
+class ConditionalRequestCache:
+    """Lưu ETag/Last-Modified + dữ liệu JSON theo URL. Phản hồi 304 được phục vụ từ cache
+    (GitHub không tính 304 vào Rate Limit). Thread-safe, giới hạn số mục (LRU)."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict() # key -> (etag, last_modified, data)
+        self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0
+
+    @staticmethod
+    def make_key(url, parameters=None):
+        return (url, tuple(sorted((parameters or {}).items())))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None: self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, etag, last_modified, data):
+        if not etag and not last_modified: return
+        with self._lock:
+            self._entries[key] = (etag, last_modified, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock: self._entries.clear()
+
+# --- Giới hạn số byte đang tải trong bộ nhớ ---
+class ByteBudget:
+    """Ngân sách byte cho pipeline tải xuống: số byte đã tải nhưng chưa ghi đĩa không vượt quá limit.
+    Mục lớn hơn cả ngân sách vẫn được chạy, nhưng một mình."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size):
+        size = max(0, min(int(size or 0), self.limit))
+        with self._cond:
+            while self.in_use > 0 and self.in_use + size > self.limit: self._cond.wait()
+            self.in_use += size
+        return size # Số byte thực sự giữ chỗ, dùng cho release()
+
+    def release(self, size):
+        with self._cond:
+            self.in_use -= size
+            self._cond.notify_all()
+
+# --- Bộ điều phối request theo Rate Limit (token bucket) ---
+class RateLimitScheduler:
+    """Điều phối mọi request tới GitHub API.
+    - Token bucket: tối đa RATE_LIMIT_MAX_RATE req/s (burst RATE_LIMIT_BURST) để tránh secondary rate limit.
+    - Đọc X-RateLimit-Remaining/Reset và Retry-After từ phản hồi; khi quota xuống dưới ngưỡng thấp thì
+      giãn nhịp cho đủ tới lúc reset, hết quota hoặc bị Retry-After thì tạm dừng rồi tự chạy tiếp."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.limit = None; self.remaining = None; self.reset_at = None # reset_at: epoch (giây)
+        self.paused_until = 0.0 # epoch
+        self._tokens = float(RATE_LIMIT_BURST)
+        self._last_refill = time.monotonic()
+
+    def _usable(self):
+        return max(0, self.remaining - RATE_LIMIT_RESERVE) if self.remaining is not None else None
+
+    def _rate(self):
+        """Số request/giây được phép tại thời điểm hiện tại."""
+        usable = self._usable()
+        if usable is None or self.reset_at is None or not self.limit: return RATE_LIMIT_MAX_RATE
+        if usable > self.limit * RATE_LIMIT_LOW_WATERMARK: return RATE_LIMIT_MAX_RATE
+        window = max(1.0, self.reset_at - time.time())
+        return max(RATE_LIMIT_MIN_RATE, min(RATE_LIMIT_MAX_RATE, usable / window))
+
+    def acquire(self):
+        """Chờ tới khi được phép gửi request (chỉ gọi từ worker thread; UI thread dùng try_acquire)."""
+        with self._cond:
+            while True:
+                now = time.time()
+                if self.paused_until > now:
+                    self._cond.wait(min(self.paused_until - now, 5.0)); continue
+                mono = time.monotonic()
+                self._tokens = min(float(RATE_LIMIT_BURST), self._tokens + (mono - self._last_refill) * self._rate())
+                self._last_refill = mono
+                if self._tokens >= 1:
+                    self._tokens -= 1; return
+                self._cond.wait((1 - self._tokens) / self._rate())
+
+    def try_acquire(self):
+        """Như acquire() nhưng không chặn (cho event loop asyncio và UI thread): lấy được token thì trả về 0,
+        ngược lại trả về số giây nên chờ trước khi thử lại."""
+        with self._cond:
+            now = time.time()
+            if self.paused_until > now: return self.paused_until - now
+            mono = time.monotonic()
+            self._tokens = min(float(RATE_LIMIT_BURST), self._tokens + (mono - self._last_refill) * self._rate())
+            self._last_refill = mono
+            if self._tokens >= 1:
+                self._tokens -= 1; return 0.0
+            return (1 - self._tokens) / self._rate()
+
+    def observe(self, headers):
+        """Cập nhật trạng thái từ header phản hồi (key chữ thường như PyGithub trả về)."""
+        if not headers: return
+        with self._cond:
+            try:
+                if 'x-ratelimit-limit' in headers: self.limit = int(headers['x-ratelimit-limit'])
+                if 'x-ratelimit-remaining' in headers: self.remaining = int(headers['x-ratelimit-remaining'])
+                if 'x-ratelimit-reset' in headers: self.reset_at = float(headers['x-ratelimit-reset'])
+                retry_after = headers.get('retry-after')
+                if retry_after: self._pause_locked(time.time() + float(retry_after))
+            except (TypeError, ValueError): pass
+            if self.remaining == 0 and self.reset_at: self._pause_locked(self.reset_at + 1)
+
+    def observe_values(self, remaining, limit, reset_at):
+        """Như observe() nhưng với giá trị đã được PyGithub tách sẵn (Requester.rate_limiting)."""
+        if remaining is None or remaining < 0: return
+        self.observe({'x-ratelimit-remaining': remaining, 'x-ratelimit-limit': limit, 'x-ratelimit-reset': reset_at or self.reset_at or 0})
+
+    def _pause_locked(self, until):
+        if until > self.paused_until:
+            self.paused_until = until
+            print(f"Rate limit: pausing requests until {time.strftime('%H:%M:%S', time.localtime(until))}")
+        self._cond.notify_all()
+
+    @staticmethod
+    def is_rate_limit_error(e):
+        if isinstance(e, RateLimitExceededException): return True
+        if isinstance(e, GithubException) and e.status in (403, 429):
+            msg = (e.data or {}).get('message', '') if isinstance(e.data, dict) else str(e.data)
+            return 'rate limit' in msg.lower() or bool((getattr(e, 'headers', None) or {}).get('retry-after'))
+        return False
+
+    def pause_for_error(self, e):
+        """Tạm dừng theo header của lỗi rate limit. Trả về số giây sẽ chờ."""
+        self.observe(getattr(e, 'headers', None) or {})
+        with self._cond:
+            now = time.time()
+            if self.paused_until <= now:
+                # Không có Retry-After: primary limit -> chờ tới reset; secondary limit -> chờ 60s
+                until = self.reset_at + 1 if isinstance(e, RateLimitExceededException) and self.reset_at and self.reset_at > now else now + 60
+                self._pause_locked(until)
+            return max(0.0, self.paused_until - now)
+
+    def estimate_seconds(self, pending_requests):
+        """Thời gian dự kiến để gửi pending_requests request với quota hiện tại."""
+        if pending_requests <= 0: return 0.0
+        with self._cond:
+            now = time.time(); wait = max(0.0, self.paused_until - now)
+            usable = self._usable()
+            if usable is None or pending_requests <= usable: return wait + pending_requests / self._rate()
+            until_reset = max(0.0, (self.reset_at or now) - now)
+            return max(wait, until_reset) + usable / self._rate() + (pending_requests - usable) / RATE_LIMIT_MAX_RATE
+
+    def status_text(self):
+        with self._cond:
+            if self.remaining is None: return "API: ?"
+            text = f"API: {self.remaining}/{self.limit}"
+            if self.paused_until > time.time(): text += f" (tạm dừng tới {time.strftime('%H:%M:%S', time.localtime(self.paused_until))})"
+            elif self.reset_at and self.remaining < (self.limit or 0): text += f" (reset {time.strftime('%H:%M', time.localtime(self.reset_at))})"
+            return text
+
+# --- Manifest đồng bộ 2 chiều ---
+class SyncManifest:
+    """Trạng thái của lần đồng bộ gần nhất cho một cặp (thư mục cục bộ <-> repo/path).
+    local: rel_path -> {'size', 'mtime', 'sha'}; remote: rel_path -> {'size', 'sha'}.
+    remote_tree_sha: SHA tree của thư mục GitHub lúc đó (không đổi => bên remote không có thay đổi)."""
+
+    def __init__(self, local_dir, repo_name, github_path):
+        key = f"{os.path.abspath(local_dir)}|{repo_name}|{github_path.strip('/')}"
+        self.file_path = os.path.join(SYNC_MANIFEST_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".json")
+        self.local = {}; self.remote = {}; self.remote_tree_sha = None
+
+    def load(self):
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f: data = json.load(f)
+            self.local = data.get('local', {}); self.remote = data.get('remote', {}); self.remote_tree_sha = data.get('remote_tree_sha')
+        except (FileNotFoundError, json.JSONDecodeError): pass # Lần đầu đồng bộ
+        return self
+
+    def save(self):
+        os.makedirs(SYNC_MANIFEST_DIR, exist_ok=True)
+        tmp_path = self.file_path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'local': self.local, 'remote': self.remote, 'remote_tree_sha': self.remote_tree_sha}, f)
+        os.replace(tmp_path, self.file_path)
+
+# --- Cache metadata bền vững (SQLite) ---
+class MetadataCache:
+    """Lưu metadata GitHub xuống đĩa để dùng lại giữa các lần chạy:
+    - logins: tài khoản của lần xác thực thành công gần nhất theo SHA-256 của token (không lưu token);
+    - repos: dữ liệu thô của danh sách repo theo tài khoản (hiển thị ngay khi mở app);
+    - trees: danh sách con của một thư mục theo SHA tree; tree_indexes: cây đệ quy theo SHA tree gốc.
+      Dữ liệu theo SHA không bao giờ cũ nên dùng được mà không cần request nào;
+    - listings: danh sách gần nhất của mỗi (repo, path) - có thể đã cũ, chỉ để hiển thị trong lúc kiểm tra lại;
+    - local_blobs: SHA blob của file cục bộ theo (path, size, mtime) để khỏi băm lại.
+    Bốn bảng sau có cột accessed (lần ghi/đọc gần nhất, có index); khi mở, một thread nền cắt mỗi bảng về
+    METADATA_CACHE_LIMITS dòng mới nhất.
+    Thread-safe (một kết nối + lock). Lỗi SQLite chỉ được ghi log, cache trả về None như khi chưa có dữ liệu."""
+
+    def __init__(self, db_path=METADATA_CACHE_FILE):
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("CREATE TABLE IF NOT EXISTS logins (token_hash TEXT PRIMARY KEY, login TEXT)")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS repos (login TEXT, name TEXT, raw TEXT, PRIMARY KEY (login, name))")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS trees (sha TEXT PRIMARY KEY, entries TEXT, accessed REAL DEFAULT 0)")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS tree_indexes (root_sha TEXT PRIMARY KEY, rows TEXT, accessed REAL DEFAULT 0)")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS listings (login TEXT, repo TEXT, path TEXT, entries TEXT, accessed REAL DEFAULT 0, PRIMARY KEY (login, repo, path))")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS local_blobs (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha TEXT, accessed REAL DEFAULT 0)")
+                for table, limit in METADATA_CACHE_LIMITS.items():
+                    columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+                    if "accessed" not in columns: self._conn.execute(f"ALTER TABLE {table} ADD COLUMN accessed REAL DEFAULT 0") # Cache của phiên bản cũ
+                    self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+        except sqlite3.Error as e:
+            print(f"Warning: Metadata cache disabled ({db_path}): {e}")
+            self._conn = None
+        if self._conn is not None: # Dọn cache trên thread nền: không kéo dài lúc khởi động
+            threading.Thread(target=self._prune, name="metadata-cache-prune", daemon=True).start()
+
+    def _prune(self):
+        """Mỗi bảng chỉ giữ METADATA_CACHE_LIMITS dòng được dùng gần nhất (chỉ xóa khi vượt giới hạn)."""
+        for table, limit in METADATA_CACHE_LIMITS.items():
+            rows = self._query(f"SELECT COUNT(*) FROM {table}")
+            if not rows or rows[0][0] <= limit: continue
+            self._write(f"DELETE FROM {table} WHERE accessed < (SELECT accessed FROM {table} ORDER BY accessed DESC LIMIT 1 OFFSET ?)", (limit - 1,))
+
+    def _query(self, sql, params=()):
+        if self._conn is None: return []
+        try:
+            with self._lock: return self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: Metadata cache read failed: {e}"); return []
+
+    def _touch(self, sql, params):
+        """Cập nhật cột accessed của dòng vừa đọc trúng (để giữ lại khi dọn cache)."""
+        self._write(sql, (time.time(),) + tuple(params))
+
+    def _write(self, sql, rows, many=False):
+        if self._conn is None: return
+        try:
+            with self._lock, self._conn:
+                if many: self._conn.executemany(sql, rows)
+                else: self._conn.execute(sql, rows)
+        except sqlite3.Error as e: print(f"Warning: Metadata cache write failed: {e}")
+
+    # --- Tài khoản đã xác thực ---
+    @staticmethod
+    def token_key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get_login(self, token):
+        rows = self._query("SELECT login FROM logins WHERE token_hash = ?", (self.token_key(token),))
+        return rows[0][0] if rows else None
+
+    def store_login(self, token, login):
+        self._write("INSERT OR REPLACE INTO logins VALUES (?, ?)", (self.token_key(token), login))
+
+    # --- Danh sách repo ---
+    def get_repos(self, login):
+        """Dữ liệu thô (dict) của các repo đã lưu cho tài khoản."""
+        return [json.loads(raw) for (raw,) in self._query("SELECT raw FROM repos WHERE login = ?", (login,))]
+
+    def store_repos(self, login, raw_repos):
+        """Thay toàn bộ danh sách repo đã lưu của tài khoản."""
+        if self._conn is None: return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM repos WHERE login = ?", (login,))
+                self._conn.executemany("INSERT OR REPLACE INTO repos VALUES (?, ?, ?)", [(login, raw['name'], json.dumps(raw)) for raw in raw_repos])
+        except sqlite3.Error as e: print(f"Warning: Metadata cache write failed: {e}")
+
+    # --- Cây thư mục (theo SHA) ---
+    def get_tree(self, tree_sha):
+        """List TreeEntry con trực tiếp của tree, hoặc None nếu chưa có."""
+        rows = self._query("SELECT entries FROM trees WHERE sha = ?", (tree_sha,))
+        if not rows: return None
+        self._touch("UPDATE trees SET accessed = ? WHERE sha = ?", (tree_sha,))
+        return [TreeEntry(*entry) for entry in json.loads(rows[0][0])]
+
+    def store_trees(self, trees):
+        """trees: dict tree_sha -> list TreeEntry."""
+        now = time.time()
+        self._write("INSERT OR REPLACE INTO trees (sha, entries, accessed) VALUES (?, ?, ?)",
+                    [(sha, json.dumps([(e.path, e.type, e.sha, e.size, e.mode) for e in entries]), now) for sha, entries in trees.items()], many=True)
+
+    def get_tree_index_rows(self, root_sha):
+        rows = self._query("SELECT rows FROM tree_indexes WHERE root_sha = ?", (root_sha,))
+        if not rows: return None
+        self._touch("UPDATE tree_indexes SET accessed = ? WHERE root_sha = ?", (root_sha,))
+        return json.loads(rows[0][0])
+
+    def store_tree_index(self, root_sha, git_tree_elements, index):
+        """Lưu cây đệ quy (để dựng lại chỉ mục) và danh sách con của mọi thư mục trong đó (theo SHA tree)."""
+        self._write("INSERT OR REPLACE INTO tree_indexes (root_sha, rows, accessed) VALUES (?, ?, ?)",
+                    (root_sha, json.dumps([(el.path, el.type, el.sha, el.size, el.mode) for el in git_tree_elements]), time.time()))
+        trees = {root_sha: index.list_dir("")}
+        for entry in index.entries.values():
+            if entry.type == 'dir': trees[entry.sha] = index.list_dir(entry.path) or []
+        self.store_trees(trees)
+
+    # --- Danh sách gần nhất theo (repo, path) ---
+    def get_listing(self, login, repo, path):
+        rows = self._query("SELECT entries FROM listings WHERE login = ? AND repo = ? AND path = ?", (login, repo, path))
+        if not rows: return None
+        self._touch("UPDATE listings SET accessed = ? WHERE login = ? AND repo = ? AND path = ?", (login, repo, path))
+        return [TreeEntry(*entry) for entry in json.loads(rows[0][0])]
+
+    def store_listing(self, login, repo, path, entries):
+        self._write("INSERT OR REPLACE INTO listings (login, repo, path, entries, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (login, repo, path, json.dumps([(e.path, e.type, e.sha, e.size, e.mode) for e in entries]), time.time()))
+
+    # --- SHA blob của file cục bộ ---
+    def get_local_blob_sha(self, path, size, mtime_ns):
+        rows = self._query("SELECT sha FROM local_blobs WHERE path = ? AND size = ? AND mtime_ns = ?", (path, size, mtime_ns))
+        if not rows: return None
+        self._touch("UPDATE local_blobs SET accessed = ? WHERE path = ?", (path,))
+        return rows[0][0]
+
+    def store_local_blob_sha(self, path, size, mtime_ns, sha):
+        self._write("INSERT OR REPLACE INTO local_blobs (path, size, mtime_ns, sha, accessed) VALUES (?, ?, ?, ?, ?)", (path, size, mtime_ns, sha, time.time()))
+
+# --- Backend HTTP bất đồng bộ (tùy chọn, cần httpx) ---
+class AsyncGitHubBackend:
+    """Backend truyền blob bất đồng bộ: một httpx.AsyncClient dùng chung (HTTP/2 nếu có gói h2, nếu không
+    HTTP/1.1 keep-alive) chạy trên MỘT thread event loop riêng. Dùng chung token, bộ điều phối Rate Limit
+    và cache repo của handler.
+    Chỉ phần nhiều request nhất đi qua đây: tạo blob khi upload (commit_files) và tải blob khi download; worker gửi
+    hàng trăm request đồng thời qua submit() (trả về concurrent.futures.Future) mà không cần thêm thread.
+    Liệt kê, xóa và commit (vài request tuần tự mỗi thao tác) vẫn đi qua PyGithub với cache ETag của GitHubHandler."""
+
+    def __init__(self, handler, max_connections=ASYNC_MAX_CONNECTIONS):
+        self.handler = handler
+        self.login = handler.user.login
+        self._repo_meta = {} # repo_name -> (full_name, default_branch)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="github-async-loop", daemon=True)
+        self._thread.start()
+        self.client, self._semaphore = self.run(self._create_client(max_connections))
+
+    async def _create_client(self, max_connections):
+        options = dict(base_url=GITHUB_API_URL, timeout=httpx.Timeout(RAW_HTTP_TIMEOUT, pool=None),
+                       limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                       headers={"Authorization": f"token {self.handler.authenticated_token}", "User-Agent": "github-repository-manager",
+                                "Accept": "application/vnd.github+json"})
+        try: client = httpx.AsyncClient(http2=True, **options)
+        except ImportError: client = httpx.AsyncClient(**options) # Chưa cài h2: HTTP/1.1 keep-alive
+        return client, asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+
+    def submit(self, coro):
+        """Đưa coroutine vào event loop, trả về concurrent.futures.Future (dùng được với as_completed)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Chạy coroutine và chờ kết quả (không gọi từ chính event loop)."""
+        return self.submit(coro).result()
+
+    def close(self):
+        try: self.run(self.client.aclose())
+        finally: self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def request(self, method, url, content_factory=None, **kwargs):
+        """Gửi request qua bộ điều phối Rate Limit; lỗi HTTP được chuyển thành exception của PyGithub.
+        Bị rate limit thì tạm dừng rồi thử lại (tối đa RATE_LIMIT_MAX_RETRIES lần).
+        content_factory: hàm tạo body mới cho mỗi lần thử (body dạng stream chỉ đọc được một lần)."""
+        scheduler = self.handler.scheduler
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            while True:
+                wait = scheduler.try_acquire()
+                if wait <= 0: break
+                await asyncio.sleep(min(wait, 5.0))
+            if content_factory: kwargs['content'] = content_factory()
+            async with self._semaphore:
+                response = await self.client.request(method, url, **kwargs)
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            scheduler.observe(headers)
+            if response.status_code < 400: return response
+            try: body = response.json()
+            except ValueError: body = {'message': response.text}
+            if response.status_code in (403, 429) and headers.get('x-ratelimit-remaining') == '0': error = RateLimitExceededException(response.status_code, body, headers)
+            elif response.status_code == 404: error = UnknownObjectException(response.status_code, body, headers)
+            else: error = GithubException(response.status_code, body, headers)
+            if not RateLimitScheduler.is_rate_limit_error(error) or attempt == RATE_LIMIT_MAX_RETRIES: raise error
+            wait = scheduler.pause_for_error(error)
+            print(f"Rate limit hit ({error.status}), waiting {wait:.0f}s before async retry {attempt + 1}/{RATE_LIMIT_MAX_RETRIES}...")
+
+    async def repo_meta(self, repo_name):
+        """(full_name, default_branch) của repo; ưu tiên cache repo của handler (không tốn request)."""
+        meta = self._repo_meta.get(repo_name)
+        if meta: return meta
+        with self.handler._repo_handles_lock: cached = self.handler._repo_handles.get(repo_name)
+        if cached is not None: meta = (cached[0].full_name, cached[0].default_branch)
+        else:
+            data = (await self.request("GET", f"/repos/{self.login}/{urllib.parse.quote(repo_name)}")).json()
+            meta = (data['full_name'], data['default_branch'])
+        self._repo_meta[repo_name] = meta
+        return meta
+
+    # --- Đọc ---
+    async def get_blob_content_async(self, repo_name, sha, path=None):
+        full_name, _ = await self.repo_meta(repo_name)
+        url = f"/repos/{full_name}/git/blobs/{sha}" if sha else f"/repos/{full_name}/contents/{urllib.parse.quote(path.strip('/'))}"
+        return (await self.request("GET", url, headers={"Accept": "application/vnd.github.raw"})).content
+
+    # --- Ghi ---
+    async def create_blob_async(self, repo_name, local_path, progress_callback=None):
+        """Tạo blob bằng body JSON được stream (base64 từng khối), bộ nhớ không phụ thuộc kích thước file."""
+        full_name, _ = await self.repo_meta(repo_name)
+        size = os.path.getsize(local_path)
+        prefix = b'{"encoding": "base64", "content": "'; suffix = b'"}'
+        chunk_size = (STREAM_CHUNK_SIZE // 3) * 3
+        loop = asyncio.get_running_loop()
+        async def body():
+            yield prefix
+            done = 0
+            with open(local_path, "rb") as f:
+                while True:
+                    chunk = await loop.run_in_executor(None, f.read, chunk_size)
+                    if not chunk: break
+                    done += len(chunk)
+                    yield base64.b64encode(chunk)
+                    if progress_callback: progress_callback(done, size)
+            yield suffix
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(prefix) + 4 * ((size + 2) // 3) + len(suffix))}
+        response = await self.request("POST", f"/repos/{full_name}/git/blobs", content_factory=body, headers=headers)
+        return response.json()['sha']
+
 # --- Lớp xử lý GitHub API ---
 class GitHubHandler:
     # ... (Giữ nguyên toàn bộ lớp GitHubHandler đã sửa lỗi trước đó) ...
-    # Đảm bảo hàm get_repo_contents xử lý ref=None đúng cách
-    def __init__(self, token=None):
+    # Đảm bảo hàm fetch_repo_contents xử lý ref=None đúng cách
+    def __init__(self, token=None, authenticate=True):
+        """authenticate=False: không gọi mạng trong constructor; gọi authenticate() ở thread nền sau đó.
+        Trong lúc chờ, login là tài khoản của lần xác thực trước với cùng token (nếu có)."""
         self.g = None
         self.user = None
+        self.token = token
         self.authenticated_token = None # Track the token used for successful auth
-
+        self.auth_pending = False # Có token nhưng chưa xác thực xong
+        self.auth_error = None
+        self._client_lock = threading.Lock()
+        self._tree_indexes = {} # repo_name -> RepoTreeIndex (chỉ mục cây đệ quy)
+        self._truncated_roots = {} # repo_name -> SHA tree gốc có cây đệ quy bị cắt (không tải lại khi chưa đổi)
+        self._tree_index_lock = threading.Lock()
+        self.http_cache = ConditionalRequestCache() # Cache ETag cho các GET lặp lại (refresh)
+        self._repo_handles = collections.OrderedDict() # repo_name -> (Repository, thời điểm lấy)
+        self._repo_handles_lock = threading.Lock()
+        self.scheduler = RateLimitScheduler()
+        self.metadata = MetadataCache()
+        self.use_async_backend = False # Bật bởi cài đặt "http_backend" == "async"
+        self._async_backend = None
+        self._async_backend_lock = threading.Lock()
+
+        self.cached_login = self.metadata.get_login(token) if token else None
         if token:
-            try:
-                self.g = Github(token)
-                self.user = self.g.get_user()
-                _ = self.user.login # Test connection
-                print(f"Authenticated as: {self.user.login}")
-                self.authenticated_token = token
-            except RateLimitExceededException:
-                error_msg = "Lỗi GitHub: Đã vượt quá giới hạn Rate Limit API. Vui lòng thử lại sau hoặc sử dụng token xác thực."
-                print(error_msg)
-                # Avoid messagebox during init, log is sufficient
-                # messagebox.showerror("Rate Limit", error_msg)
-                self.g = None; self.user = None
-            except GithubException as e:
-                error_msg = f"Lỗi xác thực GitHub ({e.status}): {e.data.get('message', 'Unknown Error')}"
-                print(error_msg)
-                self.g = None; self.user = None
-            except Exception as e:
-                error_msg = f"Lỗi kết nối GitHub không mong muốn: {e}"
-                print(error_msg)
-                self.g = None; self.user = None
+            self.auth_pending = True
+            if authenticate: self.authenticate()
+
+    def _ensure_client(self):
+        """Tạo đối tượng Github (không gọi mạng) khi cần lần đầu, sau khi import PyGithub ở nền xong."""
+        with self._client_lock:
+            if self.g is None and self.token:
+                require_github()
+                try: self.g = Github(self.token, pool_size=HTTP_POOL_SIZE) # Đủ kết nối keep-alive cho các worker song song
+                except TypeError: self.g = Github(self.token) # PyGithub cũ không có pool_size
+            return self.g
+
+    def authenticate(self):
+        """Kiểm tra token (1 request, chặn tới khi mạng trả lời). An toàn khi gọi từ thread nền. Trả về True nếu thành công."""
+        token = self.token
+        try:
+            user = self._ensure_client().get_user()
+            _ = user.login # Test connection
+            print(f"Authenticated as: {user.login}")
+            self.user = user
+            self.authenticated_token = token
+            if user.login != self.cached_login: self.metadata.store_login(token, user.login); self.cached_login = user.login
+        except RateLimitExceededException:
+            error_msg = "Lỗi GitHub: Đã vượt quá giới hạn Rate Limit API. Vui lòng thử lại sau hoặc sử dụng token xác thực."
+            print(error_msg)
+            # Avoid messagebox during init, log is sufficient
+            # messagebox.showerror("Rate Limit", error_msg)
+            self.auth_error = error_msg; self.g = None; self.user = None
+        except GithubException as e:
+            error_msg = f"Lỗi xác thực GitHub ({e.status}): {e.data.get('message', 'Unknown Error') if isinstance(e.data, dict) else e.data}"
+            print(error_msg)
+            self.auth_error = error_msg; self.g = None; self.user = None
+        except Exception as e:
+            error_msg = f"Lỗi kết nối GitHub không mong muốn: {e}"
+            print(error_msg)
+            self.auth_error = error_msg; self.g = None; self.user = None
+        finally:
+            self.auth_pending = False
+        return self.is_authenticated()
+
+    @property
+    def login(self):
+        """Tài khoản đã xác thực; trong lúc đang xác thực là tài khoản lần trước (chưa kiểm chứng), có thể None."""
+        if self.is_authenticated(): return self.user.login
+        return self.cached_login if self.auth_pending else None
 
     def get_active_token(self):
         return self.authenticated_token
@@ -71,12 +969,124 @@ class GitHubHandler:
     def is_authenticated(self):
          return self.g is not None and self.user is not None and self.authenticated_token is not None
 
+    def call(self, fn, *args, observe_requester=True, **kwargs):
+        """Gọi một hàm PyGithub qua bộ điều phối Rate Limit.
+        Ở worker thread: gặp lỗi rate limit thì tạm dừng tới khi được phép rồi thử lại (tối đa RATE_LIMIT_MAX_RETRIES lần).
+        Ở UI thread: không bao giờ chờ (lấy token nếu còn, hết thì gửi luôn không giãn nhịp), lỗi được ném ra như cũ.
+        observe_requester=False cho các request HTTP trực tiếp (tự gọi scheduler.observe với header của chúng)."""
+        on_ui_thread = threading.current_thread() is threading.main_thread()
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            if on_ui_thread: self.scheduler.try_acquire() # Không chặn Tk: thao tác tương tác không bị giãn nhịp
+            else: self.scheduler.acquire()
+            try:
+                result = fn(*args, **kwargs)
+                if observe_requester: self._observe_rate_limit()
+                return result
+            except GithubException as e:
+                if not RateLimitScheduler.is_rate_limit_error(e) or on_ui_thread or attempt == RATE_LIMIT_MAX_RETRIES: raise
+                wait = self.scheduler.pause_for_error(e)
+                print(f"Rate limit hit ({e.status}), waiting {wait:.0f}s before retry {attempt + 1}/{RATE_LIMIT_MAX_RETRIES}...")
+
+    def get_async_backend(self):
+        """AsyncGitHubBackend dùng chung (tạo khi cần), hoặc None nếu chưa bật/chưa cài httpx/chưa xác thực."""
+        if not self.use_async_backend or not HTTPX_AVAILABLE or not self.is_authenticated(): return None
+        require_github()
+        if httpx is None: return None
+        with self._async_backend_lock:
+            if self._async_backend is None:
+                try: self._async_backend = AsyncGitHubBackend(self)
+                except Exception as e:
+                    print(f"Warning: Could not start async HTTP backend, using sync backend: {e}")
+                    self.use_async_backend = False; return None
+            return self._async_backend
+
+    def close_async_backend(self):
+        with self._async_backend_lock:
+            backend, self._async_backend = self._async_backend, None
+        if backend is not None:
+            try: backend.close()
+            except Exception as e: print(f"Warning: Error closing async HTTP backend: {e}")
+
+    def _observe_rate_limit(self):
+        """Đọc quota từ header phản hồi gần nhất mà PyGithub đã lưu (không tốn request)."""
+        try:
+            requester = self._requester()
+            remaining, limit = requester.rate_limiting
+            self.scheduler.observe_values(remaining, limit, getattr(requester, "rate_limiting_resettime", None))
+        except Exception: pass
+
+    def get_repo_handle(self, repo_name, fresh=False):
+        """Lấy đối tượng Repository từ cache (TTL REPO_HANDLE_TTL giây, tối đa REPO_HANDLE_CACHE_SIZE repo).
+        Tránh một GET /repos cho mỗi thao tác/mỗi file. fresh=True luôn gọi API và cập nhật cache."""
+        now = time.monotonic()
+        if not fresh:
+            with self._repo_handles_lock:
+                cached = self._repo_handles.get(repo_name)
+                if cached is not None and now - cached[1] < REPO_HANDLE_TTL:
+                    self._repo_handles.move_to_end(repo_name)
+                    return cached[0]
+        repo = self.call(self.user.get_repo, repo_name) # Ngoài lock: không chặn các thread khác khi đang chờ mạng
+        with self._repo_handles_lock:
+            self._repo_handles[repo_name] = (repo, now)
+            self._repo_handles.move_to_end(repo_name)
+            while len(self._repo_handles) > REPO_HANDLE_CACHE_SIZE: self._repo_handles.popitem(last=False)
+        return repo
+
+    def invalidate_repo_handle(self, repo_name):
+        with self._repo_handles_lock: self._repo_handles.pop(repo_name, None)
+
+    def _requester(self):
+        """Requester nội bộ của PyGithub (PyGithub 2.x có thuộc tính công khai, 1.x thì không)."""
+        return getattr(self.g, "requester", None) or self.g._Github__requester
+
+    def conditional_get(self, url, parameters=None):
+        """GET JSON có điều kiện (If-None-Match / If-Modified-Since).
+        Nếu GitHub trả 304 thì dùng lại dữ liệu trong cache, không tốn Rate Limit. Ném GithubException nếu lỗi."""
+        key = ConditionalRequestCache.make_key(url, parameters)
+        cached = self.http_cache.get(key)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag: headers["If-None-Match"] = etag
+            elif last_modified: headers["If-Modified-Since"] = last_modified
+        response_headers, data = self.call(self._requester().requestJsonAndCheck, "GET", url, parameters=parameters, headers=headers)
+        self.scheduler.observe(response_headers)
+        if cached and data is None: # 304 Not Modified (thân rỗng)
+            self.http_cache.hits += 1
+            return cached[2]
+        self.http_cache.misses += 1
+        self.http_cache.store(key, response_headers.get("etag"), response_headers.get("last-modified"), data)
+        return data
+
+    def iter_repo_pages(self):
+        """Sinh từng trang (tối đa 100 repo) của danh sách repo ngay khi trang đó về; ném exception của PyGithub nếu lỗi.
+        Tự phân trang qua conditional_get: refresh khi danh sách không đổi chỉ nhận về các 304."""
+        page = 1
+        while True:
+            data = self.conditional_get("/user/repos", {'type': 'all', 'sort': 'updated', 'direction': 'desc', 'per_page': 100, 'page': page})
+            if not data: break
+            yield [self.g.create_from_raw_data(Repository, raw) for raw in data]
+            if len(data) < 100: break
+            page += 1
+
+    def get_cached_repos(self):
+        """Danh sách CachedRepo đã lưu trong cache SQLite từ lần chạy trước (không tốn request, dùng được cả khi đang xác thực).
+        Dựng từ dữ liệu thô, không tạo client PyGithub nên không phải chờ import nền khi gọi từ thread GUI."""
+        login = self.login
+        if not login: return []
+        return [CachedRepo(raw['name'], raw) for raw in self.metadata.get_repos(login)]
+
+    def store_repo_list(self, repos):
+        """Lưu danh sách repo đầy đủ vừa tải vào cache SQLite."""
+        if self.is_authenticated(): self.metadata.store_repos(self.user.login, [repo.raw_data for repo in repos])
+
     def get_repos(self):
         if not self.is_authenticated(): return []
         try:
-            repos = self.user.get_repos(type='all', sort='updated', direction='desc')
-            repo_list = list(repos)
+            repo_list = []
+            for page in self.iter_repo_pages(): repo_list.extend(page)
             print(f"Fetched {len(repo_list)} repositories.")
+            self.store_repo_list(repo_list)
             return repo_list
         except RateLimitExceededException:
             messagebox.showerror("Rate Limit", "Vượt quá giới hạn API khi lấy danh sách repo.")
@@ -88,64 +1098,207 @@ class GitHubHandler:
             messagebox.showerror("Lỗi không xác định", f"Đã xảy ra lỗi khi lấy danh sách repo:\n{e}")
             return []
 
-    def get_repo_contents(self, repo_name, path="", ref=None):
-        """Lấy nội dung repo, chỉ truyền ref khi có giá trị."""
+    def get_tree_index(self, repo_name, refresh=False):
+        """Trả về RepoTreeIndex của nhánh mặc định.
+        Không tốn request nếu đã có trong bộ nhớ; refresh=True chỉ dựng lại khi SHA tree gốc thay đổi.
+        Trả về None nếu repo rỗng, cây quá lớn (bị cắt - truncated) hoặc lỗi -> liệt kê từng thư mục (list_tree)."""
+        if not self.is_authenticated(): return None
+        with self._tree_index_lock: cached = self._tree_indexes.get(repo_name)
+        if cached is not None and not refresh: return cached
+        try:
+            repo = self.get_repo_handle(repo_name)
+            branch = repo.default_branch
+            branch_data = self.conditional_get(f"/repos/{repo.full_name}/branches/{urllib.parse.quote(branch)}")
+            root_sha = branch_data['commit']['commit']['tree']['sha']
+            if cached is not None and cached.root_sha == root_sha: return cached
+            if self._truncated_roots.get(repo_name) == root_sha: return None # Đã biết là quá lớn, không tải lại cây
+            rows = self.metadata.get_tree_index_rows(root_sha)
+            if rows is not None: # Đã thấy tree gốc này ở lần chạy trước: không cần tải lại cây
+                index = RepoTreeIndex.from_rows(repo_name, branch, root_sha, rows)
+                with self._tree_index_lock: self._tree_indexes[repo_name] = index
+                print(f"Info: Loaded tree index for '{repo_name}@{branch}' from metadata cache (root {root_sha[:7]}).")
+                return index
+            git_tree = self.call(repo.get_git_tree, root_sha, recursive=True)
+            if git_tree.raw_data.get('truncated'):
+                print(f"Warning: Recursive tree of '{repo_name}' is truncated, falling back to per-directory listing.")
+                self._truncated_roots[repo_name] = root_sha
+                return None
+            index = RepoTreeIndex(repo_name, branch, root_sha, git_tree.tree)
+            with self._tree_index_lock: self._tree_indexes[repo_name] = index
+            self.metadata.store_tree_index(root_sha, git_tree.tree, index)
+            print(f"Info: Built tree index for '{repo_name}@{branch}' ({len(index.entries)} entries, root {root_sha[:7]}).")
+            return index
+        except RateLimitExceededException: raise
+        except GithubException as e:
+            print(f"Info: No tree index for '{repo_name}' ({e.status}), using contents API.") # 404 = repo rỗng
+            return None
+        except Exception as e:
+            print(f"Warning: Could not build tree index for '{repo_name}': {e}")
+            return None
+
+    def invalidate_tree_index(self, repo_name):
+        """Bỏ chỉ mục cây của repo (sau khi thay đổi nội dung repo)."""
+        with self._tree_index_lock: self._tree_indexes.pop(repo_name, None)
+
+    def list_dir(self, repo_name, path="", refresh=False, tree_sha=None):
+        """Liệt kê thư mục, ưu tiên chỉ mục cây trong bộ nhớ, rồi tới cache SQLite theo SHA tree (0 request);
+        ném exception của PyGithub nếu lỗi. tree_sha: SHA tree của thư mục nếu đã biết (từ danh sách cha)."""
+        if tree_sha and not refresh:
+            with self._tree_index_lock: in_memory = self._tree_indexes.get(repo_name)
+            cached_entries = self.metadata.get_tree(tree_sha) if in_memory is None else None
+            if cached_entries is not None: return cached_entries
+        index = self.get_tree_index(repo_name, refresh=refresh)
+        if index is not None:
+            entries = index.list_dir(path)
+            if entries is None:
+                print(f"Info: Path '{path}' in repo '{repo_name}' not found in tree index.")
+                return []
+            return list(entries)
+        try: return self.list_tree(repo_name, path, tree_sha=tree_sha)
+        except GithubException as e:
+            if e.status not in (404, 409, 422): raise # 404/409: repo rỗng (chưa có nhánh), 422: path là file
+        repo = self.get_repo_handle(repo_name)
+        data = self.conditional_get(f"/repos/{repo.full_name}/contents/{urllib.parse.quote(path.strip('/'))}")
+        if isinstance(data, dict): data = [data] # path là một file
+        entries = [TreeEntry(item['path'], item['type'], item['sha'], item.get('size'), "") for item in (data or [])]
+        if tree_sha: self.metadata.store_trees({tree_sha: entries})
+        return entries
+
+    def list_tree(self, repo_name, path="", tree_sha=None, ref=None):
+        """Liệt kê thư mục bằng trees API không đệ quy: tới 100.000 mục, không bị cắt ở 1.000 như contents API.
+        Có tree_sha -> GET git/trees/{sha} (0 request nếu SHA đã có trong cache SQLite);
+        ngược lại dùng biểu thức '{ref hoặc nhánh mặc định}:{path}'. Ném exception của PyGithub nếu lỗi."""
+        if tree_sha:
+            cached_entries = self.metadata.get_tree(tree_sha)
+            if cached_entries is not None: return cached_entries
+        repo = self.get_repo_handle(repo_name)
+        root = path.strip('/')
+        tree_ish = tree_sha or urllib.parse.quote(f"{ref or repo.default_branch}:{root}")
+        data = self.conditional_get(f"/repos/{repo.full_name}/git/trees/{tree_ish}")
+        if data.get('truncated'): print(f"Warning: Listing of '{root or '/'}' in '{repo_name}' is truncated by the trees API.")
+        prefix = f"{root}/" if root else ""
+        entries = [TreeEntry(prefix + el['path'], TreeEntry.GIT_TYPE_MAP.get(el['type'], el['type']), el['sha'], el.get('size'), el.get('mode', ""))
+                   for el in data.get('tree', [])]
+        self.metadata.store_trees({data.get('sha') or tree_sha: entries})
+        return entries
+
+    def peek_dir(self, repo_name, path="", tree_sha=None):
+        """Nội dung thư mục nếu có sẵn mà không cần mạng (chỉ mục trong bộ nhớ hoặc cache SQLite theo SHA tree), ngược lại None."""
+        with self._tree_index_lock: index = self._tree_indexes.get(repo_name)
+        if index is not None:
+            entries = index.list_dir(path)
+            return list(entries) if entries is not None else None
+        return self.metadata.get_tree(tree_sha) if tree_sha else None
+
+    def remember_listing(self, repo_name, path, entries):
+        """Ghi đè danh sách gần nhất của thư mục (sau khi view được cập nhật tại chỗ từ kết quả thao tác)."""
+        if self.is_authenticated(): self.metadata.store_listing(self.user.login, repo_name, path.strip('/'), entries)
+
+    def last_listing(self, repo_name, path=""):
+        """Danh sách thư mục lần gần nhất hiển thị (có thể đã cũ, kể cả từ lần chạy trước), None nếu chưa có."""
+        if not self.is_authenticated(): return None
+        return self.metadata.get_listing(self.user.login, repo_name, path.strip('/'))
+
+    def list_remote_files(self, repo_name, path=""):
+        """Liệt kê đệ quy mọi file dưới path trên nhánh mặc định.
+        Trả về (files, tree_sha): files là dict đường dẫn tương đối (so với path) -> TreeEntry;
+        tree_sha là SHA tree của path (None nếu không biết, khi đó không dùng để so sánh)."""
+        root = path.strip('/')
+        def rel(full_path): return full_path[len(root) + 1:] if root else full_path
+        index = self.get_tree_index(repo_name, refresh=True)
+        if index is not None:
+            if root:
+                entry = index.get(root)
+                if entry is None or entry.type != 'dir': return {}, None
+                tree_sha = entry.sha
+            else: tree_sha = index.root_sha
+            return {rel(e.path): e for e in index.walk(root) if e.type == 'file'}, tree_sha
+        files = {}; pending = [root]
+        while pending:
+            next_level = []
+            for directory in pending:
+                try: entries = self.list_dir(repo_name, directory)
+                except GithubException as e:
+                    if e.status in (404, 409): continue # Thư mục chưa có / repo rỗng
+                    raise
+                for e in entries:
+                    if e.type == 'dir': next_level.append(e.path)
+                    elif e.type == 'file': files[rel(e.path)] = e
+            pending = next_level
+        return files, None
+
+    def fetch_repo_contents(self, repo_name, path="", ref=None, refresh=False, tree_sha=None):
+        """Lấy nội dung repo, chỉ truyền ref khi có giá trị (không có ref -> chỉ mục cây / trees API).
+        Không mở hộp thoại nên gọi được từ thread nền; lỗi được trả về để thread GUI hiển thị.
+        Trả về (contents, error): contents là list ([] nếu rỗng/không tồn tại) hoặc None khi lỗi;
+        error là (tiêu đề, thông báo) hoặc None."""
         if not self.is_authenticated():
-            return None # Trả về None nếu chưa xác thực
+            return None, ("Lỗi", "Chưa xác thực GitHub")
 
         try:
-            repo = self.user.get_repo(repo_name)
+            if not ref:
+                contents = self.list_dir(repo_name, path, refresh=refresh, tree_sha=tree_sha)
+                self.metadata.store_listing(self.user.login, repo_name, path.strip('/'), contents)
+                return contents, None
+
+            repo = self.get_repo_handle(repo_name)
 
             # ----- Gọi API chính - Chỉ truyền ref nếu nó không phải None -----
-            if ref:
-                print(f"Debug: Calling get_contents for '{repo_name}/{path}' with ref='{ref}'")
-                contents = repo.get_contents(path, ref=ref)
-            else:
-                print(f"Debug: Calling get_contents for '{repo_name}/{path}' without ref (using default branch)")
-                contents = repo.get_contents(path)
+            print(f"Debug: Calling get_contents for '{repo_name}/{path}' with ref='{ref}'")
+            contents = self.call(repo.get_contents, path, ref=ref)
             # ----- Kết thúc gọi API -----
 
             # ----- Xử lý kết quả -----
             if contents is not None and not isinstance(contents, list):
                 contents = [contents]
-            return contents if contents else []
+            elif contents and len(contents) >= CONTENTS_API_LIMIT: # Danh sách có thể đã bị cắt
+                print(f"Info: '{path}' in '{repo_name}' has {len(contents)}+ entries, listing via trees API.")
+                contents = self.list_tree(repo_name, path, ref=ref)
+            return (contents if contents else []), None
 
         except UnknownObjectException:
             print(f"Info: Path '{path}' in repo '{repo_name}' not found or empty (UnknownObjectException 404).")
-            return []
+            return [], None
 
         except GithubException as e:
             if e.status == 404:
                 print(f"Info: Path '{path}' in repo '{repo_name}' not found or empty (GithubException 404).")
-                return []
+                return [], None
             elif e.status == 403 and e.data and "too large" in e.data.get('message', '').lower():
-                print(f"Warning: Cannot list contents of '{path}' in '{repo_name}', directory too large.")
-                messagebox.showwarning("Thư mục quá lớn", f"Không thể liệt kê nội dung của thư mục '{path}'.\nNó chứa quá nhiều mục.")
-                return None
+                print(f"Info: Directory '{path}' in '{repo_name}' too large for contents API, listing via trees API.")
+                try: return self.list_tree(repo_name, path, ref=ref), None
+                except GithubException as tree_error: print(f"Warning: Trees API listing failed too: {tree_error.status}")
+                return None, ("Thư mục quá lớn", f"Không thể liệt kê nội dung của thư mục '{path}'.\nNó chứa quá nhiều mục.")
             elif isinstance(e, RateLimitExceededException):
                  print(f"!!! Rate Limit Exceeded when getting contents for '{repo_name}/{path}'")
-                 messagebox.showerror("Rate Limit", f"Vượt quá giới hạn API khi lấy nội dung '{repo_name}/{path}'.")
-                 return None
+                 return None, ("Rate Limit", f"Vượt quá giới hạn API khi lấy nội dung '{repo_name}/{path}'.")
             else:
-                print(f"!!! GitHub Error in get_repo_contents (GithubException): Status={e.status}, Data={e.data}")
-                messagebox.showerror("Lỗi GitHub", f"Không thể lấy nội dung repo '{repo_name}' tại path '{path}'.\nLỗi: {e.status} - {e.data.get('message', 'Unknown Error')}")
-                return None
+                print(f"!!! GitHub Error in fetch_repo_contents (GithubException): Status={e.status}, Data={e.data}")
+                return None, ("Lỗi GitHub", f"Không thể lấy nội dung repo '{repo_name}' tại path '{path}'.\nLỗi: {e.status} - {e.data.get('message', 'Unknown Error') if e.data else 'Unknown Error'}")
 
         except Exception as e:
             import traceback
-            print("!!! UNEXPECTED Error in get_repo_contents (Exception):")
+            print("!!! UNEXPECTED Error in fetch_repo_contents (Exception):")
             traceback.print_exc()
-            messagebox.showerror("Lỗi không xác định", f"Đã xảy ra lỗi không mong muốn khi lấy nội dung repo:\n{type(e).__name__}: {e}")
-            return None
-    # ... (Các hàm khác của GitHubHandler: get_item_info, get_repo_info, delete_item, delete_repo, rename_repo, upload_file, rename_file) ...
+            return None, ("Lỗi không xác định", f"Đã xảy ra lỗi không mong muốn khi lấy nội dung repo:\n{type(e).__name__}: {e}")
+
+    # ... (Các hàm khác của GitHubHandler: get_item_info, get_repo_info, delete_paths, delete_repo, rename_repo, upload_file, move_paths) ...
     # Đảm bảo các hàm này không bị thiếu
 
-    def get_item_info(self, repo_name, path):
-        """Gets detailed info for a specific file or directory."""
+    def get_item_info(self, repo_name, path, tree_sha=None):
+        """Gets detailed info for a specific file or directory. tree_sha: SHA của thư mục (đọc từ cache SQLite nếu có)."""
         if not self.is_authenticated(): return None, "Chưa xác thực"
         try:
-            repo = self.user.get_repo(repo_name)
-            item = repo.get_contents(path)
+            if tree_sha:
+                cached_entries = self.metadata.get_tree(tree_sha)
+                if cached_entries is not None: return cached_entries, None
+            index = self.get_tree_index(repo_name)
+            entry = index.get(path) if index is not None and path.strip('/') else None
+            if entry is not None and entry.type == 'dir':
+                return list(index.list_dir(path)), None # Thư mục: dùng chỉ mục, không tốn request
+            if tree_sha and index is None: return self.list_tree(repo_name, path, tree_sha), None # Thư mục trong repo rất lớn
+            repo = self.get_repo_handle(repo_name)
+            item = self.call(repo.get_contents, path)
             return item, None # Return ContentFile/list and no error
         except UnknownObjectException:
             return None, f"Không tìm thấy item tại '{path}'."
@@ -160,7 +1313,7 @@ class GitHubHandler:
         """Gets detailed info for a specific repository."""
         if not self.is_authenticated(): return None, "Chưa xác thực"
         try:
-            repo = self.user.get_repo(repo_name)
+            repo = self.get_repo_handle(repo_name, fresh=True) # Thông tin hiển thị cần số liệu mới nhất
             return repo, None # Return Repository object and no error
         except UnknownObjectException:
             return None, f"Không tìm thấy repository '{repo_name}'."
@@ -171,34 +1324,45 @@ class GitHubHandler:
         except Exception as e:
              return None, f"Lỗi không xác định: {e}"
 
-    def delete_item(self, repo_name, path, sha, commit_message="Delete item via app"):
+    def delete_paths(self, repo_name, items, commit_message=None):
+        """Xóa nhiều file/thư mục (kể cả thư mục không rỗng) trong MỘT commit: dựng tree mới từ tree hiện tại
+        với các mục cần xóa đặt sha=None (thư mục bị bỏ nguyên cây con). items: list (path, type) với type 'file'/'dir'.
+        Trả về (success, message)."""
         if not self.is_authenticated(): return False, "Chưa xác thực GitHub"
+        if not items: return False, "Không có mục nào để xóa."
         try:
-            repo = self.user.get_repo(repo_name)
-            repo.delete_file(path, commit_message, sha)
-            return True, f"Đã xóa thành công: {path}"
-        except UnknownObjectException:
-            return False, f"Lỗi: Item tại '{path}' không tìm thấy (có thể đã bị xóa)."
-        except GithubException as e:
-            msg = e.data.get('message', 'Unknown GitHub Error')
-            if e.status == 409 and "must remove all files" in msg.lower():
-                 return False, f"Lỗi: Không thể xóa thư mục không rỗng '{path}'. Vui lòng xóa nội dung bên trong trước."
-            elif e.status == 404:
-                 return False, f"Lỗi: Không tìm thấy item tại '{path}' để xóa (404)."
-            elif e.status == 422 and "sha mismatch" in msg.lower():
-                 return False, f"Lỗi: Item '{path}' đã bị thay đổi trên GitHub. Vui lòng làm mới và thử lại."
-            else:
-                return False, f"Lỗi GitHub khi xóa '{path}': {e.status} - {msg}"
+            repo = self.get_repo_handle(repo_name)
+            try: ref = self.call(repo.get_git_ref, f"heads/{repo.default_branch}")
+            except GithubException as e:
+                if e.status in (404, 409): return False, f"Lỗi: Repository '{repo_name}' rỗng, không có gì để xóa."
+                raise
+            elements = []
+            for path, item_type in items:
+                if item_type == 'dir': elements.append(InputGitTreeElement(path.strip('/'), "040000", "tree", sha=None))
+                else: elements.append(InputGitTreeElement(path.strip('/'), "100644", "blob", sha=None))
+            if not commit_message:
+                commit_message = f"Delete {items[0][0]}" if len(items) == 1 else f"Delete {len(items)} items via app"
+            new_commit = self._commit_tree_elements(repo, ref, elements, commit_message)
+            if new_commit is None: return False, f"Lỗi: Không thể cập nhật nhánh '{repo.default_branch}'."
+            self.invalidate_tree_index(repo_name)
+            print(f"Action: Deleted {len(items)} item(s) from '{repo_name}' in commit {new_commit.sha[:7]}")
+            return True, f"Đã xóa {len(items)} mục trong 1 commit ({new_commit.sha[:7]})."
         except RateLimitExceededException:
              return False, "Vượt quá giới hạn Rate Limit API khi xóa."
+        except GithubException as e:
+            msg = e.data.get('message', 'Unknown GitHub Error') if e.data else 'Unknown GitHub Error'
+            if e.status == 422: # Thường do một mục đã không còn tồn tại
+                return False, f"Lỗi: Một số mục không còn tồn tại trên GitHub. Vui lòng làm mới và thử lại. ({msg})"
+            return False, f"Lỗi GitHub khi xóa: {e.status} - {msg}"
         except Exception as e:
-            return False, f"Lỗi không xác định khi xóa '{path}':\n{e}"
+            return False, f"Lỗi không xác định khi xóa:\n{e}"
 
     def delete_repo(self, repo_name):
         if not self.is_authenticated(): return False, "Chưa xác thực GitHub"
         try:
-            repo = self.user.get_repo(repo_name)
-            repo.delete()
+            repo = self.get_repo_handle(repo_name)
+            self.call(repo.delete)
+            self.invalidate_tree_index(repo_name); self.invalidate_repo_handle(repo_name)
             return True, f"Đã xóa thành công repository: {repo_name}"
         except UnknownObjectException:
             return False, f"Lỗi: Repository '{repo_name}' không tìm thấy."
@@ -213,8 +1377,9 @@ class GitHubHandler:
     def rename_repo(self, repo_name, new_name):
         if not self.is_authenticated(): return False, "Chưa xác thực GitHub"
         try:
-            repo = self.user.get_repo(repo_name)
-            repo.edit(name=new_name)
+            repo = self.get_repo_handle(repo_name)
+            self.call(repo.edit, name=new_name)
+            self.invalidate_tree_index(repo_name); self.invalidate_repo_handle(repo_name)
             return True, f"Đã đổi tên repo thành công thành: {new_name}"
         except UnknownObjectException:
             return False, f"Lỗi: Repository '{repo_name}' không tìm thấy."
@@ -228,18 +1393,24 @@ class GitHubHandler:
         except Exception as e:
              return False, f"Lỗi không xác định khi đổi tên repo '{repo_name}':\n{e}"
 
+    def _entry_mode(self, repo_name, path, default="100644"):
+        """Mode git hiện có của path (giữ bit thực thi khi ghi đè), default nếu không xác định được."""
+        try: entries = self.list_dir(repo_name, path.rpartition('/')[0])
+        except GithubException: return default
+        return next((e.mode for e in entries if e.path == path and e.mode in ("100644", "100755")), default)
+
     def upload_file(self, repo_name, local_path, github_path, commit_message="Upload file via app", progress_callback=None, overwrite=False):
         # ... (Giữ nguyên hàm upload_file đã sửa lỗi trước đó) ...
         if not self.is_authenticated(): return False, "Chưa xác thực GitHub"
         try:
-            repo = self.user.get_repo(repo_name)
+            repo = self.get_repo_handle(repo_name)
             file_name = os.path.basename(local_path)
             clean_github_path = github_path.strip('/')
             target_path = f"{clean_github_path}/{file_name}" if clean_github_path else file_name
 
             existing_file_sha = None
             try:
-                existing_file = repo.get_contents(target_path)
+                existing_file = self.call(repo.get_contents, target_path)
                 if existing_file and not isinstance(existing_file, list):
                     existing_file_sha = existing_file.sha
                     print(f"Info: File '{target_path}' exists (SHA: {existing_file_sha}).")
@@ -252,28 +1423,48 @@ class GitHubHandler:
             except RateLimitExceededException: raise
             except Exception as e: raise
 
+            if existing_file_sha and not overwrite:
+                print(f"Action: Skipping existing file (overwrite=False): {target_path}")
+                return False, "exists"
+            if existing_file_sha:
+                try: unchanged = self.local_blob_sha(local_path) == existing_file_sha
+                except OSError: unchanged = False
+                if unchanged:
+                    print(f"Action: Skipping unchanged file: {target_path}")
+                    return False, "unchanged"
+            if not os.path.isfile(local_path): return False, f"Lỗi: Không tìm thấy file cục bộ '{local_path}'"
+
+            ref = None
+            if os.path.getsize(local_path) >= LARGE_FILE_THRESHOLD: # File nhỏ: create_file/update_file (2 request) rẻ hơn Git Data API
+                try: ref = self.call(repo.get_git_ref, f"heads/{repo.default_branch}")
+                except GithubException as e:
+                    if e.status not in (404, 409): raise # 404/409: repo rỗng -> dùng contents API
+
+            status_msg = ""; action_description = "update" if existing_file_sha else "create"
             try:
-                with open(local_path, "rb") as f: content_bytes = f.read()
-            except FileNotFoundError: return False, f"Lỗi: Không tìm thấy file cục bộ '{local_path}'"
-            except Exception as e: return False, f"Lỗi đọc file cục bộ '{local_path}': {e}"
-
-            status_msg = ""; action_description = ""
-            try:
-                if existing_file_sha:
-                    action_description = "update"
-                    if overwrite:
+                if ref is not None:
+                    # Stream file -> blob (bộ nhớ không phụ thuộc kích thước file), rồi commit một tree chỉ gồm file này
+                    print(f"Action: Streaming {action_description} of file: {target_path}")
+                    def on_bytes(done, total):
+                        if progress_callback and total: progress_callback(min(99, int(done * 100 / total)))
+                    blob_sha = self._create_blob(repo, local_path, on_bytes)
+                    mode = self._entry_mode(repo_name, target_path) if existing_file_sha else "100644"
+                    element = InputGitTreeElement(target_path, mode, "blob", sha=blob_sha)
+                    if self._commit_tree_elements(repo, ref, [element], commit_message) is None:
+                        return False, f"Lỗi: Không thể cập nhật nhánh '{repo.default_branch}'."
+                else:
+                    try:
+                        with open(local_path, "rb") as f: content_bytes = f.read()
+                    except Exception as e: return False, f"Lỗi đọc file cục bộ '{local_path}': {e}"
+                    if existing_file_sha:
                         print(f"Action: Updating existing file: {target_path}")
-                        repo.update_file(target_path, commit_message, content_bytes, existing_file_sha)
-                        status_msg = f"Đã cập nhật file: {target_path}"
+                        self.call(repo.update_file, target_path, commit_message, content_bytes, existing_file_sha)
                     else:
-                        print(f"Action: Skipping existing file (overwrite=False): {target_path}")
-                        return False, "exists"
-                else:
-                    action_description = "create"
-                    print(f"Action: Creating new file: {target_path}")
-                    repo.create_file(target_path, commit_message, content_bytes)
-                    status_msg = f"Đã upload file mới: {target_path}"
+                        print(f"Action: Creating new file: {target_path}")
+                        self.call(repo.create_file, target_path, commit_message, content_bytes)
+                status_msg = f"Đã cập nhật file: {target_path}" if existing_file_sha else f"Đã upload file mới: {target_path}"
 
+                self.invalidate_tree_index(repo_name)
                 if progress_callback: progress_callback(100)
                 return True, status_msg
 
@@ -300,59 +1491,476 @@ class GitHubHandler:
              print(f"Error: Generic error during upload setup to '{repo_name}': {e}")
              return False, f"Lỗi không xác định (setup): {e}"
 
-    def rename_file(self, repo_name, old_path, new_path, sha):
-        """ Placeholder: Logic will be in the worker thread. """
-        if not self.is_authenticated(): return False, "Chưa xác thực"
-        print(f"Rename Prep: Repo='{repo_name}', Old='{old_path}', New='{new_path}', SHA='{sha}'")
-        return True, "Yêu cầu đổi tên đã được gửi tới worker."
+    def _create_blob(self, repo, local_path, progress_callback=None):
+        return self.create_blob_streaming(repo, local_path, progress_callback)
+
+    def create_blob_streaming(self, repo, local_path, progress_callback=None):
+        """Tạo blob từ file cục bộ mà không đọc cả file vào bộ nhớ: file được đọc theo khối
+        (bội số của 3 byte để base64 không chèn '=' giữa chừng), mã hóa base64 từng khối và
+        gửi thẳng vào body JSON của POST /git/blobs. progress_callback(bytes_done, bytes_total) sau mỗi khối.
+        Trả về SHA của blob."""
+        size = os.path.getsize(local_path)
+        prefix = b'{"encoding": "base64", "content": "'
+        suffix = b'"}'
+        content_length = len(prefix) + 4 * ((size + 2) // 3) + len(suffix)
+        chunk_size = (STREAM_CHUNK_SIZE // 3) * 3
+        url = f"{GITHUB_API_URL}/repos/{repo.full_name}/git/blobs"
+
+        def body():
+            yield prefix
+            done = 0
+            with open(local_path, "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk: break
+                    done += len(chunk)
+                    yield base64.b64encode(chunk)
+                    if progress_callback: progress_callback(done, size)
+            yield suffix
+
+        def post():
+            # Mỗi lần thử lại (sau rate limit) tạo generator mới => đọc lại file từ đầu
+            headers = {"Content-Type": "application/json", "Content-Length": str(content_length), "Accept": "application/vnd.github+json"}
+            with self._raw_open("POST", url, headers=headers, data=body()) as response:
+                return json.loads(response.read().decode("utf-8"))['sha']
+        return self.call(post, observe_requester=False)
+
+    def _commit_tree_elements(self, repo, ref, tree_elements, commit_message):
+        """Tạo tree (dựa trên tree của commit đầu nhánh) + commit, rồi fast-forward ref.
+        Thử lại nếu nhánh vừa bị người khác cập nhật (422). Trả về commit mới, hoặc None nếu không cập nhật được ref."""
+        for attempt in range(3):
+            base_commit = self.call(repo.get_git_commit, ref.object.sha)
+            new_tree = self.call(repo.create_git_tree, tree_elements, base_commit.tree)
+            new_commit = self.call(repo.create_git_commit, commit_message, new_tree, [base_commit])
+            try:
+                self.call(ref.edit, new_commit.sha)
+                return new_commit
+            except GithubException as e:
+                if e.status == 422 and attempt < 2:
+                    print(f"Warning: Branch '{repo.default_branch}' moved during commit, retrying ({attempt + 1})...")
+                    ref = self.call(repo.get_git_ref, f"heads/{repo.default_branch}")
+                    continue
+                raise
+        return None
+
+    def _raw_open(self, method, url, headers=None, data=None):
+        """Request HTTP trực tiếp tới GitHub API (không qua PyGithub) để stream dữ liệu.
+        Trả về đối tượng response (cần đóng); lỗi HTTP được chuyển thành GithubException như PyGithub."""
+        request = urllib.request.Request(url, data=data, method=method)
+        request.add_header("Authorization", f"token {self.authenticated_token}")
+        request.add_header("User-Agent", "github-repository-manager")
+        for key, value in (headers or {}).items(): request.add_header(key, value)
+        try:
+            response = urllib.request.urlopen(request, timeout=RAW_HTTP_TIMEOUT)
+        except urllib.error.HTTPError as e:
+            response_headers = {k.lower(): v for k, v in e.headers.items()}
+            self.scheduler.observe(response_headers)
+            try: body = json.loads(e.read().decode("utf-8") or "{}")
+            except Exception: body = {'message': str(e)}
+            if e.code in (403, 429) and response_headers.get('x-ratelimit-remaining') == '0':
+                raise RateLimitExceededException(e.code, body, response_headers)
+            if e.code == 404: raise UnknownObjectException(e.code, body, response_headers)
+            raise GithubException(e.code, body, response_headers)
+        self.scheduler.observe({k.lower(): v for k, v in response.headers.items()})
+        return response
+
+    def download_blob_to_file(self, repo_name, sha, local_path, progress_callback=None):
+        """Stream blob (dạng raw) theo từng khối STREAM_CHUNK_SIZE vào file tạm cạnh local_path,
+        xong mới os.replace sang tên thật. Bộ nhớ dùng không phụ thuộc kích thước file (tới 100 MB).
+        progress_callback(bytes_done, bytes_total) sau mỗi khối."""
+        repo = self.get_repo_handle(repo_name)
+        url = f"{GITHUB_API_URL}/repos/{repo.full_name}/git/blobs/{sha}"
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(local_path)}.", suffix=".part", dir=os.path.dirname(local_path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                def stream():
+                    f.seek(0); f.truncate() # Thử lại sau rate limit: ghi lại từ đầu
+                    with self._raw_open("GET", url, headers={"Accept": "application/vnd.github.raw"}) as response:
+                        total = int(response.headers.get("Content-Length") or 0); done = 0
+                        while True:
+                            chunk = response.read(STREAM_CHUNK_SIZE)
+                            if not chunk: break
+                            f.write(chunk); done += len(chunk)
+                            if progress_callback: progress_callback(done, total)
+                self.call(stream, observe_requester=False)
+            os.replace(tmp_path, local_path)
+        except BaseException:
+            try: os.remove(tmp_path)
+            except OSError: pass
+            raise
+
+    def get_blob_content(self, repo_name, sha, path=None):
+        """Tải nội dung file (bytes) theo SHA blob qua Git Data API (hỗ trợ tới 100 MB).
+        Không có SHA thì dùng contents API theo path."""
+        repo = self.get_repo_handle(repo_name)
+        if not sha:
+            file_content = self.call(repo.get_contents, path)
+            return file_content.decoded_content or b''
+        blob = self.call(repo.get_git_blob, sha)
+        if blob.encoding == "base64": return base64.b64decode(blob.content or "")
+        return (blob.content or "").encode("utf-8")
+
+    @staticmethod
+    def compute_blob_sha(local_path):
+        """SHA-1 của object blob git ("blob <len>\\0<data>") cho file cục bộ, đọc theo khối.
+        Trùng với SHA của mục trong tree GitHub khi nội dung giống hệt."""
+        digest = hashlib.sha1(f"blob {os.path.getsize(local_path)}\0".encode("ascii"))
+        with open(local_path, "rb") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk: break
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def local_blob_sha(self, local_path):
+        """SHA blob của file cục bộ, dùng cache SQLite theo (path, size, mtime) để không băm lại file không đổi."""
+        st = os.stat(local_path)
+        abs_path = os.path.abspath(local_path)
+        sha = self.metadata.get_local_blob_sha(abs_path, st.st_size, st.st_mtime_ns)
+        if sha is None:
+            sha = self.compute_blob_sha(local_path)
+            self.metadata.store_local_blob_sha(abs_path, st.st_size, st.st_mtime_ns, sha)
+        return sha
+
+    def find_remote_entries(self, repo_name, paths, max_workers=1):
+        """Trả về dict path -> TreeEntry cho các path đã tồn tại trên nhánh mặc định.
+        Dùng chỉ mục cây (0-1 request); nếu không có chỉ mục thì liệt kê song song từng thư mục cha (mỗi thư mục 1 request)."""
+        index = self.get_tree_index(repo_name, refresh=True)
+        if index is not None:
+            found = {}
+            for p in paths:
+                entry = index.get(p)
+                if entry is not None: found[p] = entry
+            return found
+        parents = sorted({p.rsplit('/', 1)[0] if '/' in p else "" for p in paths})
+        def list_parent(parent):
+            try: return self.list_dir(repo_name, parent)
+            except UnknownObjectException: return []
+            except GithubException as e:
+                if e.status == 404: return []
+                raise
+        wanted = set(paths); found = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for entries in executor.map(list_parent, parents):
+                for entry in entries:
+                    if entry.path in wanted: found[entry.path] = entry
+        return found
+
+    def find_existing_paths(self, repo_name, paths, max_workers=1):
+        """Trả về tập các path đã tồn tại trên nhánh mặc định."""
+        return set(self.find_remote_entries(repo_name, paths, max_workers=max_workers))
+
+    def filter_unchanged_files(self, repo_name, file_pairs, max_workers=1):
+        """So SHA blob của file cục bộ với SHA của mục tương ứng trên GitHub.
+        file_pairs: list (local_path, target_path). Chỉ băm các file có mục cùng kích thước trên remote.
+        Trả về (changed_pairs, unchanged_targets, remote_entries)."""
+        remote = self.find_remote_entries(repo_name, [target for _, target in file_pairs], max_workers=max_workers)
+        candidates = []
+        for local_path, target in file_pairs:
+            entry = remote.get(target)
+            if entry is None or entry.type != 'file': continue
+            try:
+                if entry.size is not None and os.path.getsize(local_path) != entry.size: continue
+            except OSError: continue
+            candidates.append((local_path, target))
+        def same_content(pair):
+            try: return self.local_blob_sha(pair[0]) == remote[pair[1]].sha
+            except OSError: return False
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            unchanged = {target for (_, target), same in zip(candidates, executor.map(same_content, candidates)) if same}
+        changed = [(local_path, target) for local_path, target in file_pairs if target not in unchanged]
+        return changed, unchanged, remote
+
+    def commit_files(self, repo_name, file_pairs, commit_message="Upload files via app", progress_callback=None, max_workers=1, modes=None, deletions=None):
+        """Upload nhiều file trong MỘT commit qua Git Data API: tạo blob -> tạo tree -> tạo commit -> cập nhật ref.
+        Các blob được tạo song song bởi max_workers thread; tree/commit/ref chỉ được tạo một lần, tuần tự ở cuối.
+        file_pairs: list các (local_path, target_path). progress_callback(done, total, target_path) sau mỗi blob
+        (được gọi từ thread của pool). modes: dict target_path -> mode git (giữ quyền thực thi của file đã có), mặc định 100644.
+        deletions: list path file cần xóa trong cùng commit (phải đang tồn tại trên nhánh).
+        Trả về (success, message, results); results là list dict {'path', 'sha', 'error'}.
+        message == "empty_repo" nếu repo chưa có commit nào (khi đó cần dùng upload_file)."""
+        if not self.is_authenticated(): return False, "Chưa xác thực GitHub", []
+        results = []
+        try:
+            repo = self.get_repo_handle(repo_name)
+            branch = repo.default_branch
+            try:
+                ref = self.call(repo.get_git_ref, f"heads/{branch}")
+            except GithubException as e:
+                # Repo rỗng: Git Data API trả 409 ("Git Repository is empty") hoặc 404 cho ref
+                if e.status in (404, 409): return False, "empty_repo", []
+                raise
+
+            # --- Tạo blob song song cho từng file ---
+            tree_elements = []
+            total = len(file_pairs)
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers))
+            backend = self.get_async_backend(); futures = {}
+            try:
+                if backend is not None: # Tạo tất cả blob đồng thời trên event loop, không cần thread
+                    futures = {backend.submit(backend.create_blob_async(repo_name, local_path)): (local_path, target_path) for local_path, target_path in file_pairs}
+                else:
+                    futures = {executor.submit(self._create_blob, repo, local_path): (local_path, target_path) for local_path, target_path in file_pairs}
+                for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+                    local_path, target_path = futures[future]
+                    try:
+                        blob_sha = future.result()
+                        tree_elements.append(InputGitTreeElement(target_path, (modes or {}).get(target_path, "100644"), "blob", sha=blob_sha))
+                        results.append({'path': target_path, 'sha': blob_sha, 'error': None})
+                    except GithubException: raise
+                    except Exception as e:
+                        print(f"Error: Could not read/create blob for '{local_path}': {e}")
+                        results.append({'path': target_path, 'sha': None, 'error': str(e)})
+                    if progress_callback: progress_callback(done, total, target_path)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True) # Lỗi GitHub: hủy các blob chưa chạy
+                for future in futures:
+                    if not future.done(): future.cancel()
+
+            if not tree_elements and not deletions: return False, "Không có file nào được tạo blob thành công.", results
+            uploaded_count = len(tree_elements)
+            for path in deletions or []: tree_elements.append(InputGitTreeElement(path, "100644", "blob", sha=None)) # sha=None: xóa khỏi tree
+
+            new_commit = self._commit_tree_elements(repo, ref, tree_elements, commit_message)
+            if new_commit is None: return False, f"Không thể cập nhật nhánh '{branch}'.", results
+            self.invalidate_tree_index(repo_name)
+            print(f"Action: Committed {uploaded_count} file(s), {len(deletions or [])} deletion(s) to '{repo_name}@{branch}' as {new_commit.sha[:7]}")
+            summary = f"{uploaded_count} file" + (f", xóa {len(deletions)} file" if deletions else "")
+            return True, f"Đã commit {summary} trong 1 commit ({new_commit.sha[:7]}).", results
+
+        except RateLimitExceededException: return False, "Vượt quá giới hạn Rate Limit API.", results
+        except GithubException as e:
+             msg = e.data.get('message', 'Unknown GitHub Error') if e.data else 'Unknown GitHub Error'
+             print(f"Error: GitHub error during bulk commit to '{repo_name}': {e.status} - {msg}")
+             return False, f"Lỗi GitHub khi commit: {e.status} - {msg}", results
+        except Exception as e:
+             print(f"Error: Unexpected error during bulk commit to '{repo_name}': {e}")
+             return False, f"Lỗi không xác định khi commit: {e}", results
+
+    def _lookup_entry(self, repo_name, path):
+        """TreeEntry của path đọc từ danh sách thư mục cha, None nếu không tồn tại. Ném GithubException nếu lỗi khác."""
+        try: entries = self.list_dir(repo_name, path.rpartition('/')[0])
+        except GithubException as e:
+            if e.status == 404: return None # Thư mục cha chưa có
+            raise
+        return next((e for e in entries if e.path == path), None)
+
+    def move_paths(self, repo_name, moves, commit_message=None):
+        """Đổi tên/di chuyển file và thư mục trong MỘT commit mà không tải nội dung:
+        mục mới trỏ tới SHA blob/tree sẵn có (giữ nguyên mode), mục cũ được xóa (sha=None).
+        moves: list (old_path, new_path, type, sha) với type 'file'/'dir'.
+        SHA, mode và việc đích chưa tồn tại được kiểm tra trên chỉ mục cây, hoặc trên thư mục cha (list_dir) khi cây
+        quá lớn; không xác định được mode thì từ chối di chuyển. Trả về (success, message)."""
+        if not self.is_authenticated(): return False, "Chưa xác thực GitHub"
+        if not moves: return False, "Không có mục nào để di chuyển."
+        try:
+            repo = self.get_repo_handle(repo_name)
+            try: ref = self.call(repo.get_git_ref, f"heads/{repo.default_branch}")
+            except GithubException as e:
+                if e.status in (404, 409): return False, f"Lỗi: Repository '{repo_name}' rỗng."
+                raise
+            index = self.get_tree_index(repo_name, refresh=True) # SHA + mode hiện tại của các mục (0-1 request)
+            elements = []
+            for old_path, new_path, item_type, sha in moves:
+                old_path = old_path.strip('/'); new_path = new_path.strip('/')
+                if not new_path or new_path == old_path: return False, f"Lỗi: Đường dẫn mới không hợp lệ cho '{old_path}'."
+                if item_type == 'dir' and new_path.startswith(old_path + "/"):
+                    return False, f"Lỗi: Không thể di chuyển thư mục '{old_path}' vào chính nó."
+                git_type = "tree" if item_type == 'dir' else "blob"
+                lookup = index.get if index is not None else (lambda path: self._lookup_entry(repo_name, path))
+                entry = lookup(old_path)
+                if entry is None: return False, f"Lỗi: '{old_path}' không còn tồn tại trên GitHub. Vui lòng làm mới."
+                if lookup(new_path) is not None: return False, f"Lỗi: '{new_path}' đã tồn tại trên GitHub."
+                sha = entry.sha or sha; mode = entry.mode or ("040000" if item_type == 'dir' else "")
+                if not mode: return False, f"Lỗi: Không xác định được mode của '{old_path}' (giữ quyền thực thi/liên kết), hủy di chuyển."
+                if not sha: return False, f"Lỗi: Không xác định được SHA của '{old_path}'."
+                elements.append(InputGitTreeElement(new_path, mode, git_type, sha=sha))
+                elements.append(InputGitTreeElement(old_path, mode, git_type, sha=None))
+            if not commit_message:
+                commit_message = f"Move {moves[0][0]} -> {moves[0][1]}" if len(moves) == 1 else f"Move {len(moves)} items via app"
+            new_commit = self._commit_tree_elements(repo, ref, elements, commit_message)
+            if new_commit is None: return False, f"Lỗi: Không thể cập nhật nhánh '{repo.default_branch}'."
+            self.invalidate_tree_index(repo_name)
+            print(f"Action: Moved {len(moves)} item(s) in '{repo_name}' in commit {new_commit.sha[:7]}")
+            return True, f"Đã di chuyển {len(moves)} mục trong 1 commit ({new_commit.sha[:7]})."
+        except RateLimitExceededException:
+             return False, "Vượt quá giới hạn Rate Limit API khi di chuyển."
+        except GithubException as e:
+            msg = e.data.get('message', 'Unknown GitHub Error') if e.data else 'Unknown GitHub Error'
+            return False, f"Lỗi GitHub khi di chuyển: {e.status} - {msg}"
+        except Exception as e:
+            return False, f"Lỗi không xác định khi di chuyển:\n{e}"
+
+# --- Tải trước nội dung thư mục GitHub ---
+class ListingPrefetcher:
+    """Tải nền nội dung các thư mục mà người dùng nhiều khả năng sẽ mở tiếp (đang chọn, di chuột qua, đang hiển thị).
+    Kết quả đi qua GitHubHandler.list_dir nên nằm sẵn trong chỉ mục cây / cache SQLite theo SHA tree,
+    lần mở thật chỉ còn là peek_dir (0 request).
+    - Yêu cầu mới nhất được xử lý trước; hàng đợi chỉ giữ PREFETCH_QUEUE_SIZE yêu cầu.
+    - Tối đa PREFETCH_REQUEST_BUDGET lần tải trong PREFETCH_BUDGET_WINDOW giây.
+    - Dừng hẳn khi quota còn dưới PREFETCH_HEADROOM hoặc bộ điều phối đang tạm dừng vì Rate Limit."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._cond = threading.Condition()
+        self._pending = collections.OrderedDict() # (repo, path) -> tree_sha
+        self._done = collections.OrderedDict() # (repo, path, tree_sha) đã có sẵn trong cache, LRU tối đa PREFETCH_DONE_SIZE
+        self._sent = collections.deque() # Thời điểm (monotonic) của các lần tải trước gần đây
+        self._closed = False
+        self._thread = None
+
+    def request(self, repo_name, path="", tree_sha=None):
+        key = (repo_name, path.strip('/'))
+        with self._cond:
+            if self._closed: return
+            if key + (tree_sha,) in self._done:
+                self._done.move_to_end(key + (tree_sha,)); return
+            self._pending[key] = tree_sha
+            self._pending.move_to_end(key)
+            while len(self._pending) > PREFETCH_QUEUE_SIZE: self._pending.popitem(last=False)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="github-prefetch", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _mark_done(self, done_key):
+        with self._cond:
+            self._done[done_key] = True
+            self._done.move_to_end(done_key)
+            while len(self._done) > PREFETCH_DONE_SIZE: self._done.popitem(last=False)
+
+    def close(self):
+        with self._cond:
+            self._closed = True; self._pending.clear(); self._cond.notify_all()
+
+    def _has_headroom(self):
+        scheduler = self.handler.scheduler
+        if scheduler.paused_until > time.time(): return False
+        if scheduler.remaining is None or not scheduler.limit: return True # Chưa biết quota (chưa có phản hồi nào)
+        return scheduler.remaining - RATE_LIMIT_RESERVE > scheduler.limit * PREFETCH_HEADROOM
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed: self._cond.wait()
+                if self._closed: return
+                # Ngân sách request: chờ tới khi lần tải cũ nhất ra khỏi cửa sổ
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] > PREFETCH_BUDGET_WINDOW: self._sent.popleft()
+                if len(self._sent) >= PREFETCH_REQUEST_BUDGET:
+                    self._cond.wait(PREFETCH_BUDGET_WINDOW - (now - self._sent[0])); continue
+                if not self._has_headroom():
+                    self._pending.clear() # Yêu cầu cũ không còn đáng giá khi quota đã thấp
+                    continue
+                (repo_name, path), tree_sha = self._pending.popitem(last=True)
+            if self.handler.peek_dir(repo_name, path, tree_sha) is not None:
+                self._mark_done((repo_name, path, tree_sha))
+                continue
+            with self._cond: self._sent.append(time.monotonic())
+            try:
+                self.handler.list_dir(repo_name, path, tree_sha=tree_sha)
+                self._mark_done((repo_name, path, tree_sha))
+            except Exception as e:
+                print(f"Info: Prefetch of '{repo_name}/{path}' skipped: {e}")
 
 # --- Lớp ứng dụng chính ---
 class GitHubManagerApp:
 
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
+        self.profiler = profiler or StartupProfiler()
         print("Initializing GitHubManagerApp...")
         self.previous_settings = {}
         self.settings = self.load_settings()
         print(f"Settings loaded: {self.settings}")
 
         print("Initializing GitHubHandler...")
-        self.github_handler = GitHubHandler(self.get_token())
-        if self.github_handler.is_authenticated(): print(f"GitHub Handler authenticated as: {self.github_handler.user.login}")
-        else: print("GitHub Handler not authenticated.")
+        self.github_handler = GitHubHandler(self.get_token(), authenticate=False) # Xác thực ở nền sau khi cửa sổ đã hiện
+        if self.github_handler.login: print(f"GitHub Handler pending authentication, last login: {self.github_handler.login}")
+        self.profiler.mark("cài đặt + GitHubHandler")
 
         # Khởi tạo đường dẫn cục bộ ban đầu (Ví dụ: Máy tính hoặc Desktop)
         self.current_local_path = self._get_initial_local_path()
         print(f"Initial local path: {self.current_local_path}")
+        self.profiler.mark("thư mục cục bộ ban đầu")
 
         self.clipboard = None # Khởi tạo clipboard
         self.upload_tasks = {}
         self.task_id_counter = 0
         self.current_github_context = {'repo': None, 'path': ""}
+        self.github_view_generation = 0 # Tăng mỗi lần đổi view GitHub; kết quả nền của view cũ bị bỏ qua
+        self.local_view_generation = 0 # Tăng mỗi lần đổi view cục bộ; lượt đọc thư mục cũ dừng lại
+        self.prefetcher = None # ListingPrefetcher khi bật "prefetch_dirs"
+        self.github_view_entries = {} # path -> TreeEntry của các dòng đang hiển thị trong view nội dung repo
+        self._github_rows_job = None # after() đang thêm dần dòng của một thư mục lớn
+        self._prefetch_hover_job = None; self._prefetch_hover_iid = None
 
         print("Setting up styles...")
         self.setup_styles()
+        self.profiler.mark("setup_styles")
 
         print("Creating widgets...")
         self.create_widgets()
+        self.profiler.mark("create_widgets")
 
         print("Applying settings to UI elements...")
-        self.apply_settings(force_refresh=True)
+        self.apply_settings()
+        self.profiler.mark("apply_settings")
 
-        # --- Populate Initial Views ---
-        print("Populating initial Local tree view...")
-        self.populate_local_tree(self.current_local_path)
-        print("Populating initial GitHub tree view...")
-        self.populate_github_tree()
+        # --- Populate Initial Views: ngay sau khi cửa sổ hiện lên, GitHub từ cache trong lúc xác thực ---
+        self.root.after(1, self._populate_initial_views)
 
         print("Starting background task queue processor...")
         self.process_queue()
 
         print("--- GitHubManagerApp initialized successfully. ---")
         self.log_status("Ứng dụng đã sẵn sàng.", "INFO")
-        if not self.github_handler.is_authenticated():
+        if not self.github_handler.token:
             self.log_status("Chưa xác thực GitHub. Vui lòng vào Cài đặt.", "WARNING")
 
+    def _populate_initial_views(self):
+        self.profiler.mark("mainloop bắt đầu")
+        print("Populating initial Local tree view...")
+        self.populate_local_tree(self.current_local_path)
+        self.profiler.mark("populate local")
+        print("Populating initial GitHub tree view...")
+        self.populate_github_tree()
+        self.profiler.mark("populate GitHub (cache)")
+        self.start_authentication()
+        if self.profiler.enabled: self.root.after_idle(self._on_startup_interactive)
+
+    def _on_startup_interactive(self):
+        self.profiler.mark_interactive()
+        if self.github_handler is None or not self.github_handler.auth_pending: self._finish_startup_profile()
+        else: self.root.after(PROFILE_STARTUP_AUTH_TIMEOUT_MS, self._finish_startup_profile) # Không chờ mạng mãi
+
+    def _finish_startup_profile(self):
+        """--profile-startup: in báo cáo rồi đóng ứng dụng (mã thoát trong profiler.exit_code)."""
+        if getattr(self, '_startup_profile_done', False): return
+        self._startup_profile_done = True
+        if _heavy_import_span[1] is not None: self.profiler.record("import PyGithub/httpx (nền)", *_heavy_import_span)
+        print(self.profiler.report())
+        self.root.after(0, self.root.destroy)
+
+    def start_authentication(self):
+        """Xác thực token của handler hiện tại ở thread nền; xong thì nạp lại view GitHub đang xem."""
+        handler = self.github_handler
+        if handler is None or not handler.auth_pending: return
+        def worker():
+            started = time.perf_counter()
+            handler.authenticate()
+            self.profiler.record("xác thực GitHub (nền)", started, time.perf_counter())
+            ui_queue.put(lambda: self._on_authenticated(handler))
+        threading.Thread(target=worker, name="github-auth", daemon=True).start()
+
+    def _on_authenticated(self, handler):
+        if handler is not self.github_handler: return # Token đã đổi trong lúc chờ
+        if handler.is_authenticated(): self.log_status(f"Đã xác thực GitHub: {handler.login}", "SUCCESS")
+        else: self.log_status(f"Xác thực GitHub thất bại: {handler.auth_error or 'không rõ lỗi'}. Vui lòng kiểm tra API Token trong Cài đặt.", "ERROR")
+        self._update_prefetcher()
+        self.populate_github_tree(self.current_github_context.get('repo'), self.current_github_context.get('path', ""))
+        if self.profiler.enabled and self.profiler.interactive_at is not None: self._finish_startup_profile()
+
     # --- Helper lấy đường dẫn cục bộ ban đầu ---
     def _get_initial_local_path(self):
         """Xác định đường dẫn cục bộ ban đầu, ưu tiên Desktop."""
@@ -501,6 +2109,18 @@ class GitHubManagerApp:
              self.show_icons_var.set(self.settings.get("show_icons", DEFAULT_SETTINGS["show_icons"]))
         if hasattr(self, 'default_download_entry') and self.default_download_entry.winfo_exists():
              self.default_download_dir_var.set(self.settings.get("default_download_dir", os.path.expanduser("~")))
+        if hasattr(self, 'upload_single_commit_checkbutton') and self.upload_single_commit_checkbutton.winfo_exists():
+             self.upload_single_commit_var.set(self.settings.get("upload_single_commit", DEFAULT_SETTINGS["upload_single_commit"]))
+        if hasattr(self, 'download_workers_spinbox') and self.download_workers_spinbox.winfo_exists():
+             self.download_workers_var.set(self.settings.get("download_workers", DEFAULT_SETTINGS["download_workers"]))
+        if hasattr(self, 'download_inflight_spinbox') and self.download_inflight_spinbox.winfo_exists():
+             self.download_inflight_var.set(self.settings.get("download_inflight_mb", DEFAULT_SETTINGS["download_inflight_mb"]))
+        if hasattr(self, 'upload_workers_spinbox') and self.upload_workers_spinbox.winfo_exists():
+             self.upload_workers_var.set(self.settings.get("upload_workers", DEFAULT_SETTINGS["upload_workers"]))
+        if hasattr(self, 'async_backend_checkbutton') and self.async_backend_checkbutton.winfo_exists():
+             self.async_backend_var.set(self.settings.get("http_backend", DEFAULT_SETTINGS["http_backend"]) == "async")
+        if hasattr(self, 'prefetch_dirs_checkbutton') and self.prefetch_dirs_checkbutton.winfo_exists():
+             self.prefetch_dirs_var.set(self.settings.get("prefetch_dirs", DEFAULT_SETTINGS["prefetch_dirs"]))
 
         # --- Check for changes requiring refresh ---
         refresh_needed = force_refresh or \
@@ -509,14 +2129,22 @@ class GitHubManagerApp:
         # --- Apply GitHub Token & Re-initialize Handler ---
         token_from_settings = self.get_token(); needs_reinit = False
         if not hasattr(self, 'github_handler') or self.github_handler is None: needs_reinit = bool(token_from_settings)
+        elif self.github_handler.auth_pending: needs_reinit = self.github_handler.token != token_from_settings
         elif not self.github_handler.is_authenticated() and token_from_settings: needs_reinit = True
         elif self.github_handler.is_authenticated() and self.github_handler.get_active_token() != token_from_settings: needs_reinit = True
         elif self.github_handler.is_authenticated() and not token_from_settings: needs_reinit = True # Token removed
 
         if needs_reinit:
             print("Applying settings: Re-initializing GitHub Handler...")
-            self.github_handler = GitHubHandler(token_from_settings)
+            if getattr(self, 'github_handler', None) is not None: self.github_handler.close_async_backend()
+            self.github_handler = GitHubHandler(token_from_settings, authenticate=False)
+            self.start_authentication() # Xác thực ở nền; view GitHub được nạp lại khi xong
             refresh_needed = True # Luôn refresh GitHub tree sau khi xác thực lại
+        if self.github_handler is not None:
+            self.github_handler.use_async_backend = self.settings.get("http_backend", DEFAULT_SETTINGS["http_backend"]) == "async"
+            if not self.github_handler.use_async_backend: self.github_handler.close_async_backend()
+
+        self._update_prefetcher()
 
         # --- Perform refreshes if needed ---
         if refresh_needed:
@@ -528,6 +2156,13 @@ class GitHubManagerApp:
                 self.populate_github_tree(self.current_github_context.get('repo'), self.current_github_context.get('path', ""))
 
 
+    def _update_prefetcher(self):
+        """Tải trước thư mục: tạo lại khi đổi handler, dừng khi tắt tùy chọn hoặc chưa xác thực."""
+        prefetch_enabled = bool(self.settings.get("prefetch_dirs")) and self.github_handler is not None and self.github_handler.is_authenticated()
+        if self.prefetcher is not None and (not prefetch_enabled or self.prefetcher.handler is not self.github_handler):
+            self.prefetcher.close(); self.prefetcher = None
+        if prefetch_enabled and self.prefetcher is None: self.prefetcher = ListingPrefetcher(self.github_handler)
+
     # --- Tạo Widgets ---
     def create_widgets(self):
         self.notebook = ttk.Notebook(self.root)
@@ -597,6 +2232,7 @@ class GitHubManagerApp:
         self.local_tree.bind("<Double-1>", self.on_local_item_double_click)
         self.local_tree.bind("<Button-3>", self.show_local_context_menu)
         self.local_tree.bind("<Delete>", self.delete_selected_local_items)
+        self.local_rows = VirtualTreeRows(self.local_tree, local_vscroll) # Mọi thao tác với các dòng đi qua mô hình này
 
 
         # --- Panel Phải (GitHub) ---
@@ -617,6 +2253,8 @@ class GitHubManagerApp:
         upload_folder_button.pack(side=RIGHT, padx=(0, 5))
         refresh_gh_button = ttk.Button(github_action_frame, text="🔃Reload", command=self.refresh_github_tree_current_view, style="Outline.TButton")
         refresh_gh_button.pack(side=RIGHT, padx=(0, 5))
+        self.github_refreshing_var = tk.StringVar(value="") # "⟳ Đang làm mới..." khi đang kiểm tra lại view đang hiển thị
+        ttk.Label(github_action_frame, textvariable=self.github_refreshing_var, style="secondary.TLabel").pack(side=RIGHT, padx=(0, 5))
 
         # Khung chứa Treeview GitHub và scrollbar dọc
         self.github_tree_frame = ttk.Frame(right_frame) # Gán vào self
@@ -644,6 +2282,10 @@ class GitHubManagerApp:
         self.github_tree.bind("<Double-1>", self.on_github_item_double_click)
         self.github_tree.bind("<Button-3>", self.show_github_context_menu)
         self.github_tree.bind("<Delete>", self.delete_selected_github_items_prompt)
+        self.github_tree.bind("<<TreeviewSelect>>", lambda e: self.prefetch_github_item(self.github_tree.focus()))
+        self.github_tree.bind("<Motion>", self.on_github_tree_hover)
+        self.github_tree.bind("<Leave>", lambda e: self._cancel_hover_prefetch())
+        self.github_rows = VirtualTreeRows(self.github_tree, github_vscroll)
 
 
         # --- Khung Status Log (Đặt dưới PanedWindow chính) ---
@@ -674,6 +2316,9 @@ class GitHubManagerApp:
         self.status_var = tk.StringVar(value="Sẵn sàng")
         status_label = ttk.Label(status_bar_frame, textvariable=self.status_var, anchor=W, style="Status.TLabel")
         status_label.pack(side=LEFT, fill=X, expand=True)
+        self.rate_limit_var = tk.StringVar(value="API: ?") # Quota API còn lại + thời gian dự kiến của các task
+        rate_limit_label = ttk.Label(status_bar_frame, textvariable=self.rate_limit_var, anchor=E, style="Status.TLabel")
+        rate_limit_label.pack(side=RIGHT, padx=(5, 0))
         self.progress_bar = ttk.Progressbar(status_bar_frame, orient=HORIZONTAL, length=150, mode='determinate')
         # Progress bar sẽ pack/unpack khi cần
 
@@ -723,6 +2368,37 @@ class GitHubManagerApp:
         self.default_download_entry.pack(side=LEFT, padx=5, expand=True, fill=X)
         browse_button = ttk.Button(download_frame, text="Chọn...", command=self.browse_default_download_dir, style="Outline.TButton")
         browse_button.pack(side=LEFT)
+        ttk.Label(download_frame, text="Số request song song:").pack(side=LEFT, padx=(15, 5))
+        self.download_workers_var = tk.IntVar(value=self.settings.get("download_workers", DEFAULT_SETTINGS["download_workers"]))
+        self.download_workers_spinbox = ttk.Spinbox(download_frame, from_=1, to=32, textvariable=self.download_workers_var, width=4)
+        self.download_workers_spinbox.pack(side=LEFT, padx=5)
+        ttk.Label(download_frame, text="Bộ đệm (MB):").pack(side=LEFT, padx=(15, 5))
+        self.download_inflight_var = tk.IntVar(value=self.settings.get("download_inflight_mb", DEFAULT_SETTINGS["download_inflight_mb"]))
+        self.download_inflight_spinbox = ttk.Spinbox(download_frame, from_=1, to=1024, textvariable=self.download_inflight_var, width=5)
+        self.download_inflight_spinbox.pack(side=LEFT, padx=5)
+
+        # Upload Settings Frame
+        upload_frame = ttk.LabelFrame(settings_frame, text="Upload", padding=10)
+        upload_frame.pack(fill=X, pady=10)
+        self.upload_single_commit_var = tk.BooleanVar(value=self.settings.get("upload_single_commit", True))
+        self.upload_single_commit_checkbutton = ttk.Checkbutton(upload_frame, text="Gộp tất cả file của một lần upload vào MỘT commit (Git Data API)", variable=self.upload_single_commit_var)
+        self.upload_single_commit_checkbutton.pack(side=LEFT, padx=5)
+        self.upload_workers_var = tk.IntVar(value=self.settings.get("upload_workers", DEFAULT_SETTINGS["upload_workers"]))
+        self.upload_workers_spinbox = ttk.Spinbox(upload_frame, from_=1, to=32, textvariable=self.upload_workers_var, width=4)
+        self.upload_workers_spinbox.pack(side=RIGHT, padx=5)
+        ttk.Label(upload_frame, text="Số request song song:").pack(side=RIGHT, padx=5)
+
+        # Network Settings Frame
+        network_frame = ttk.LabelFrame(settings_frame, text="Kết nối", padding=10)
+        network_frame.pack(fill=X, pady=10)
+        self.async_backend_var = tk.BooleanVar(value=self.settings.get("http_backend", DEFAULT_SETTINGS["http_backend"]) == "async")
+        async_text = "Dùng HTTP bất đồng bộ (httpx, HTTP/2) cho upload/tải nhiều file"
+        if not HTTPX_AVAILABLE: async_text += " - chưa cài httpx"
+        self.async_backend_checkbutton = ttk.Checkbutton(network_frame, text=async_text, variable=self.async_backend_var, state=tk.NORMAL if HTTPX_AVAILABLE else tk.DISABLED)
+        self.async_backend_checkbutton.pack(anchor=W, padx=5)
+        self.prefetch_dirs_var = tk.BooleanVar(value=self.settings.get("prefetch_dirs", DEFAULT_SETTINGS["prefetch_dirs"]))
+        self.prefetch_dirs_checkbutton = ttk.Checkbutton(network_frame, text="Tải trước nội dung thư mục đang chọn/di chuột qua (tốn thêm request, dừng khi quota thấp)", variable=self.prefetch_dirs_var)
+        self.prefetch_dirs_checkbutton.pack(anchor=W, padx=5, pady=(5, 0))
 
         save_button = ttk.Button(settings_frame, text="Lưu cài đặt & Áp dụng", command=self.save_settings_ui, style="success.TButton")
         save_button.pack(pady=20)
@@ -737,10 +2413,12 @@ class GitHubManagerApp:
 
         items = []
         icon_prefixes_to_strip = (DRIVE_ICON + " ", FOLDER_ICON + " ", FILE_ICON + " ", REPO_ICON + " ")
-        for k in tv.get_children(''):
+        rows = self.local_rows if tv is self.local_tree else self.github_rows # Sắp xếp toàn bộ mô hình, không chỉ các dòng đang hiển thị
+        columns = tuple(tv['columns'])
+        for k in rows.get_children():
             try:
                 if col == "#0":
-                    text_val = tv.item(k, 'text')
+                    text_val = rows.item(k, 'text')
                     value = text_val # Mặc định
                     if self.settings.get("show_icons"):
                         for prefix in icon_prefixes_to_strip:
@@ -750,7 +2428,8 @@ class GitHubManagerApp:
                     # Xử lý trường hợp đặc biệt ".."
                     if value == "..": value = "" # Sort ".." lên đầu
                 else:
-                    value = tv.set(k, col)
+                    values = rows.item(k, 'values')
+                    value = values[columns.index(col)] if columns.index(col) < len(values) else ""
                 items.append((value, k))
             except tk.TclError: continue
 
@@ -774,8 +2453,7 @@ class GitHubManagerApp:
             # Sort case-insensitive, đưa ".." lên đầu nếu có
             items.sort(key=lambda x: (x[0] == "", str(x[0]).lower()), reverse=self.sort_reverse[col])
 
-        for index, (val, k) in enumerate(items):
-            if tv.exists(k): tv.move(k, '', index)
+        rows.reorder([k for val, k in items])
 
         self.sort_reverse[col] = not self.sort_reverse[col]
         try:
@@ -904,10 +2582,8 @@ class GitHubManagerApp:
         else: # Linux/Other
              docs = os.path.join(home, "Documents")
              if not os.path.isdir(docs): # XDG fallback
-                 try:
-                     xdg_docs = subprocess.check_output(['xdg-user-dir', 'DOCUMENTS'], text=True, stderr=subprocess.DEVNULL).strip()
-                     if xdg_docs and os.path.isdir(xdg_docs): docs = xdg_docs
-                 except: pass
+                 xdg_path = xdg_user_dir('DOCUMENTS')
+                 if xdg_path and os.path.isdir(xdg_path): docs = xdg_path
         if docs and os.path.isdir(docs): paths["My Documents"] = docs
 
         # Downloads folder
@@ -918,10 +2594,8 @@ class GitHubManagerApp:
         else:
             downloads = os.path.join(home, "Downloads")
             if not os.path.isdir(downloads):
-                 try:
-                     xdg_downloads = subprocess.check_output(['xdg-user-dir', 'DOWNLOAD'], text=True, stderr=subprocess.DEVNULL).strip()
-                     if xdg_downloads and os.path.isdir(xdg_downloads): downloads = xdg_downloads
-                 except: pass
+                 xdg_path = xdg_user_dir('DOWNLOAD')
+                 if xdg_path and os.path.isdir(xdg_path): downloads = xdg_path
         if downloads and os.path.isdir(downloads): paths["Downloads"] = downloads
 
         # Desktop folder
@@ -932,10 +2606,8 @@ class GitHubManagerApp:
         else:
              desktop = os.path.join(home, "Desktop")
              if not os.path.isdir(desktop):
-                 try:
-                     xdg_desktop = subprocess.check_output(['xdg-user-dir', 'DESKTOP'], text=True, stderr=subprocess.DEVNULL).strip()
-                     if xdg_desktop and os.path.isdir(xdg_desktop): desktop = xdg_desktop
-                 except: pass
+                 xdg_path = xdg_user_dir('DESKTOP')
+                 if xdg_path and os.path.isdir(xdg_path): desktop = xdg_path
         if desktop and os.path.isdir(desktop): paths["Desktop"] = desktop
 
 
@@ -1100,6 +2772,15 @@ class GitHubManagerApp:
         self.settings["font_size"] = self.font_size_display_var.get()
         self.settings["show_icons"] = self.show_icons_var.get()
         self.settings["default_download_dir"] = self.default_download_dir_var.get()
+        self.settings["upload_single_commit"] = self.upload_single_commit_var.get()
+        self.settings["http_backend"] = "async" if self.async_backend_var.get() else "sync"
+        self.settings["prefetch_dirs"] = self.prefetch_dirs_var.get()
+        try: self.settings["upload_workers"] = max(1, min(32, int(self.upload_workers_var.get())))
+        except (tk.TclError, ValueError): self.settings["upload_workers"] = DEFAULT_SETTINGS["upload_workers"]
+        try: self.settings["download_workers"] = max(1, min(32, int(self.download_workers_var.get())))
+        except (tk.TclError, ValueError): self.settings["download_workers"] = DEFAULT_SETTINGS["download_workers"]
+        try: self.settings["download_inflight_mb"] = max(1, min(1024, int(self.download_inflight_var.get())))
+        except (tk.TclError, ValueError): self.settings["download_inflight_mb"] = DEFAULT_SETTINGS["download_inflight_mb"]
 
         entered_token = self.api_token_entry.get()
         if self.show_token_var.get(): self.settings["api_token"] = entered_token
@@ -1154,6 +2835,12 @@ class GitHubManagerApp:
 
     def process_queue(self):
         """Processes messages from worker threads."""
+        for _ in range(UI_QUEUE_BATCH):
+            try: callback = ui_queue.get_nowait()
+            except queue.Empty: break
+            try: callback()
+            except tk.TclError: pass
+            except Exception as e: print(f"Error in UI callback: {e}")
         try:
             while True:
                 task_id, message, progress, finished, data = update_queue.get_nowait()
@@ -1171,9 +2858,13 @@ class GitHubManagerApp:
                 if task_id: status_bar_msg = f"Task {task_id}: {status_bar_msg}"
                 self.update_status(status_bar_msg, progress)
 
+                if task_id in self.upload_tasks and data and 'pending_requests' in data:
+                    self.upload_tasks[task_id]['pending_requests'] = data['pending_requests']
+
                 if finished:
                     if task_id in self.upload_tasks:
                          self.upload_tasks[task_id]['status'] = message
+                         self.upload_tasks[task_id]['pending_requests'] = 0
                          # del self.upload_tasks[task_id] # Có thể xóa task đã xong
 
                     refresh_target = data.get('refresh_view') if data else None
@@ -1185,6 +2876,8 @@ class GitHubManagerApp:
                         if action in ['delete_repo', 'rename_repo']:
                             print("Refreshing repo list due to repo action.")
                             self.populate_github_tree()
+                        elif data.get('changes') is not None: # Kết quả thao tác: cập nhật từng dòng, không tải lại
+                            if current_repo and current_repo == refresh_repo: self.apply_github_changes(refresh_repo, data['changes'])
                         # For actions like 'delete', 'rename_file', 'upload', 'batch_delete'
                         elif current_repo and current_repo == refresh_repo:
                              action_parent_dir_of_item = os.path.dirname(refresh_path).replace("\\", "/") if refresh_path else "" # path of the item's parent
@@ -1230,14 +2923,32 @@ class GitHubManagerApp:
         except queue.Empty: pass
         except Exception as e: print(f"Error in process_queue: {e}")
         finally:
+            self.update_rate_limit_status()
             try: self.root.after(150, self.process_queue)
             except tk.TclError: pass # Ignore errors during shutdown
 
+    def update_rate_limit_status(self):
+        """Hiển thị quota API còn lại và thời gian dự kiến để hoàn thành các task đang chạy."""
+        try:
+            if not self.github_handler or not self.github_handler.is_authenticated():
+                self.rate_limit_var.set(""); return
+            scheduler = self.github_handler.scheduler
+            text = scheduler.status_text()
+            pending = sum(t.get('pending_requests', 0) for t in self.upload_tasks.values())
+            if pending > 0:
+                eta = int(scheduler.estimate_seconds(pending))
+                text += f" · ~{pending} request, còn ~{eta // 60}m{eta % 60:02d}s"
+            if self.rate_limit_var.get() != text: self.rate_limit_var.set(text)
+        except tk.TclError: pass
+        except Exception as e: print(f"Error updating rate limit status: {e}")
+
     # --- Logic Local Explorer ---
     # --- ĐƯA LẠI CÁC HÀM NÀY ---
-    def populate_local_tree(self, path):
-        """Hiển thị nội dung thư mục cục bộ hoặc danh sách ổ đĩa."""
-        for i in self.local_tree.get_children(): self.local_tree.delete(i)
+    def populate_local_tree(self, path, select=None):
+        """Hiển thị nội dung thư mục cục bộ hoặc danh sách ổ đĩa.
+        Thư mục được đọc trên thread nền; select: iid (đường dẫn) cần chọn khi đọc xong."""
+        self.local_view_generation += 1 # Lượt đọc thư mục trước (nếu còn chạy) bị hủy
+        self.local_rows.clear()
         # Reset sort indicators
         if hasattr(self, 'sort_reverse'):
             for col in self.local_tree['columns'] + ('#0',):
@@ -1275,8 +2986,7 @@ class GitHubManagerApp:
                     icon_prefix = DRIVE_ICON + " " if show_icons else ""
                     display_text = f"{icon_prefix}{drive['display_name']}"
                     # Dùng path làm iid cho ổ đĩa
-                    self.local_tree.insert("", tk.END, text=display_text,
-                                           values=("Ổ đĩa", "", ""), iid=drive['path'])
+                    self.local_rows.insert(tk.END, drive['path'], display_text, ("Ổ đĩa", "", ""))
                 return # Kết thúc xử lý cho "Máy tính"
 
             except Exception as e:
@@ -1285,91 +2995,102 @@ class GitHubManagerApp:
                  self.populate_local_tree(home_path); return # Về Home nếu lỗi
 
         # --- Xử lý View Thư mục (path is not None) ---
+        # Đọc thư mục trên thread nền (os.scandir), dòng được gửi về theo từng khối qua ui_queue
+        abs_path = os.path.abspath(path)
+        self.current_local_path = abs_path
+        self.local_path_var.set(self.current_local_path)
+        self.log_status(f"Đang xem thư mục: {self.current_local_path}", "INFO")
+        # Thêm mục ".." nếu không phải gốc
+        if not self.is_drive_root(abs_path) and os.path.dirname(abs_path) != abs_path:
+            self.local_rows.insert(tk.END, os.path.dirname(abs_path), "..", ("Parent Directory", "", ""))
+        generation = self.local_view_generation
+        threading.Thread(target=self._scan_local_worker, args=(generation, abs_path, show_icons, select), daemon=True).start()
+
+    def _local_entry_row(self, entry, show_icons):
+        """(khóa sắp xếp, dòng) của một os.DirEntry; loại mục dùng dữ liệu có sẵn của scandir (không tốn syscall
+        trên Windows và phần lớn hệ thống file Linux). Ném OSError nếu không đọc được stat."""
+        icon_prefix = ""; item_type = "Khác"
+        if entry.is_symlink():
+            item_type = "Liên kết"
+            # Icon có thể là file hoặc folder tùy mục tiêu? Tạm dùng file
+            if show_icons: icon_prefix = FILE_ICON + " "
+        elif entry.is_dir(follow_symlinks=False):
+            item_type = "Thư mục"
+            if show_icons: icon_prefix = FOLDER_ICON + " "
+        elif entry.is_file(follow_symlinks=False):
+            item_type = "Tập tin"
+            if show_icons: icon_prefix = FILE_ICON + " "
+        # Bỏ qua các loại khác (socket,...)
+        stat_info = entry.stat() # Theo liên kết như trước: liên kết hỏng bị bỏ qua
+        item_size_str = self.format_size(stat_info.st_size) if item_type == "Tập tin" else ""
+        modified_str = time.strftime("%Y-%m-%d %H:%M", time.localtime(stat_info.st_mtime)) if stat_info.st_mtime else "N/A"
+        # Sắp xếp: Thư mục -> File -> Liên kết -> Khác, sau đó theo tên
+        sort_key = (item_type != "Thư mục", item_type != "Tập tin", item_type != "Liên kết", entry.name.lower())
+        return sort_key, (entry.path, f"{icon_prefix}{entry.name}", (item_type, item_size_str, modified_str)) # Dùng full_path làm iid
+
+    def _scan_local_worker(self, generation, abs_path, show_icons, select=None):
+        """Thread nền: liệt kê thư mục cục bộ bằng os.scandir, gửi từng khối LOCAL_SCAN_CHUNK dòng sang thread GUI.
+        Dừng ngay khi người dùng chuyển sang thư mục khác (local_view_generation đổi)."""
+        chunk = []; listed = []
         try:
-             # Chuẩn hóa path và kiểm tra hợp lệ
-             abs_path = os.path.abspath(path)
-             if not os.path.isdir(abs_path):
-                 self.log_status(f"Đường dẫn cục bộ không hợp lệ: {path}", "ERROR")
-                 messagebox.showerror("Lỗi", f"Đường dẫn không hợp lệ hoặc không thể truy cập:\n{path}", parent=self.root)
-                 self.populate_local_tree(None); return # Về "Máy tính"
-
-             self.current_local_path = abs_path
-             self.local_path_var.set(self.current_local_path)
-             self.log_status(f"Đang xem thư mục: {self.current_local_path}", "INFO")
-
-             items_data = []
-             # Thêm mục ".." nếu không phải gốc
-             if not self.is_drive_root(abs_path) and os.path.dirname(abs_path) != abs_path:
-                 parent_path = os.path.dirname(abs_path)
-                 items_data.append({'name': "..", 'display_text': "..", 'type': "Parent Directory", 'size_str': "", 'modified_str': "", 'full_path': parent_path, 'is_dir': True, 'sort_name': ""}) # sort "" lên đầu
-
-             # Liệt kê các mục trong thư mục
-             for item in os.listdir(abs_path):
-                 full_path = os.path.join(abs_path, item)
-                 icon_prefix = ""; item_type = "Khác"; is_dir = False
-                 try:
-                     stat_info = os.stat(full_path) # Lấy stat trước
-                     is_link = os.path.islink(full_path) # islink hoạt động tốt hơn trên stat
-
-                     if os.path.isdir(full_path) and not is_link:
-                         item_type = "Thư mục"; is_dir = True
-                         if show_icons: icon_prefix = FOLDER_ICON + " "
-                     elif os.path.isfile(full_path) and not is_link:
-                         item_type = "Tập tin"
-                         if show_icons: icon_prefix = FILE_ICON + " "
-                     elif is_link:
-                         item_type = "Liên kết"
-                         # Icon có thể là file hoặc folder tùy mục tiêu? Tạm dùng file
-                         if show_icons: icon_prefix = FILE_ICON + " "
-                     # Bỏ qua các loại khác (socket,...)
-
-                     size_bytes = stat_info.st_size
-                     modified_time = stat_info.st_mtime
-
-                     # Format size và modified time
-                     item_size_str = self.format_size(size_bytes) if item_type == "Tập tin" else ""
-                     modified_str = time.strftime("%Y-%m-%d %H:%M", time.localtime(modified_time)) if modified_time else "N/A"
-
-                     items_data.append({
-                         'name': item, 'display_text': f"{icon_prefix}{item}", 'type': item_type,
-                         'size_str': item_size_str, 'modified_str': modified_str,
-                         'full_path': full_path, 'is_dir': is_dir, 'sort_name': item.lower()
-                     })
-                 except OSError as e:
-                     print(f"Skipping item due to access error: {full_path} - {e}")
-                     continue # Bỏ qua item nếu không đọc được stat
-
-             # Sắp xếp: ".." -> Thư mục -> File -> Liên kết -> Khác, sau đó theo tên
-             items_data.sort(key=lambda x: (x['name'] != "..", x['type'] != "Thư mục", x['type'] != "Tập tin", x['type'] != "Liên kết", x['sort_name']))
-
-             # Đưa vào Treeview
-             for item_data in items_data:
-                 self.local_tree.insert("", tk.END, text=item_data['display_text'],
-                                        values=(item_data['type'], item_data['size_str'], item_data['modified_str']),
-                                        iid=item_data['full_path']) # Dùng full_path làm iid
-
-        except FileNotFoundError:
+            with os.scandir(abs_path) as it:
+                for entry in it:
+                    if generation != self.local_view_generation: return
+                    try: row = self._local_entry_row(entry, show_icons)
+                    except OSError as e:
+                        print(f"Skipping item due to access error: {entry.path} - {e}")
+                        continue # Bỏ qua item nếu không đọc được stat
+                    chunk.append(row[1]); listed.append(row)
+                    if len(chunk) >= LOCAL_SCAN_CHUNK:
+                        ui_queue.put(lambda rows=chunk: self._add_local_rows(generation, rows)); chunk = []
+        except OSError as e:
+            ui_queue.put(lambda e=e: self._local_scan_failed(generation, abs_path, e)); return
+        except Exception as e:
+            import traceback; traceback.print_exc()
+            ui_queue.put(lambda e=e: self._local_scan_failed(generation, abs_path, e)); return
+        listed.sort(key=lambda row: row[0])
+        ui_queue.put(lambda: self._finish_local_rows(generation, [row for _, row in listed], select))
+
+    def _add_local_rows(self, generation, rows):
+        """Thêm một khối dòng vừa đọc được (chạy trên thread GUI); khối của lượt đọc cũ bị bỏ qua."""
+        if generation == self.local_view_generation: self.local_rows.extend(rows)
+
+    def _finish_local_rows(self, generation, rows, select=None):
+        """Thay các dòng đã thêm dần bằng danh sách đầy đủ đã sắp xếp; giữ dòng "..", vị trí cuộn và dòng đang chọn."""
+        if generation != self.local_view_generation: return
+        back_rows = [(iid, "..", self.local_rows.item(iid, 'values')) for iid in self.local_rows.get_children() if self.local_rows.item(iid, 'text') == ".."]
+        self.local_rows.set_rows(back_rows + rows)
+        if select and self.local_rows.exists(select):
+            self.local_rows.selection_set(select); self.local_rows.focus(select); self.local_rows.see(select)
+
+    def _local_scan_failed(self, generation, path, error):
+        """Báo lỗi đọc thư mục cục bộ (chạy trên thread GUI) rồi chuyển sang view hợp lệ như trước đây."""
+        if generation != self.local_view_generation: return
+        if isinstance(error, FileNotFoundError):
              self.log_status(f"Lỗi: Đường dẫn cục bộ không tồn tại: {path}", "ERROR")
              messagebox.showerror("Lỗi", f"Đường dẫn không tồn tại: {path}", parent=self.root)
              self.populate_local_tree(None) # Về "Máy tính"
-        except PermissionError:
+        elif isinstance(error, NotADirectoryError):
+             self.log_status(f"Đường dẫn cục bộ không hợp lệ: {path}", "ERROR")
+             messagebox.showerror("Lỗi", f"Đường dẫn không hợp lệ hoặc không thể truy cập:\n{path}", parent=self.root)
+             self.populate_local_tree(None) # Về "Máy tính"
+        elif isinstance(error, PermissionError):
              self.log_status(f"Lỗi: Không có quyền truy cập: {path}", "ERROR")
              messagebox.showerror("Lỗi", f"Không có quyền truy cập vào:\n{path}", parent=self.root)
              # Thử lên thư mục cha nếu có thể
              parent = os.path.dirname(path)
              if parent != path and os.path.isdir(parent): self.populate_local_tree(parent)
              else: self.populate_local_tree(None) # Về "Máy tính" nếu không lên được
-        except Exception as e:
-             self.log_status(f"Lỗi không xác định khi đọc thư mục cục bộ: {e}", "ERROR")
-             import traceback; traceback.print_exc()
-             messagebox.showerror("Lỗi", f"Lỗi khi đọc thư mục:\n{e}", parent=self.root)
+        else:
+             self.log_status(f"Lỗi không xác định khi đọc thư mục cục bộ: {error}", "ERROR")
+             messagebox.showerror("Lỗi", f"Lỗi khi đọc thư mục:\n{error}", parent=self.root)
              self.populate_local_tree(None) # Về "Máy tính"
 
     def on_local_item_double_click(self, event):
         item_id = self.local_tree.focus()
         if not item_id: return
 
-        item_text = self.local_tree.item(item_id, 'text')
+        item_text = self.local_rows.item(item_id, 'text')
         if item_text == "..":
             self.go_up_local()
             return
@@ -1392,10 +3113,10 @@ class GitHubManagerApp:
 
     def get_selected_local_items(self):
         """Lấy danh sách các đường dẫn cục bộ đang được chọn (bỏ qua '..')."""
-        selected_ids = self.local_tree.selection()
+        selected_ids = self.local_rows.selection()
         valid_selections = []
         for item_id in selected_ids:
-            if self.local_tree.exists(item_id) and self.local_tree.item(item_id, 'text') != "..":
+            if self.local_rows.exists(item_id) and self.local_rows.item(item_id, 'text') != "..":
                 valid_selections.append(item_id) # item_id is the full path
         return tuple(valid_selections)
 
@@ -1403,11 +3124,13 @@ class GitHubManagerApp:
     # --- Logic GitHub Explorer ---
     # ... (Giữ nguyên các hàm populate_github_tree, on_github_item_double_click, parse_item_id, get_selected_github_items_info, refresh_github_tree_current_view) ...
     # Đảm bảo populate_github_tree dùng đúng icon REPO_ICON, FOLDER_ICON, FILE_ICON
-    def populate_github_tree(self, repo_name=None, path=""):
+    def populate_github_tree(self, repo_name=None, path="", refresh=False, tree_sha=None):
         # ... (Clear tree, reset sort) ...
-        for i in self.github_tree.get_children(): self.github_tree.delete(i)
+        self.github_rows.clear()
         self.current_github_context = {'repo': repo_name, 'path': path}
-        show_icons = self.settings.get("show_icons", True)
+        self.github_view_generation += 1
+        self.github_refreshing_var.set("")
+        self.github_view_entries = {}
         if hasattr(self, 'sort_reverse'):
              for col in self.github_tree['columns'] + ('#0',):
                   try:
@@ -1416,32 +3139,28 @@ class GitHubManagerApp:
                   except: pass
              self.sort_reverse = {}
 
+        if self.github_handler and self.github_handler.auth_pending: # Đang xác thực ở nền: hiện danh sách repo lần trước
+            self.repo_list_names = []
+            if repo_name is None: self._insert_repo_rows(self.github_view_generation, self.github_handler.get_cached_repos())
+            self.github_path_label_var.set("GitHub: Đang xác thực...")
+            self.github_rows.insert(tk.END, "placeholder_authenticating", "Đang xác thực GitHub...")
+            return
         if not self.github_handler or not self.github_handler.is_authenticated():
-            self.github_tree.insert("", tk.END, text="Vui lòng cấu hình API Token...", iid="placeholder_no_auth")
+            self.github_rows.insert(tk.END, "placeholder_no_auth", "Vui lòng cấu hình API Token...")
             self.github_path_label_var.set("GitHub: Chưa xác thực")
             return
 
         self.github_path_label_var.set(f"GitHub: Đang tải...")
-        self.root.update_idletasks()
 
-        # View Repo List
+        # View Repo List: tải nền từng trang, chèn dòng ngay khi mỗi trang về
         if repo_name is None:
             self.github_path_label_var.set("Repositories List")
             self.log_status("Đang tải danh sách repositories...", "INFO")
-            repos = self.github_handler.get_repos()
-            if repos is None: # Error during fetch
-                 self.github_tree.insert("", tk.END, text="Lỗi tải repo. Xem Nhật ký.", iid="placeholder_load_repo_fail")
-                 self.log_status("Không thể tải danh sách repositories.", "ERROR"); return
-            if not repos:
-                 self.github_tree.insert("", tk.END, text="Không tìm thấy repository.", iid="placeholder_no_repos")
-                 self.log_status("Không có repository nào.", "INFO"); return
-
-            repos.sort(key=lambda r: r.name.lower())
-            self.log_status(f"Hiển thị {len(repos)} repositories.", "SUCCESS")
-            for repo in repos:
-                iid = f"repo_{repo.name}" # Dùng ID cũ cho repo list
-                display_text = f"{REPO_ICON} {repo.name}" if show_icons else repo.name
-                self.github_tree.insert("", tk.END, text=display_text, values=("Repository", "", repo.name), iid=iid)
+            self.github_rows.insert(tk.END, "placeholder_loading_repos", "Đang tải danh sách repositories...")
+            self.repo_list_names = []
+            generation = self.github_view_generation
+            self._insert_repo_rows(generation, self.github_handler.get_cached_repos()) # Hiển thị ngay danh sách của lần chạy trước
+            threading.Thread(target=self._load_repos_worker, args=(generation,), daemon=True).start()
 
         # View Repo Content
         else:
@@ -1461,32 +3180,189 @@ class GitHubManagerApp:
             else:
                  back_text = ".. (Quay lại danh sách Repos)"
                  back_iid = "back|root"
-            self.github_tree.insert("", 0, text=back_text, values=back_values, iid=back_iid)
-
-            # Get contents
-            contents = self.github_handler.get_repo_contents(repo_name, path)
-
-            if contents is None: # Error loading
-                 self.github_tree.insert("", tk.END, text="Lỗi tải nội dung. Xem Nhật ký.", iid="placeholder_load_content_fail")
-                 self.log_status(f"Lỗi tải nội dung cho {current_display_path}.", "ERROR"); return
-            if not contents: # Empty list
-                 is_repo_root = not path
-                 empty_msg = "(Repository này rỗng)" if is_repo_root else "(Thư mục rỗng hoặc không tồn tại)"
-                 self.github_tree.insert("", tk.END, text=empty_msg, iid="placeholder_empty_dir")
-                 self.log_status(f"Nội dung rỗng cho: {current_display_path}", "INFO"); return
-
-            contents.sort(key=lambda c: (c.type != 'dir', c.name.lower()))
-            self.log_status(f"Hiển thị {len(contents)} mục trong {current_display_path}.", "SUCCESS")
-            for item in contents:
-                item_type = "Thư mục" if item.type == "dir" else "Tập tin"
-                icon_prefix = ""
-                if show_icons: icon_prefix = (FOLDER_ICON if item.type == "dir" else FILE_ICON) + " "
-                item_size_str = self.format_size(item.size) if item.type == "file" else ""
-                display_text = f"{icon_prefix}{item.name}"
-                safe_repo = repo_name.replace('|','_'); safe_path = item.path.replace('|','_'); safe_sha = item.sha.replace('|', '_')
-                item_iid = f"gh|{item.type}|{safe_repo}|{safe_path}|{safe_sha}"
-                self.github_tree.insert("", tk.END, text=display_text, values=(item_type, item_size_str, item.path), iid=item_iid)
+            self.github_rows.insert(0, back_iid, back_text, back_values)
+
+            generation = self.github_view_generation
+            if not refresh: # Đã có sẵn (chỉ mục trong bộ nhớ / cache SQLite theo SHA tree): hiển thị ngay, 0 request
+                contents = self.github_handler.peek_dir(repo_name, path, tree_sha)
+                if contents is not None: self._show_github_contents(generation, repo_name, path, contents, None); return
+
+            # Stale-while-revalidate: hiển thị ngay danh sách lần trước (nếu có) rồi kiểm tra lại ở nền
+            stale = self.github_handler.last_listing(repo_name, path)
+            if stale is not None:
+                self._show_github_contents(generation, repo_name, path, stale, None, revalidating=True)
+                self.github_refreshing_var.set("⟳ Đang làm mới...")
+            else: # Get contents: tải nền, hiển thị placeholder trong lúc chờ
+                self.github_rows.insert(tk.END, "placeholder_loading_content", "Đang tải...")
+            threading.Thread(target=self._load_contents_worker, args=(generation, repo_name, path, refresh, tree_sha), daemon=True).start()
+
+    def _load_contents_worker(self, generation, repo_name, path, refresh, tree_sha=None):
+        """Thread nền: lấy nội dung thư mục rồi gửi kết quả sang thread GUI. Bỏ qua nếu view đã đổi."""
+        if generation != self.github_view_generation: return # Bị thay thế trước khi kịp chạy
+        contents, error = self.github_handler.fetch_repo_contents(repo_name, path, refresh=refresh, tree_sha=tree_sha)
+        ui_queue.put(lambda: self._show_github_contents(generation, repo_name, path, contents, error))
+
+    def _show_github_contents(self, generation, repo_name, path, contents, error, revalidating=False):
+        """Hiển thị nội dung thư mục GitHub (chạy trên thread GUI); kết quả của lượt tải cũ bị bỏ qua.
+        Dòng được thay trong mô hình github_rows: dòng cùng iid giữ trạng thái chọn, vị trí cuộn không đổi.
+        revalidating=True: contents là danh sách cũ, kết quả mới sẽ tới sau."""
+        if generation != self.github_view_generation: return
+        if not revalidating: self.github_refreshing_var.set("")
+        if self.github_rows.exists("placeholder_loading_content"): self.github_rows.delete("placeholder_loading_content")
+        show_icons = self.settings.get("show_icons", True)
+        current_display_path = f"{repo_name}/{path}".strip('/') if path else repo_name
+        has_rows = any(iid.startswith("gh|") for iid in self.github_rows.get_children())
+
+        if contents is None: # Error loading
+             if not has_rows and not self.github_rows.exists("placeholder_load_content_fail"):
+                 self.github_rows.insert(tk.END, "placeholder_load_content_fail", "Lỗi tải nội dung. Xem Nhật ký.")
+             if error: self.log_status(f"{error[0]}: {error[1]}", "ERROR")
+             self.log_status(f"Lỗi tải nội dung cho {current_display_path}.", "ERROR"); return
+
+        contents = sorted(contents, key=lambda c: (c.type != 'dir', c.name.lower()))
+        self.github_view_entries = {item.path: item for item in contents}
+        if self._github_rows_job is not None: self.root.after_cancel(self._github_rows_job); self._github_rows_job = None
+        # Chỉ lần hiển thị đầu tiên mới chia trang; khi view đã có dòng (làm mới, cập nhật tại chỗ) thay cả danh sách
+        # một lượt để mô hình không bị co lại và vị trí cuộn được giữ nguyên
+        paged = not has_rows and len(contents) > GITHUB_ROWS_PAGE
+        rows = [self._github_content_row(repo_name, item, show_icons) for item in (contents[:GITHUB_ROWS_PAGE] if paged else contents)]
+
+        # Thay các dòng nội dung (giữ dòng ".."); dòng có cùng iid (path + SHA) giữ trạng thái chọn, vị trí cuộn không đổi
+        back_rows = [(iid, self.github_rows.item(iid, 'text'), self.github_rows.item(iid, 'values')) for iid in self.github_rows.get_children() if iid.startswith("back")]
+        self.github_rows.set_rows(back_rows + rows)
+        if paged: # Thư mục lớn: phần còn lại được thêm dần, giao diện không bị chặn
+            self._github_rows_job = self.root.after(1, self._append_github_rows, generation, repo_name, contents, GITHUB_ROWS_PAGE, show_icons)
+
+        if not contents: # Empty list
+             is_repo_root = not path
+             empty_msg = "(Repository này rỗng)" if is_repo_root else "(Thư mục rỗng hoặc không tồn tại)"
+             self.github_rows.insert(tk.END, "placeholder_empty_dir", empty_msg)
+             self.log_status(f"Nội dung rỗng cho: {current_display_path}", "INFO")
+        elif not revalidating:
+             self.log_status(f"Hiển thị {len(contents)} mục trong {current_display_path}.", "SUCCESS")
+        if self.prefetcher is not None and not revalidating: # Thư mục ở đầu danh sách: yêu cầu sau cùng được tải trước tiên
+            visible_dirs = [item for item in contents if item.type == "dir"][:PREFETCH_VISIBLE_LIMIT]
+            for item in reversed(visible_dirs): self.prefetcher.request(repo_name, item.path, item.sha)
+
+    def _github_content_row(self, repo_name, item, show_icons):
+        """(iid, text, values) của một mục nội dung repo trong github_rows."""
+        item_type = "Thư mục" if item.type == "dir" else "Tập tin"
+        icon_prefix = ""
+        if show_icons: icon_prefix = (FOLDER_ICON if item.type == "dir" else FILE_ICON) + " "
+        item_size_str = self.format_size(item.size) if item.type == "file" else ""
+        safe_repo = repo_name.replace('|','_'); safe_path = item.path.replace('|','_'); safe_sha = item.sha.replace('|', '_')
+        return (f"gh|{item.type}|{safe_repo}|{safe_path}|{safe_sha}", f"{icon_prefix}{item.name}", (item_type, item_size_str, item.path))
+
+    def _append_github_rows(self, generation, repo_name, contents, start, show_icons):
+        """Thêm trang dòng tiếp theo (GITHUB_ROWS_PAGE mục) của một thư mục lớn; dừng nếu view đã đổi."""
+        self._github_rows_job = None
+        if generation != self.github_view_generation: return
+        end = start + GITHUB_ROWS_PAGE
+        self.github_rows.extend([self._github_content_row(repo_name, item, show_icons) for item in contents[start:end]])
+        if end < len(contents):
+            self._github_rows_job = self.root.after(1, self._append_github_rows, generation, repo_name, contents, end, show_icons)
+
+    def apply_github_changes(self, repo_name, changes):
+        """Áp kết quả của một thao tác lên view hiện tại mà không tải lại danh sách (chạy trên thread GUI).
+        changes: list (op, path, type, sha, size) với op là 'put' (thêm/cập nhật) hoặc 'remove'.
+        Thay đổi nằm sâu bên trong một thư mục con chỉ làm SHA tree của thư mục đó thành chưa biết ('')."""
+        if repo_name != self.current_github_context.get('repo'): return
+        current = self.current_github_context.get('path', "").strip('/')
+        prefix = f"{current}/" if current else ""
+        if any(path == current or current.startswith(f"{path}/") for _, path, _, _, _ in changes) \
+           or self.github_rows.exists("placeholder_loading_content") or self.github_refreshing_var.get():
+            self.refresh_github_tree_current_view(); return # Thư mục đang xem bị xóa/di chuyển, hoặc view chưa tải xong
+        entries = dict(self.github_view_entries)
+        for op, path, item_type, sha, size in changes:
+            if not path.startswith(prefix): continue
+            child = path[len(prefix):].split('/', 1)[0]; child_path = prefix + child
+            if child_path != path: # Bên trong thư mục con (có thể là thư mục mới do upload tạo ra)
+                entries[child_path] = TreeEntry(child_path, 'dir', '', 0, "040000")
+            elif op == 'remove': entries.pop(path, None)
+            else: entries[path] = TreeEntry(path, item_type, sha or '', size, "040000" if item_type == 'dir' else "100644")
+        contents = list(entries.values())
+        self._show_github_contents(self.github_view_generation, repo_name, current, contents, None)
+        self.github_handler.remember_listing(repo_name, current, contents)
+
+    def _load_repos_worker(self, generation):
+        """Thread nền: lấy danh sách repo theo trang, gửi từng trang sang thread GUI qua ui_queue."""
+        total = 0; fetched = []
+        try:
+            for page in self.github_handler.iter_repo_pages():
+                if generation != self.github_view_generation: return # Người dùng đã chuyển view
+                total += len(page); fetched.extend(page)
+                ui_queue.put(lambda page=page: self._insert_repo_rows(generation, page))
+            print(f"Fetched {total} repositories.")
+            self.github_handler.store_repo_list(fetched)
+            names = {repo.name for repo in fetched}
+            ui_queue.put(lambda: self._finish_repo_rows(generation, total, None, names))
+        except RateLimitExceededException:
+            ui_queue.put(lambda: self._finish_repo_rows(generation, total, "Vượt quá giới hạn API khi lấy danh sách repo."))
+        except GithubException as e:
+            error = f"Không thể lấy danh sách repositories: {e.status} - {e.data.get('message', '') if e.data else ''}"
+            ui_queue.put(lambda: self._finish_repo_rows(generation, total, error))
+        except Exception as e:
+            error = f"Đã xảy ra lỗi khi lấy danh sách repo: {e}"
+            ui_queue.put(lambda: self._finish_repo_rows(generation, total, error))
 
+    def _insert_repo_rows(self, generation, repos):
+        """Chèn một trang repo vào github_tree, giữ thứ tự theo tên (chạy trên thread GUI)."""
+        if generation != self.github_view_generation: return
+        show_icons = self.settings.get("show_icons", True)
+        for repo in repos:
+            iid = f"repo_{repo.name}" # Dùng ID cũ cho repo list
+            if self.github_rows.exists(iid): continue
+            key = repo.name.lower()
+            position = bisect.bisect(self.repo_list_names, key)
+            self.repo_list_names.insert(position, key)
+            display_text = f"{REPO_ICON} {repo.name}" if show_icons else repo.name
+            self.github_rows.insert(position, iid, display_text, ("Repository", "", repo.name))
+        if self.github_rows.exists("placeholder_loading_repos"): self.github_rows.move("placeholder_loading_repos", tk.END)
+        self.github_path_label_var.set(f"Repositories List (đang tải... {len(self.repo_list_names)})")
+
+    def _finish_repo_rows(self, generation, total, error, names=None):
+        """Kết thúc tải danh sách repo; names: tên các repo hiện có, dòng (từ cache) không còn trong đó bị gỡ."""
+        if generation != self.github_view_generation: return
+        if self.github_rows.exists("placeholder_loading_repos"): self.github_rows.delete("placeholder_loading_repos")
+        if names is not None:
+            for iid in self.github_rows.get_children():
+                if iid.startswith("repo_") and iid[len("repo_"):] not in names:
+                    self.github_rows.delete(iid)
+                    key = iid[len("repo_"):].lower()
+                    position = bisect.bisect_left(self.repo_list_names, key)
+                    if position < len(self.repo_list_names) and self.repo_list_names[position] == key: del self.repo_list_names[position]
+        self.github_path_label_var.set("Repositories List")
+        self.github_refreshing_var.set("")
+        if error:
+            if not self.repo_list_names: self.github_rows.insert(tk.END, "placeholder_load_repo_fail", "Lỗi tải repo. Xem Nhật ký.")
+            self.log_status(error, "ERROR"); return
+        if not total:
+            if not self.github_rows.exists("placeholder_no_repos"): self.github_rows.insert(tk.END, "placeholder_no_repos", "Không tìm thấy repository.")
+            self.log_status("Không có repository nào.", "INFO"); return
+        self.log_status(f"Hiển thị {total} repositories.", "SUCCESS")
+
+    def prefetch_github_item(self, item_id):
+        """Yêu cầu tải trước nội dung của dòng repo/thư mục (khi bật tùy chọn tải trước)."""
+        if self.prefetcher is None or not item_id or not self.github_rows.exists(item_id): return
+        item_type, data = self.parse_item_id(item_id)
+        if item_type == "repo": self.prefetcher.request(data['repo'], "")
+        elif item_type == "gh" and data['type'] == "dir" and self.current_github_context.get('repo'):
+            self.prefetcher.request(self.current_github_context['repo'], data['path'], data.get('sha'))
+
+    def on_github_tree_hover(self, event):
+        """Chuột dừng trên một dòng đủ PREFETCH_HOVER_DELAY_MS thì tải trước dòng đó."""
+        if self.prefetcher is None: return
+        item_id = self.github_tree.identify_row(event.y)
+        if item_id == self._prefetch_hover_iid: return
+        self._cancel_hover_prefetch()
+        self._prefetch_hover_iid = item_id
+        if item_id: self._prefetch_hover_job = self.root.after(PREFETCH_HOVER_DELAY_MS, lambda: self.prefetch_github_item(item_id))
+
+    def _cancel_hover_prefetch(self):
+        if self._prefetch_hover_job is not None:
+            try: self.root.after_cancel(self._prefetch_hover_job)
+            except tk.TclError: pass
+        self._prefetch_hover_job = None; self._prefetch_hover_iid = None
 
     def on_github_item_double_click(self, event):
         # ... (Giữ nguyên hàm này, nó dùng parse_item_id) ...
@@ -1499,7 +3375,7 @@ class GitHubManagerApp:
         elif item_type == "repo":
             self.populate_github_tree(repo_name=data['repo'], path="")
         elif item_type == "gh" and data['type'] == "dir":
-            self.populate_github_tree(repo_name=data['repo'], path=data['path'])
+            self.populate_github_tree(repo_name=data['repo'], path=data['path'], tree_sha=data.get('sha'))
         elif item_type == "gh" and data['type'] == "file":
              self.show_item_info()
              self.log_status(f"Xem thông tin file: {data['repo']}/{data['path']}", "INFO")
@@ -1519,7 +3395,7 @@ class GitHubManagerApp:
                 if len(parts) > 1 and parts[1] == "root": return "back", {'repo': 'root', 'path': ''}
                 elif len(parts) == 3:
                     try:
-                        values = self.github_tree.item(item_id, 'values')
+                        values = self.github_rows.item(item_id, 'values')
                         actual_parent_path = values[2] if len(values) > 2 else parts[2].replace('_', '|')
                         current_repo = self.current_github_context.get('repo', parts[1].replace('_', '|'))
                         return "back", {'repo': current_repo, 'path': actual_parent_path}
@@ -1528,9 +3404,9 @@ class GitHubManagerApp:
             elif prefix == "gh" and len(parts) == 5:
                 item_type, safe_repo_name, safe_path, safe_sha = parts[1], parts[2], parts[3], parts[4]
                 try:
-                    item_values = self.github_tree.item(item_id, 'values')
+                    item_values = self.github_rows.item(item_id, 'values')
                     actual_path = item_values[2] if len(item_values) > 2 else safe_path.replace('_', '|')
-                    display_text = self.github_tree.item(item_id, 'text'); name = display_text
+                    display_text = self.github_rows.item(item_id, 'text'); name = display_text
                     if self.settings.get("show_icons"):
                         for icon_prefix in (REPO_ICON + " ", FOLDER_ICON + " ", FILE_ICON + " "):
                             if display_text.startswith(icon_prefix): name = display_text[len(icon_prefix):]; break
@@ -1542,7 +3418,7 @@ class GitHubManagerApp:
 
     def get_selected_github_items_info(self):
         # ... (Giữ nguyên hàm này) ...
-        selected_ids = self.github_tree.selection()
+        selected_ids = self.github_rows.selection()
         items_info = []
         for item_id in selected_ids:
             item_type, data = self.parse_item_id(item_id)
@@ -1553,8 +3429,18 @@ class GitHubManagerApp:
         # ... (Giữ nguyên hàm này) ...
         repo = self.current_github_context.get('repo'); path = self.current_github_context.get('path', "")
         self.log_status(f"Làm mới chế độ xem GitHub: repo='{repo}', path='{path}'", "INFO")
-        self.github_tree.selection_set([])
-        self.populate_github_tree(repo, path)
+        if not self.github_handler or not self.github_handler.is_authenticated() or not hasattr(self, 'repo_list_names'):
+            self.populate_github_tree(repo, path, refresh=True); return
+        # Giữ nguyên các dòng đang hiển thị, kiểm tra lại ở nền rồi cập nhật tại chỗ
+        self.github_view_generation += 1
+        generation = self.github_view_generation
+        self.github_refreshing_var.set("⟳ Đang làm mới...")
+        if repo is None:
+            for iid in ("placeholder_no_repos", "placeholder_load_repo_fail"):
+                if self.github_rows.exists(iid): self.github_rows.delete(iid)
+            threading.Thread(target=self._load_repos_worker, args=(generation,), daemon=True).start()
+        else:
+            threading.Thread(target=self._load_contents_worker, args=(generation, repo, path, True), daemon=True).start()
 
     # --- Context Menus ---
     def show_local_context_menu(self, event):
@@ -1656,11 +3542,16 @@ class GitHubManagerApp:
                 context_menu.add_command(label=f"Xóa Repository {item_display_name}...", command=lambda i=item: self.delete_github_repo_prompt(i), foreground='red')
             elif item['type'] == 'file':
                  context_menu.add_command(label=f"Đổi tên File {item_display_name}", command=lambda i=item: self.rename_github_file_prompt(i))
+                 context_menu.add_command(label=f"Di chuyển File {item_display_name}...", command=lambda i=item: self.rename_github_file_prompt(i, move=True))
                  context_menu.add_command(label=f"Tải xuống {item_display_name}", command=self.download_selected_github_items)
                  context_menu.add_command(label=f"Xóa File {item_display_name}", command=self.delete_selected_github_items_prompt, foreground='red')
             elif item['type'] == 'dir':
                  context_menu.add_command(label=f"Tải xuống {item_display_name}", command=self.download_selected_github_items)
+                 context_menu.add_command(label=f"Đổi tên Thư mục {item_display_name}", command=lambda i=item: self.rename_github_file_prompt(i))
+                 context_menu.add_command(label=f"Di chuyển Thư mục {item_display_name}...", command=lambda i=item: self.rename_github_file_prompt(i, move=True))
                  context_menu.add_command(label=f"Xóa Thư mục {item_display_name}", command=self.delete_selected_github_items_prompt, foreground='red')
+            if item['type'] in ('repo', 'dir'):
+                 context_menu.add_command(label=f"Đồng bộ 2 chiều {item_display_name} với thư mục cục bộ...", command=lambda i=item: self.sync_github_item_prompt(i))
             context_menu.add_separator()
 
         elif num_selected > 1:
@@ -1682,6 +3573,8 @@ class GitHubManagerApp:
 
 
         # --- Actions chung ---
+        if self.settings.get("sync_pairs"):
+            context_menu.add_command(label=f"Đồng bộ lại tất cả ({len(self.settings['sync_pairs'])} cặp)", command=self.sync_all_pairs)
         context_menu.add_command(label="Làm mới", command=self.refresh_github_tree_current_view)
 
         # Show Menu
@@ -1882,10 +3775,7 @@ class GitHubManagerApp:
                 os.rename(old_path, new_path)
                 msg = f"Đã đổi tên '{old_name}' thành '{new_name}'."
                 self.log_status(msg, "SUCCESS"); self.update_status(msg)
-                self.populate_local_tree(directory) # Refresh
-                # Select new item
-                if self.local_tree.exists(new_path):
-                     self.local_tree.selection_set(new_path); self.local_tree.focus(new_path); self.local_tree.see(new_path)
+                self.populate_local_tree(directory, select=new_path) # Refresh và chọn mục mới
             except Exception as e:
                  msg = f"Lỗi khi đổi tên '{old_name}': {e}"
                  self.log_status(msg, "ERROR")
@@ -1911,10 +3801,7 @@ class GitHubManagerApp:
                 os.makedirs(new_folder_path)
                 msg = f"Đã tạo thư mục '{folder_name}'."
                 self.log_status(msg, "SUCCESS"); self.update_status(msg)
-                self.populate_local_tree(target_directory) # Refresh
-                # Select new folder
-                if self.local_tree.exists(new_folder_path):
-                     self.local_tree.selection_set(new_folder_path); self.local_tree.focus(new_folder_path); self.local_tree.see(new_folder_path)
+                self.populate_local_tree(target_directory, select=new_folder_path) # Refresh và chọn thư mục mới
             except Exception as e:
                  msg = f"Lỗi khi tạo thư mục '{folder_name}': {e}"
                  self.log_status(msg, "ERROR")
@@ -1942,7 +3829,7 @@ class GitHubManagerApp:
         if dirs:
             confirm_msg += "\n\nTHƯ MỤC:\n" + "\n".join([f" - '{item['name']}'" for item in dirs[:5]])
             if len(dirs) > 5: confirm_msg += "\n - ..."
-            confirm_msg += "\n(Lưu ý: Chỉ xóa được thư mục rỗng qua API này)"
+            confirm_msg += "\n(Toàn bộ nội dung bên trong thư mục cũng sẽ bị xóa)"
         
         confirm_msg += "\n\nHành động này KHÔNG THỂ hoàn tác!"
 
@@ -1979,27 +3866,34 @@ class GitHubManagerApp:
         self.log_status(f"Yêu cầu đổi tên repository '{old_name}' thành '{new_name}'...", "INFO")
         self.start_rename_repo_thread(old_name, new_name)
 
-    def rename_github_file_prompt(self, file_info):
-        old_name = file_info['name']; repo_name = file_info['repo']; old_path = file_info['path']
+    def rename_github_file_prompt(self, file_info, move=False):
+        """Đổi tên (move=False, chỉ tên trong cùng thư mục) hoặc di chuyển (move=True, nhập đường dẫn đầy đủ) file/thư mục GitHub."""
+        old_name = file_info['name']; repo_name = file_info['repo']; old_path = file_info['path']; item_type = file_info.get('type', 'file')
+        kind = "thư mục" if item_type == 'dir' else "file"
         directory = os.path.dirname(old_path).replace("\\", "/")
-        prompt_msg = f"Nhập tên file mới cho '{old_name}':\n(Không chứa ký tự '/')"
-        new_name_raw = simpledialog.askstring("Đổi tên File", prompt_msg, initialvalue=old_name, parent=self.root)
-        if not new_name_raw: self.log_status(f"Hủy đổi tên file '{old_path}'.", "INFO"); return
-        new_name = new_name_raw.strip()
-        if not new_name or "/" in new_name:
-             messagebox.showerror("Tên không hợp lệ", "Tên file không được trống hoặc chứa '/'.", parent=self.root)
-             self.log_status(f"Đổi tên file '{old_path}' thất bại: Tên mới '{new_name}' không hợp lệ.", "ERROR"); return
-        if new_name == old_name: self.log_status(f"Tên file '{old_path}' không đổi.", "INFO"); return
-        new_path = f"{directory}/{new_name}" if directory else new_name
+        if move:
+            prompt_msg = f"Nhập đường dẫn mới (tính từ gốc repo) cho {kind} '{old_path}':"
+            new_value_raw = simpledialog.askstring("Di chuyển", prompt_msg, initialvalue=old_path, parent=self.root)
+        else:
+            prompt_msg = f"Nhập tên {kind} mới cho '{old_name}':\n(Không chứa ký tự '/')"
+            new_value_raw = simpledialog.askstring(f"Đổi tên {kind.capitalize()}", prompt_msg, initialvalue=old_name, parent=self.root)
+        if not new_value_raw: self.log_status(f"Hủy đổi tên '{old_path}'.", "INFO"); return
+        new_value = new_value_raw.strip().strip('/')
+        if not new_value or (not move and "/" in new_value) or any(part in ("", ".", "..") for part in new_value.split('/')):
+             messagebox.showerror("Tên không hợp lệ", "Tên không được trống, chứa '/' thừa hoặc '.'/'..'.", parent=self.root)
+             self.log_status(f"Đổi tên '{old_path}' thất bại: '{new_value}' không hợp lệ.", "ERROR"); return
+        new_path = new_value if move else (f"{directory}/{new_value}" if directory else new_value)
+        if new_path == old_path: self.log_status(f"Đường dẫn '{old_path}' không đổi.", "INFO"); return
         path_exists = False
-        for iid in self.github_tree.get_children(""):
+        for iid in self.github_rows.get_children():
              itype, idata = self.parse_item_id(iid)
              if itype=='gh' and idata['path'].lower() == new_path.lower(): path_exists = True; break
         if path_exists:
-             messagebox.showerror("Tên đã tồn tại", f"Tên '{new_name}' đã tồn tại trên GitHub.", parent=self.root)
-             self.log_status(f"Đổi tên file '{old_path}' thất bại: Tên mới '{new_path}' đã tồn tại.", "ERROR"); return
-        self.log_status(f"Yêu cầu đổi tên file '{old_path}' thành '{new_path}'...", "INFO")
-        self.start_rename_file_thread(repo_name, old_path, new_path, file_info['sha'])
+             messagebox.showerror("Tên đã tồn tại", f"'{new_path}' đã tồn tại trên GitHub.", parent=self.root)
+             self.log_status(f"Đổi tên '{old_path}' thất bại: '{new_path}' đã tồn tại.", "ERROR"); return
+        self.log_status(f"Yêu cầu đổi tên '{old_path}' thành '{new_path}'...", "INFO")
+        size = getattr(self.github_view_entries.get(old_path), 'size', None) # Đọc trên thread GUI, worker chỉ nhận giá trị
+        self.start_rename_file_thread(repo_name, old_path, new_path, file_info['sha'], item_type, size)
 
     def show_item_info(self):
          selected = self.get_selected_github_items_info()
@@ -2025,7 +3919,7 @@ class GitHubManagerApp:
                  info_details += f"Clone (HTTPS): {repo_obj.clone_url}\nClone (SSH): {repo_obj.ssh_url}\n"
                  info_details += f"Cập nhật lần cuối: {repo_obj.updated_at}\nNgày tạo: {repo_obj.created_at}\n"
              elif item_type in ['file', 'dir']:
-                 item_obj, error = self.github_handler.get_item_info(repo_name, path)
+                 item_obj, error = self.github_handler.get_item_info(repo_name, path, tree_sha=item_info.get('sha') if item_type == 'dir' else None)
                  if error: raise Exception(error);
                  if not item_obj: raise Exception("Không tìm thấy item.")
                  is_actually_dir = isinstance(item_obj, list); single_file_obj = item_obj if not is_actually_dir else None; dir_contents = item_obj if is_actually_dir else None
@@ -2047,7 +3941,7 @@ class GitHubManagerApp:
                       info_details += f"Số dòng (ước tính): {lines}\n"
                  elif item_type == 'dir':
                       if dir_contents is None:
-                          repo_handle = self.github_handler.user.get_repo(repo_name); dir_contents = repo_handle.get_contents(path)
+                          dir_contents = self.github_handler.list_dir(repo_name, path)
                       info_details += f"SHA (thư mục): {item_info.get('sha', 'N/A')}\nURL GitHub: {item_obj.html_url if hasattr(item_obj,'html_url') else 'N/A'}\n"
                       file_count = 0; dir_count = 0; total_size = 0; content_list_str = ""; limit = 20
                       if dir_contents:
@@ -2143,9 +4037,111 @@ class GitHubManagerApp:
         base_display = f"{repo_name}/{github_path}".strip('/') if github_path else repo_name
         update_queue.put((task_id, f"Bắt đầu upload {len(local_paths)} item(s) tới '{base_display}'...", 0, False, None)); thread.start()
 
+    def _collect_upload_files(self, local_paths_initial, github_path_base):
+        """Duyệt các đường dẫn cục bộ (file/thư mục) -> (files, skipped, errors).
+        files là list (local_path, target_path, relative_display_path), ánh xạ giống _upload_worker."""
+        files = []; skipped = []; errors = []
+        common_base = os.path.commonpath(local_paths_initial) if len(local_paths_initial)>1 else os.path.dirname(local_paths_initial[0])
+        if os.path.isfile(common_base): common_base = os.path.dirname(common_base)
+        def add_file(local_path, gh_dir):
+            rel_display = os.path.relpath(local_path, common_base).replace("\\", "/")
+            if os.path.isfile(local_path):
+                target = f"{gh_dir}/{os.path.basename(local_path)}".strip('/')
+                files.append((local_path, target, rel_display))
+            else: skipped.append(rel_display)
+        for local_path in local_paths_initial:
+            gh_dir = github_path_base
+            if os.path.dirname(local_path) != common_base:
+                rel_dir = os.path.relpath(os.path.dirname(local_path), common_base).replace("\\", "/"); gh_dir = f"{github_path_base}/{rel_dir}".strip("/")
+            if os.path.isdir(local_path):
+                gh_root = f"{gh_dir}/{os.path.basename(local_path)}".strip('/')
+                for dirpath, dirnames, filenames in os.walk(local_path, onerror=lambda e: errors.append(f"Dir read error '{e.filename}': {e}")):
+                    rel_dir = os.path.relpath(dirpath, local_path).replace("\\", "/")
+                    sub_gh_dir = gh_root if rel_dir == "." else f"{gh_root}/{rel_dir}"
+                    for filename in sorted(filenames): add_file(os.path.join(dirpath, filename), sub_gh_dir)
+            else: add_file(local_path, gh_dir)
+        return files, skipped, errors
+
+    def _upload_worker_single_commit(self, task_id, repo_name, github_path_base, local_paths_initial, overwrite=True):
+        """Upload toàn bộ task trong một commit. Trả về False nếu cần quay về chế độ upload từng file (repo rỗng)."""
+        update_queue.put((task_id, "Quét các file cần upload...", 0, False, None))
+        files, skipped, errors = self._collect_upload_files(local_paths_initial, github_path_base)
+        max_workers = max(1, int(self.settings.get("upload_workers", DEFAULT_SETTINGS["upload_workers"])))
+        for rel_display in skipped: update_queue.put((task_id, f"Bỏ qua (loại không hỗ trợ): {rel_display}", 0, False, None))
+        modes = {}
+        if files and not overwrite:
+            update_queue.put((task_id, f"Kiểm tra {len(files)} file đã tồn tại trên GitHub...", 0, False, None))
+            try: existing = self.github_handler.find_existing_paths(repo_name, [target for _, target, _ in files], max_workers=max_workers)
+            except GithubException as e:
+                update_queue.put((task_id, f"LỖI kiểm tra file tồn tại: {e.status}", 100, True, None)); return True
+            for _, target, rel_display in files:
+                if target in existing: skipped.append(rel_display); update_queue.put((task_id, f"Bỏ qua (trùng): {rel_display}", 0, False, None))
+            files = [f for f in files if f[1] not in existing]
+        elif files:
+            # Delta upload: bỏ qua file có SHA blob trùng với file trên GitHub
+            update_queue.put((task_id, f"So sánh {len(files)} file với GitHub...", 0, False, None))
+            try: changed, unchanged, remote = self.github_handler.filter_unchanged_files(repo_name, [(local_path, target) for local_path, target, _ in files], max_workers=max_workers)
+            except GithubException as e:
+                update_queue.put((task_id, f"LỖI so sánh file với GitHub: {e.status}", 100, True, None)); return True
+            for _, target, rel_display in files:
+                if target in unchanged: skipped.append(rel_display); update_queue.put((task_id, f"Bỏ qua (không đổi): {rel_display}", 0, False, None))
+            files = [f for f in files if f[1] not in unchanged]
+            modes = {target: entry.mode for target, entry in remote.items() if entry.mode in ("100644", "100755")}
+        for err in errors: update_queue.put((task_id, f"LỖI {err}", 0, False, None))
+        if not files:
+            final_message = "Hoàn thành upload. Không có file nào để upload."
+            if skipped: final_message += f" {len(skipped)} bỏ qua."
+            if errors: final_message += f" Có {len(errors)} lỗi."
+            update_queue.put((task_id, final_message, 100, True, None)); return True
+
+        display_by_target = {target: rel_display for _, target, rel_display in files}
+        size_by_target = {}
+        for local_path, target, _ in files:
+            try: size_by_target[target] = os.path.getsize(local_path)
+            except OSError: pass
+        def on_progress(done, total, target_path):
+            update_queue.put((task_id, f"Đã tạo blob ({done}/{total}): {display_by_target.get(target_path, target_path)}", int(done / total * 90), False,
+                              {'pending_requests': total - done + 4})) # + ref, commit, tree, commit mới, ref
+
+        commit_message = f"Upload {files[0][2]}" if len(files) == 1 else f"Upload {len(files)} files via app"
+        success, message, results = self.github_handler.commit_files(
+            repo_name, [(local_path, target) for local_path, target, _ in files], commit_message=commit_message, progress_callback=on_progress, max_workers=max_workers, modes=modes)
+        if not success and message == "empty_repo": return False
+
+        for result in results:
+            if result['error']: errors.append(f"Upload error '{display_by_target.get(result['path'], result['path'])}': {result['error']}")
+        success_count = sum(1 for r in results if not r['error']) if success else 0
+        if success: final_message = f"Hoàn thành upload. {success_count} thành công. {message}"
+        else: final_message = f"LỖI upload: {message}"
+        if skipped: final_message += f" {len(skipped)} bỏ qua."
+        if errors: final_message += f" Có {len(errors)} lỗi."; print(f"--- Task {task_id} Upload Errors ---\n" + "\n".join(errors) + "\n------------------------------")
+        refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': github_path_base, 'action': 'upload'}
+        if success: refresh_data['changes'] = [('put', r['path'], 'file', r['sha'], size_by_target.get(r['path'])) for r in results if not r['error']]
+        update_queue.put((task_id, final_message, 100, True, refresh_data))
+        return True
+
+    @staticmethod
+    def _file_progress_reporter(task_id, local_path, display_path, base, total_items):
+        """progress_callback cho upload_file: file lớn báo tiến độ theo byte (mỗi 10%) trong phần của file đó
+        trên thanh tiến độ chung; file nhỏ trả về None (upload trong một request)."""
+        try:
+            if os.path.getsize(local_path) < LARGE_FILE_THRESHOLD: return None
+        except OSError: return None
+        last_step = [-1]
+        def report(percent):
+            if percent // 10 == last_step[0]: return
+            last_step[0] = percent // 10
+            overall = base + int(percent / 100 * 95 / max(1, total_items))
+            update_queue.put((task_id, f"Đang upload: {display_path} ({percent}%)", overall, False, None))
+        return report
+
     def _upload_worker(self, task_id, repo_name, github_path_base, local_paths_initial, overwrite):
-        # ... (Giữ nguyên) ...
+        # Chế độ mặc định: một commit cho cả task (Git Data API), blob được tạo song song.
+        if self.settings.get("upload_single_commit", True):
+            if self._upload_worker_single_commit(task_id, repo_name, github_path_base, local_paths_initial, overwrite): return
+            update_queue.put((task_id, "Repository rỗng, chuyển sang upload từng file...", 0, False, None))
         total_items_estimated = 0; processed_count = 0; success_count = 0; errors = []; skipped_count = 0; upload_queue = queue.Queue()
+        changes = [] # Kết quả để cập nhật view tại chỗ; None nếu không xác định được (tải lại cả view)
         common_base = os.path.commonpath(local_paths_initial) if len(local_paths_initial)>1 else os.path.dirname(local_paths_initial[0])
         if os.path.isfile(common_base): common_base = os.path.dirname(common_base)
         for local_path in local_paths_initial:
@@ -2164,12 +4160,19 @@ class GitHubManagerApp:
             msg = "" # Define msg before try/except block
             if os.path.isfile(local_item_path):
                 update_queue.put((task_id, f"Đang upload: {relative_display_path}", current_progress, False, None))
-                success, message = self.github_handler.upload_file(repo_name, local_item_path, current_gh_target_dir, commit_message=f"Upload {relative_display_path}", overwrite=overwrite )
+                on_file_progress = self._file_progress_reporter(task_id, local_item_path, relative_display_path, current_progress, total_items_estimated)
+                success, message = self.github_handler.upload_file(repo_name, local_item_path, current_gh_target_dir, commit_message=f"Upload {relative_display_path}", progress_callback=on_file_progress, overwrite=overwrite )
                 processed_count += 1
-                if success: success_count += 1; msg = f"OK: {relative_display_path}"
+                if success:
+                    success_count += 1; msg = f"OK: {relative_display_path}"
+                    if changes is not None: # SHA blob của nội dung vừa upload (đã có trong cache nếu vừa so sánh)
+                        target_path = f"{current_gh_target_dir}/{item_name}".strip('/')
+                        try: changes.append(('put', target_path, 'file', self.github_handler.local_blob_sha(local_item_path), os.path.getsize(local_item_path)))
+                        except OSError: changes = None
                 elif message == "exists": skipped_count += 1; msg = f"Bỏ qua (trùng): {relative_display_path}"
+                elif message == "unchanged": skipped_count += 1; msg = f"Bỏ qua (không đổi): {relative_display_path}"
                 else: errors.append(f"Upload error '{relative_display_path}': {message}"); msg = f"LỖI upload {relative_display_path}: {message}"
-                update_queue.put((task_id, msg, int((processed_count / total_items_estimated) * 95), False, None))
+                update_queue.put((task_id, msg, int((processed_count / total_items_estimated) * 95), False, {'pending_requests': 2 * max(0, total_items_estimated - processed_count)}))
             elif os.path.isdir(local_item_path):
                 processed_count += 1
                 new_gh_dir_for_contents = f"{current_gh_target_dir}/{item_name}".strip('/')
@@ -2190,7 +4193,7 @@ class GitHubManagerApp:
         final_message = f"Hoàn thành upload. {success_count} thành công."
         if skipped_count > 0: final_message += f" {skipped_count} bỏ qua."
         if errors: final_message += f" Có {len(errors)} lỗi."; print(f"--- Task {task_id} Upload Errors ---\n" + "\n".join(errors) + "\n------------------------------")
-        refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': github_path_base, 'action': 'upload'}
+        refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': github_path_base, 'action': 'upload', 'changes': changes}
         update_queue.put((task_id, final_message, 100, True, refresh_data))
 
     # --- START: New Batch Delete GitHub Items Threading ---
@@ -2234,51 +4237,46 @@ class GitHubManagerApp:
         thread.start()
 
     def _batch_delete_github_items_worker(self, task_id, items_to_delete, refresh_repo_context, refresh_path_context):
+        """Xóa các mục đã chọn: mỗi repo một commit (tree mới không chứa các mục này, kể cả cây con)."""
         if not self.github_handler or not self.github_handler.is_authenticated():
             update_queue.put((task_id, "Lỗi: Worker không thể xóa vì chưa xác thực GitHub.", 100, True, None))
             return
 
-        num_total_items = len(items_to_delete)
         num_successful = 0
         num_failed = 0
         error_messages = []
+        changes = []
 
-        for i, item_info in enumerate(items_to_delete):
+        items_by_repo = {}
+        for item_info in items_to_delete:
             item_name = item_info.get('name', 'Unknown item')
-            repo_name_op = item_info.get('repo') # Repo of the item being operated on
-            item_path = item_info.get('path')
-            item_sha = item_info.get('sha')
-
-            current_progress = int(((i + 1) / num_total_items) * 95) if num_total_items > 0 else 0
-
-            if not all([repo_name_op, item_path, item_sha]):
-                msg = f"LỖI: Thiếu thông tin để xóa item '{item_name}' (repo, path, hoặc sha)."
-                update_queue.put((task_id, msg, current_progress, False, None))
+            if not item_info.get('repo') or not item_info.get('path'):
+                msg = f"LỖI: Thiếu thông tin để xóa item '{item_name}' (repo hoặc path)."
+                update_queue.put((task_id, msg, 0, False, None))
                 num_failed += 1
                 error_messages.append(msg)
                 continue
+            items_by_repo.setdefault(item_info['repo'], []).append(item_info)
 
+        for i, (repo_name_op, repo_items) in enumerate(items_by_repo.items()):
+            current_progress = int((i / len(items_by_repo)) * 95)
             update_queue.put((
                 task_id,
-                f"Đang xóa ({i+1}/{num_total_items}): {item_name} từ {repo_name_op}...",
+                f"Đang xóa {len(repo_items)} mục từ {repo_name_op} (1 commit)...",
                 current_progress,
                 False,
-                None 
+                {'pending_requests': 5 * (len(items_by_repo) - i)} # ref, commit, tree, commit mới, ref
             ))
-
-            success, result_message = self.github_handler.delete_item(repo_name_op, item_path, item_sha)
-
+            success, result_message = self.github_handler.delete_paths(repo_name_op, [(item['path'], item['type']) for item in repo_items])
             if success:
-                num_successful += 1
-                # Don't include full result_message if it's too long or generic
-                brief_success_msg = f"Đã xóa: {item_name}." 
-                update_queue.put((task_id, brief_success_msg , current_progress, False, None))
+                num_successful += len(repo_items)
+                changes.extend(('remove', item['path'], item['type'], None, None) for item in repo_items if repo_name_op == refresh_repo_context)
+                names = ", ".join(item['name'] for item in repo_items[:3]) + ("..." if len(repo_items) > 3 else "")
+                update_queue.put((task_id, f"Đã xóa: {names}. {result_message}", current_progress, False, None))
             else:
-                num_failed += 1
-                error_messages.append(f"Lỗi xóa '{item_name}': {result_message}")
-                update_queue.put((task_id, f"LỖI xóa {item_name}: {result_message}", current_progress, False, None))
-            
-            # time.sleep(0.1) # Optional delay
+                num_failed += len(repo_items)
+                error_messages.append(f"Lỗi xóa trong '{repo_name_op}': {result_message}")
+                update_queue.put((task_id, f"LỖI xóa trong {repo_name_op}: {result_message}", current_progress, False, None))
 
         final_message = f"Hoàn thành batch xóa: {num_successful} thành công"
         if num_failed > 0:
@@ -2293,7 +4291,8 @@ class GitHubManagerApp:
             'refresh_view': 'github',
             'repo': refresh_repo_context, 
             'path': refresh_path_context, 
-            'action': 'delete' # Use 'delete' so existing refresh logic in process_queue handles it
+            'action': 'delete', # Use 'delete' so existing refresh logic in process_queue handles it
+            'changes': changes
         }
         update_queue.put((task_id, final_message, 100, True, refresh_data))
     # --- END: New Batch Delete GitHub Items Threading ---
@@ -2343,48 +4342,23 @@ class GitHubManagerApp:
          refresh_data = {'refresh_view': 'github', 'repo': None, 'path': None, 'action': 'rename_repo'} if success else None
          update_queue.put((task_id, result_message, 100, True, refresh_data))
 
-    def start_rename_file_thread(self, repo_name, old_path, new_path, sha):
-         # ... (Giữ nguyên) ...
+    def start_rename_file_thread(self, repo_name, old_path, new_path, sha, item_type='file', size=None):
          if not self.github_handler or not self.github_handler.is_authenticated(): return
-         self.task_id_counter += 1; task_id = self.task_id_counter; thread = threading.Thread(target=self._rename_file_worker, args=(task_id, repo_name, old_path, new_path, sha), daemon=True)
+         self.task_id_counter += 1; task_id = self.task_id_counter; thread = threading.Thread(target=self._rename_file_worker, args=(task_id, repo_name, old_path, new_path, sha, item_type, size), daemon=True)
          self.upload_tasks[task_id] = {'thread': thread, 'status': 'Bắt đầu...', 'progress': 0, 'type': 'rename_file', 'repo': repo_name, 'path': os.path.dirname(old_path)}
-         update_queue.put((task_id, f"Bắt đầu đổi tên file '{os.path.basename(old_path)}' thành '{os.path.basename(new_path)}'...", 0, False, None)); thread.start()
-
-    def _rename_file_worker(self, task_id, repo_name, old_path, new_path, sha):
-        # ... (Giữ nguyên hàm này đã sửa lỗi) ...
-        update_queue.put((task_id, f"Đang lấy nội dung file cũ: {os.path.basename(old_path)}...", 25, False, None)); content_bytes = None; msg=""
-        try:
-            repo = self.github_handler.user.get_repo(repo_name); old_file_content = repo.get_contents(old_path); content_bytes = old_file_content.decoded_content
-            if content_bytes is None:
-                 if old_file_content.encoding == "base64" and isinstance(old_file_content.content, str): import base64; content_bytes = base64.b64decode(old_file_content.content)
-                 else: content_bytes = b''; update_queue.put((task_id, f"File cũ '{os.path.basename(old_path)}' rỗng.", 30, False, None))
-        except Exception as e: msg = f"LỖI lấy nội dung file cũ '{os.path.basename(old_path)}': {e}"; update_queue.put((task_id, msg, 100, True, None)); return
-        if content_bytes is None: msg = f"LỖI: Không thể lấy nội dung file cũ '{os.path.basename(old_path)}'."; update_queue.put((task_id, msg, 100, True, None)); return
-
-        update_queue.put((task_id, f"Đang tạo file mới: {os.path.basename(new_path)}...", 50, False, None)); commit_message_create = f"Rename: Create {os.path.basename(new_path)}"; new_file_info = None
-        try:
-            new_file_info = repo.create_file(new_path, commit_message_create, content_bytes)
-            if not new_file_info or 'content' not in new_file_info: raise GithubException(status=500, data={'message': 'API create_file không trả về thông tin file mới hợp lệ.'})
-            update_queue.put((task_id, f"Đã tạo file mới: {os.path.basename(new_path)}", 75, False, None))
-        except GithubException as e:
-            msg = f"LỖI tạo file mới '{os.path.basename(new_path)}': {e.status} - {e.data.get('message', '')}" + (" (Tên đã tồn tại?)" if e.status == 422 else "")
-            update_queue.put((task_id, msg, 100, True, None)); return
-        except Exception as e: msg = f"LỖI không xác định khi tạo file mới '{os.path.basename(new_path)}': {e}"; update_queue.put((task_id, msg, 100, True, None)); return
-
-        update_queue.put((task_id, f"Đang xóa file cũ: {os.path.basename(old_path)}...", 85, False, None)); commit_message_delete = f"Rename: Delete {os.path.basename(old_path)}"
-        try:
-            repo.delete_file(old_path, commit_message_delete, sha); update_queue.put((task_id, f"Đã xóa file cũ: {os.path.basename(old_path)}", 95, False, None))
-        except GithubException as e:
-            msg = f"LỖI NGHIÊM TRỌNG: Tạo file mới OK nhưng KHÔNG THỂ xóa file cũ '{os.path.basename(old_path)}': {e.status} - {e.data.get('message', '')}. Cần kiểm tra thủ công!"
-            refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': os.path.dirname(old_path), 'action': 'rename_file_error'}
-            update_queue.put((task_id, msg, 100, True, refresh_data)); return
-        except Exception as e:
-            msg = f"LỖI NGHIÊM TRỌNG: Tạo file mới OK nhưng lỗi không xác định khi xóa file cũ '{os.path.basename(old_path)}': {e}. Cần kiểm tra thủ công!"
-            refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': os.path.dirname(old_path), 'action': 'rename_file_error'}
-            update_queue.put((task_id, msg, 100, True, refresh_data)); return
-
-        final_message = f"Đổi tên thành công: '{os.path.basename(old_path)}' -> '{os.path.basename(new_path)}'"
-        refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': os.path.dirname(old_path), 'action': 'rename_file'}
+         update_queue.put((task_id, f"Bắt đầu đổi tên/di chuyển '{old_path}' thành '{new_path}'...", 0, False, None)); thread.start()
+
+    def _rename_file_worker(self, task_id, repo_name, old_path, new_path, sha, item_type='file', size=None):
+        """Đổi tên/di chuyển bằng cách ghi lại mục tree trỏ tới SHA sẵn có: một commit, không tải nội dung.
+        size: kích thước mục (lấy từ view lúc yêu cầu) để cập nhật dòng tại chỗ."""
+        update_queue.put((task_id, f"Đang đổi tên: {old_path} -> {new_path}...", 50, False, {'pending_requests': 6}))
+        success, result_message = self.github_handler.move_paths(repo_name, [(old_path, new_path, item_type, sha)], f"Rename {old_path} -> {new_path}")
+        if success: final_message = f"Đổi tên thành công: '{old_path}' -> '{new_path}'. {result_message}"
+        else: final_message = f"LỖI đổi tên '{old_path}': {result_message}"
+        refresh_data = None
+        if success:
+            refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': os.path.dirname(old_path), 'action': 'rename_file',
+                            'changes': [('remove', old_path, item_type, None, None), ('put', new_path, item_type, sha, size)]}
         update_queue.put((task_id, final_message, 100, True, refresh_data))
 
     def start_download_thread(self, target_directory, items_to_download, overwrite_all):
@@ -2395,65 +4369,371 @@ class GitHubManagerApp:
         update_queue.put((task_id, f"Bắt đầu tải xuống {len(items_to_download)} item(s) vào '{os.path.basename(target_directory)}'...", 0, False, None)); thread.start()
 
     def _download_worker(self, task_id, target_directory_base, items_to_download_initial, overwrite_all):
-        # ... (Giữ nguyên) ...
-        total_items_estimated = 0; processed_count = 0; success_count = 0; errors = []; skipped_overwrite = 0
-        try: gh = self.github_handler.g; user = self.github_handler.user
-        except Exception as e: update_queue.put((task_id, f"Lỗi nghiêm trọng: {e}", 0, True, None)); return
-        download_queue = queue.Queue()
+        """Tải xuống theo pipeline 3 giai đoạn:
+        (1) liệt kê thư mục (chỉ mục cây, hoặc song song qua contents API),
+        (2) tải nội dung blob song song bằng pool 'download_workers' thread,
+        (3) ghi đĩa trên một thread riêng. Số byte đã tải nhưng chưa ghi bị giới hạn bởi ByteBudget."""
+        handler = self.github_handler
+        max_workers = max(1, int(self.settings.get("download_workers", DEFAULT_SETTINGS["download_workers"])))
+        errors = []; skipped_overwrite = 0; dir_count = 0; unchanged_count = 0
+        file_jobs = [] # dict: repo, path, sha, size, local_path, rel
+        pending_dirs = [] # (repo_name, github_path, local_dir, rel, tree_sha)
+        prune_roots = [] # Thư mục cục bộ được ghi đè tại chỗ: xóa các mục không còn trên GitHub sau khi tải
+        expected_paths = set() # Mọi file/thư mục cục bộ tương ứng với nội dung GitHub
+
+        def is_unchanged(local_path, sha):
+            """File cục bộ đã có đúng nội dung blob (so SHA blob, có cache) -> không cần tải lại."""
+            if not sha or not os.path.isfile(local_path): return False
+            try: return handler.local_blob_sha(local_path) == sha
+            except OSError: return False
+
+        def rel_of(local_path): return os.path.relpath(local_path, target_directory_base).replace("\\", "/")
+
+        # --- Giai đoạn 1a: các mục được chọn (xử lý trùng tên như trước) ---
         for item_info in items_to_download_initial:
-             download_queue.put((item_info, target_directory_base)); total_items_estimated += 1
-        while not download_queue.empty():
-            item_info, current_local_target_dir = download_queue.get()
             item_name = item_info['name']; item_type = item_info['type']; repo_name = item_info['repo']; github_path = item_info['path']
-            local_target_path = os.path.join(current_local_target_dir, item_name); relative_display_path = os.path.relpath(local_target_path, target_directory_base).replace("\\", "/")
-            current_progress = int((processed_count / total_items_estimated) * 95) if total_items_estimated > 0 else 0
-            update_queue.put((task_id, f"Xử lý: {relative_display_path}", current_progress, False, None))
+            local_target_path = os.path.join(target_directory_base, item_name); relative_display_path = rel_of(local_target_path)
             if os.path.exists(local_target_path):
                 if not overwrite_all:
-                    skipped_overwrite += 1; processed_count += 1; update_queue.put((task_id, f"Bỏ qua (trùng): {relative_display_path}", current_progress, False, None)); download_queue.task_done(); continue
+                    skipped_overwrite += 1; update_queue.put((task_id, f"Bỏ qua (trùng): {relative_display_path}", 0, False, None)); continue
+                if item_type == 'file' and is_unchanged(local_target_path, item_info.get('sha')):
+                    unchanged_count += 1; update_queue.put((task_id, f"Bỏ qua (không đổi): {relative_display_path}", 0, False, None)); continue
+                if item_type == 'dir' and os.path.isdir(local_target_path) and not os.path.islink(local_target_path):
+                    prune_roots.append(local_target_path) # Ghi đè tại chỗ để giữ lại các file không đổi
                 else:
-                    update_queue.put((task_id, f"Xóa file cũ: {relative_display_path}", current_progress, False, None))
+                    update_queue.put((task_id, f"Xóa file cũ: {relative_display_path}", 0, False, None))
                     try:
                          if os.path.isfile(local_target_path) or os.path.islink(local_target_path): os.remove(local_target_path)
                          elif os.path.isdir(local_target_path): shutil.rmtree(local_target_path)
                     except Exception as e:
-                         processed_count += 1; errors.append(f"Lỗi xóa file cũ '{relative_display_path}': {e}"); update_queue.put((task_id, f"LỖI xóa file cũ: {relative_display_path}: {e}", current_progress, False, None)); download_queue.task_done(); continue
-            try:
-                repo = user.get_repo(repo_name)
-                if item_type == 'file':
-                    processed_count += 1; update_queue.put((task_id, f"Đang tải file: {relative_display_path}...", current_progress, False, None)); os.makedirs(os.path.dirname(local_target_path), exist_ok=True)
-                    file_content = repo.get_contents(github_path); decoded = file_content.decoded_content
-                    if decoded is None:
-                         if file_content.encoding == "base64" and isinstance(file_content.content, str): import base64; decoded = base64.b64decode(file_content.content)
-                         else: decoded = b'' # Assume empty if cannot decode
-                    with open(local_target_path, "wb") as f: f.write(decoded)
-                    success_count += 1; update_queue.put((task_id, f"OK: {relative_display_path}", current_progress, False, None))
-                elif item_type == 'dir':
-                    processed_count += 1; update_queue.put((task_id, f"Quét thư mục GH: {relative_display_path}...", current_progress, False, None)); os.makedirs(local_target_path, exist_ok=True)
-                    contents = repo.get_contents(github_path)
-                    if contents:
-                         update_queue.put((task_id, f"Thêm {len(contents)} mục con từ: {relative_display_path}", current_progress, False, None))
-                         if total_items_estimated <= processed_count: total_items_estimated = processed_count + len(contents)
-                         else: total_items_estimated += len(contents) -1 # Only count new items beyond the current dir itself
-                         for content_item in contents:
-                              sub_item_info = {'repo': repo_name, 'path': content_item.path, 'type': content_item.type, 'name': content_item.name, 'sha': content_item.sha}
-                              download_queue.put((sub_item_info, local_target_path))
-                         success_count += 1 # Count directory itself as processed
-                    else: success_count += 1; update_queue.put((task_id, f"OK (Thư mục rỗng): {relative_display_path}", current_progress, False, None))
-            except RateLimitExceededException: processed_count += 1; errors.append(f"Rate limit tải '{relative_display_path}'"); update_queue.put((task_id, f"LỖI Rate Limit: {relative_display_path}", current_progress, False, None))
-            except GithubException as e: processed_count += 1; errors.append(f"Lỗi GitHub tải '{relative_display_path}': {e.status}"); update_queue.put((task_id, f"LỖI GitHub {e.status}: {relative_display_path}", current_progress, False, None))
-            except Exception as e: processed_count += 1; errors.append(f"Lỗi tải xuống '{relative_display_path}': {e}"); update_queue.put((task_id, f"LỖI tải: {relative_display_path}: {e}", current_progress, False, None))
-            download_queue.task_done()
+                         errors.append(f"Lỗi xóa file cũ '{relative_display_path}': {e}"); update_queue.put((task_id, f"LỖI xóa file cũ: {relative_display_path}: {e}", 0, False, None)); continue
+            if item_type == 'file':
+                size = item_info.get('size')
+                if not size: # Mục chọn từ cây không mang kích thước: tra chỉ mục (0 request) để biết có cần stream
+                    try:
+                        index = handler.get_tree_index(repo_name)
+                        entry = index.get(github_path) if index is not None else None
+                        size = entry.size if entry is not None else 0
+                    except GithubException: size = 0
+                file_jobs.append({'repo': repo_name, 'path': github_path, 'sha': item_info.get('sha'), 'size': size or 0, 'local_path': local_target_path, 'rel': relative_display_path})
+            elif item_type == 'dir':
+                pending_dirs.append((repo_name, github_path, local_target_path, relative_display_path, item_info.get('sha')))
+
+        # --- Giai đoạn 1b: mở rộng thư mục (song song; 0 request nếu có chỉ mục cây) ---
+        errors_before_listing = len(errors)
+        for repo_name in {d[0] for d in pending_dirs}:
+            try: handler.get_tree_index(repo_name) # Dựng chỉ mục một lần trước khi các thread dùng chung
+            except GithubException: pass
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as list_pool:
+            futures = {}
+            def submit_dir(repo_name, github_path, local_dir, rel, tree_sha=None):
+                try: os.makedirs(local_dir, exist_ok=True)
+                except OSError as e: errors.append(f"Lỗi tạo thư mục '{rel}': {e}"); return
+                update_queue.put((task_id, f"Quét thư mục GH: {rel}...", 0, False, None))
+                futures[list_pool.submit(handler.list_dir, repo_name, github_path, tree_sha=tree_sha)] = (repo_name, github_path, local_dir, rel)
+            for pending in pending_dirs: submit_dir(*pending)
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    repo_name, github_path, local_dir, rel = futures.pop(future)
+                    try: contents = future.result()
+                    except RateLimitExceededException: errors.append(f"Rate limit khi quét '{rel}'"); update_queue.put((task_id, f"LỖI Rate Limit: {rel}", 0, False, None)); continue
+                    except GithubException as e: errors.append(f"Lỗi GitHub khi quét '{rel}': {e.status}"); update_queue.put((task_id, f"LỖI GitHub {e.status}: {rel}", 0, False, None)); continue
+                    except Exception as e: errors.append(f"Lỗi quét '{rel}': {e}"); update_queue.put((task_id, f"LỖI quét: {rel}: {e}", 0, False, None)); continue
+                    dir_count += 1
+                    for content in contents:
+                        child_local = os.path.join(local_dir, content.name)
+                        expected_paths.add(os.path.normpath(child_local))
+                        if content.type == 'dir': submit_dir(repo_name, content.path, child_local, rel_of(child_local), content.sha)
+                        elif content.type == 'file':
+                            if is_unchanged(child_local, content.sha): unchanged_count += 1; continue
+                            file_jobs.append({'repo': repo_name, 'path': content.path, 'sha': content.sha, 'size': content.size or 0, 'local_path': child_local, 'rel': rel_of(child_local)})
+
+        listing_complete = len(errors) == errors_before_listing # Chỉ dọn mục cũ khi đã liệt kê đầy đủ
+        total_files = len(file_jobs)
+        update_queue.put((task_id, f"Đã liệt kê {total_files} file trong {dir_count} thư mục. Bắt đầu tải ({max_workers} luồng)...", 5, False, {'pending_requests': total_files}))
+        downloaded = self._download_file_jobs(task_id, file_jobs, errors)
+
+        # Thư mục ghi đè tại chỗ: gỡ các file/thư mục cục bộ không còn trên GitHub (kết quả giống thay thế toàn bộ)
+        for root_dir in (prune_roots if listing_complete else []):
+            for dirpath, dirnames, filenames in os.walk(root_dir, topdown=False):
+                for name in filenames + dirnames:
+                    child = os.path.join(dirpath, name)
+                    if os.path.normpath(child) in expected_paths: continue
+                    try:
+                        if os.path.isdir(child) and not os.path.islink(child): shutil.rmtree(child)
+                        else: os.remove(child)
+                    except OSError as e: errors.append(f"Lỗi xóa mục cũ '{rel_of(child)}': {e}")
+
+        success_count = downloaded + dir_count
         final_message = f"Hoàn thành tải xuống. {success_count} thành công."
         if skipped_overwrite > 0: final_message += f" {skipped_overwrite} bỏ qua (trùng)."
+        if unchanged_count > 0: final_message += f" {unchanged_count} không đổi."
         if errors: final_message += f" Có {len(errors)} lỗi."; print(f"--- Task {task_id} Download Errors ---:\n" + "\n".join(errors) + "\n-------------------------------")
         # Cần refresh local view sau khi download
         refresh_data = {'refresh_view': 'local', 'path': target_directory_base} # Refresh thư mục gốc download
         update_queue.put((task_id, final_message, 100, True, refresh_data))
 
 
+    def _download_file_jobs(self, task_id, file_jobs, errors):
+        """Giai đoạn 2-3 của tải xuống: tải blob song song + ghi đĩa trên một thread riêng.
+        file_jobs: list dict {repo, path, sha, size, local_path, rel}; lỗi được thêm vào errors,
+        job_info['ok'] = True khi file đã ghi xong. Trả về số file đã ghi thành công."""
+        handler = self.github_handler
+        max_workers = max(1, int(self.settings.get("download_workers", DEFAULT_SETTINGS["download_workers"])))
+        budget = ByteBudget(max(1, int(self.settings.get("download_inflight_mb", DEFAULT_SETTINGS["download_inflight_mb"]))) * 1024 * 1024)
+        lock = threading.Lock() # Bảo vệ các bộ đếm dùng chung giữa các thread
+        total_files = len(file_jobs)
+        if not total_files: return 0
+
+        # --- Giai đoạn 3: thread ghi đĩa ---
+        write_queue = queue.Queue()
+        counters = {'written': 0, 'success': 0}
+        def report_done(job_info, msg, ok):
+            job_info['ok'] = ok
+            with lock:
+                counters['written'] += 1; written = counters['written']
+                if ok: counters['success'] += 1
+            update_queue.put((task_id, msg, 5 + int(written / total_files * 90), False, {'pending_requests': total_files - written}))
+        def writer():
+            while True:
+                job = write_queue.get()
+                if job is None: break
+                job_info, data, reserved = job
+                tmp_path = f"{job_info['local_path']}.part"
+                try:
+                    with open(tmp_path, "wb") as f: f.write(data)
+                    os.replace(tmp_path, job_info['local_path']) # Không để lại file ghi dở
+                    msg = f"OK: {job_info['rel']}"; ok = True
+                except Exception as e:
+                    try: os.remove(tmp_path)
+                    except OSError: pass
+                    with lock: errors.append(f"Lỗi ghi '{job_info['rel']}': {e}")
+                    msg = f"LỖI ghi: {job_info['rel']}: {e}"; ok = False
+                finally:
+                    budget.release(reserved)
+                report_done(job_info, msg, ok)
+        writer_thread = threading.Thread(target=writer, daemon=True); writer_thread.start()
+
+        # --- Giai đoạn 2: tải blob song song ---
+        def fetch(job_info):
+            if job_info['sha'] and job_info['size'] >= LARGE_FILE_THRESHOLD:
+                # File lớn: stream thẳng xuống đĩa, không qua bộ nhớ/ngân sách byte
+                update_queue.put((task_id, f"Đang tải (stream) {job_info['rel']} ({self.format_size(job_info['size'])})...", 5 + int(counters['written'] / total_files * 90), False, None))
+                handler.download_blob_to_file(job_info['repo'], job_info['sha'], job_info['local_path'])
+                report_done(job_info, f"OK: {job_info['rel']}", True)
+                return
+            reserved = budget.acquire(job_info['size'])
+            try:
+                data = handler.get_blob_content(job_info['repo'], job_info['sha'], job_info['path'])
+            except BaseException:
+                budget.release(reserved); raise
+            write_queue.put((job_info, data, reserved))
+        backend = handler.get_async_backend()
+        async def fetch_async(job_info, reserved):
+            try:
+                data = await backend.get_blob_content_async(job_info['repo'], job_info['sha'], job_info['path'])
+            except BaseException:
+                budget.release(reserved); raise
+            write_queue.put((job_info, data, reserved))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as fetch_pool:
+            futures = {}
+            for job_info in file_jobs:
+                if backend is not None and not (job_info['sha'] and job_info['size'] >= LARGE_FILE_THRESHOLD):
+                    # Backend bất đồng bộ: file nhỏ được tải đồng thời trên event loop; ngân sách byte giới hạn lượng đang chờ ghi
+                    futures[backend.submit(fetch_async(job_info, budget.acquire(job_info['size'])))] = job_info
+                else: futures[fetch_pool.submit(fetch, job_info)] = job_info
+            for future in concurrent.futures.as_completed(futures):
+                job_info = futures[future]; rel = job_info['rel']
+                try: future.result(); continue
+                except RateLimitExceededException: err = f"Rate limit tải '{rel}'"; msg = f"LỖI Rate Limit: {rel}"
+                except GithubException as e: err = f"Lỗi GitHub tải '{rel}': {e.status}"; msg = f"LỖI GitHub {e.status}: {rel}"
+                except Exception as e: err = f"Lỗi tải xuống '{rel}': {e}"; msg = f"LỖI tải: {rel}: {e}"
+                with lock: errors.append(err); counters['written'] += 1
+                update_queue.put((task_id, msg, 5 + int(counters['written'] / total_files * 90), False, None))
+        write_queue.put(None); writer_thread.join()
+
+        return counters['success']
+
+
+    # --- Đồng bộ 2 chiều (thư mục cục bộ <-> repo/path) ---
+    def _find_sync_pair(self, repo_name, github_path):
+        for pair in self.settings.get("sync_pairs", []):
+            if pair.get('repo') == repo_name and pair.get('path', "").strip('/') == github_path.strip('/'): return pair
+        return None
+
+    def sync_github_item_prompt(self, item_info):
+        """Ghép thư mục GitHub (repo hoặc thư mục) với một thư mục cục bộ rồi đồng bộ 2 chiều."""
+        if not self.github_handler or not self.github_handler.is_authenticated():
+             messagebox.showerror("Lỗi", "Chưa kết nối GitHub.", parent=self.root); return
+        repo_name = item_info['repo']; github_path = item_info.get('path', "").strip('/')
+        gh_display = f"{repo_name}/{github_path}".strip('/')
+        pair = self._find_sync_pair(repo_name, github_path)
+        if pair:
+            result = messagebox.askyesnocancel("Đồng bộ", f"'{gh_display}' đang được ghép với:\n{pair['local']}\n\n"
+                                               "Yes: Đồng bộ ngay.\nNo: Chọn thư mục cục bộ khác.\nCancel: Hủy bỏ.", parent=self.root)
+            if result is None: return
+            if result: self.start_sync_thread(pair); return
+        local_dir = filedialog.askdirectory(title=f"Chọn thư mục cục bộ để đồng bộ với '{gh_display}'",
+                                            initialdir=self.current_local_path or self.settings.get("default_download_dir"), parent=self.root)
+        if not local_dir: return
+        confirm_msg = (f"Đồng bộ 2 chiều:\n  {local_dir}\n  <-> {gh_display}\n\n"
+                       "File mới/thay đổi ở mỗi bên sẽ được chép sang bên kia; file đã xóa ở một bên sẽ bị xóa ở bên kia.\n"
+                       "File bị thay đổi ở cả hai bên sẽ được giữ nguyên và báo xung đột.")
+        if not messagebox.askyesno("Xác nhận Đồng bộ", confirm_msg, icon='question', parent=self.root): return
+        pairs = [p for p in self.settings.get("sync_pairs", []) if p is not pair]
+        pair = {'local': os.path.normpath(local_dir), 'repo': repo_name, 'path': github_path}
+        self.settings["sync_pairs"] = pairs + [pair]
+        self.save_settings()
+        self.start_sync_thread(pair)
+
+    def sync_all_pairs(self):
+        pairs = self.settings.get("sync_pairs", [])
+        if not pairs: self.log_status("Chưa có cặp đồng bộ nào.", "WARNING"); return
+        for pair in pairs: self.start_sync_thread(pair)
+
+    def start_sync_thread(self, pair):
+        if not self.github_handler or not self.github_handler.is_authenticated(): return
+        self.task_id_counter += 1; task_id = self.task_id_counter; thread = threading.Thread(target=self._sync_worker, args=(task_id, pair), daemon=True)
+        self.upload_tasks[task_id] = {'thread': thread, 'status': 'Bắt đầu...', 'progress': 0, 'type': 'sync', 'repo': pair['repo'], 'path': pair['path']}
+        gh_display = f"{pair['repo']}/{pair['path']}".strip('/')
+        update_queue.put((task_id, f"Bắt đầu đồng bộ '{pair['local']}' <-> '{gh_display}'...", 0, False, None)); thread.start()
+
+    def _scan_sync_local(self, local_root, previous, known_targets=()):
+        """Quét thư mục cục bộ -> dict rel -> {'size', 'mtime', 'sha'}.
+        Chỉ băm lại file có (size, mtime) khác manifest; file không đổi dùng lại SHA cũ.
+        Bỏ qua file tạm của lần tải dở: tên mkstemp của luồng stream và '<rel>.part' với rel thuộc known_targets."""
+        found = {}; errors = []
+        for dirpath, dirnames, filenames in os.walk(local_root, onerror=lambda e: errors.append(f"Lỗi đọc thư mục '{e.filename}': {e}")):
+            dirnames[:] = [d for d in dirnames if d != ".git"]
+            for filename in filenames:
+                local_path = os.path.join(dirpath, filename)
+                rel = os.path.relpath(local_path, local_root).replace("\\", "/")
+                if filename.endswith(".part") and (STREAM_TEMP_NAME_RE.match(filename) or rel[:-len(".part")] in known_targets): continue
+                try:
+                    st = os.stat(local_path)
+                    old = previous.get(rel)
+                    if old and old.get('size') == st.st_size and old.get('mtime') == st.st_mtime: sha = old['sha']
+                    else: sha = GitHubHandler.compute_blob_sha(local_path)
+                    found[rel] = {'size': st.st_size, 'mtime': st.st_mtime, 'sha': sha}
+                except OSError as e: errors.append(f"Lỗi đọc file '{rel}': {e}")
+        return found, errors
+
+    def _sync_worker(self, task_id, pair):
+        """Đồng bộ 2 chiều theo manifest: so sánh 3 bên (cục bộ hiện tại, GitHub hiện tại, lần đồng bộ trước)
+        để chỉ xử lý phần đã thêm/sửa/xóa. Tải về qua pipeline tải xuống; upload và xóa trên GitHub gộp trong MỘT commit."""
+        handler = self.github_handler
+        local_root = pair['local']; repo_name = pair['repo']; gh_root = pair.get('path', "").strip('/')
+        def gh_path_of(rel): return f"{gh_root}/{rel}" if gh_root else rel
+        if not os.path.isdir(local_root):
+            update_queue.put((task_id, f"LỖI đồng bộ: Không tìm thấy thư mục cục bộ '{local_root}'", 100, True, None)); return
+        manifest = SyncManifest(local_root, repo_name, gh_root).load()
+
+        update_queue.put((task_id, "Quét thay đổi cục bộ...", 2, False, None))
+        local_now, errors = self._scan_sync_local(local_root, manifest.local, set(manifest.local) | set(manifest.remote))
+        update_queue.put((task_id, "Kiểm tra thay đổi trên GitHub...", 5, False, None))
+        try:
+            remote_entries, tree_sha = handler.list_remote_files(repo_name, gh_root)
+        except GithubException as e:
+            update_queue.put((task_id, f"LỖI đồng bộ: không đọc được '{repo_name}/{gh_root}' trên GitHub: {e.status}", 100, True, None)); return
+        if tree_sha and tree_sha == manifest.remote_tree_sha: remote_now = dict(manifest.remote) # Không đổi từ lần trước
+        else: remote_now = {rel: {'size': e.size or 0, 'sha': e.sha} for rel, e in remote_entries.items()}
+
+        # --- Lập kế hoạch (so sánh 3 bên) ---
+        uploads = []; downloads = []; local_deletes = []; remote_deletes = []; conflicts = []
+        new_local = {}; new_remote = {}
+        for rel in sorted(set(local_now) | set(remote_now) | set(manifest.local) | set(manifest.remote)):
+            local_sha = local_now.get(rel, {}).get('sha'); remote_sha = remote_now.get(rel, {}).get('sha')
+            local_changed = local_sha != manifest.local.get(rel, {}).get('sha')
+            remote_changed = remote_sha != manifest.remote.get(rel, {}).get('sha')
+            if local_sha == remote_sha:
+                if local_sha: new_local[rel] = local_now[rel]; new_remote[rel] = remote_now[rel]
+            elif not remote_changed:
+                (uploads if local_sha else remote_deletes).append(rel)
+            elif not local_changed:
+                (downloads if remote_sha else local_deletes).append(rel)
+            else:
+                conflicts.append(rel) # Sửa ở cả hai bên: giữ nguyên, giữ trạng thái cũ trong manifest
+                if rel in manifest.local: new_local[rel] = manifest.local[rel]
+                if rel in manifest.remote: new_remote[rel] = manifest.remote[rel]
+        for rel in conflicts: update_queue.put((task_id, f"Bỏ qua (xung đột, đã sửa ở cả hai bên): {rel}", 10, False, None))
+        update_queue.put((task_id, f"Kế hoạch: {len(uploads)} upload, {len(downloads)} tải về, {len(remote_deletes)} xóa trên GitHub, {len(local_deletes)} xóa cục bộ, {len(conflicts)} xung đột.", 10, False,
+                          {'pending_requests': len(uploads) + len(downloads) + (4 if uploads or remote_deletes else 0)}))
+
+        for rel in uploads + downloads + local_deletes + remote_deletes: # Giữ trạng thái cũ cho tới khi thao tác thành công
+            if rel in manifest.local: new_local[rel] = manifest.local[rel]
+            if rel in manifest.remote: new_remote[rel] = manifest.remote[rel]
+
+        # --- Tải về ---
+        if downloads:
+            file_jobs = []
+            for rel in downloads:
+                local_path = os.path.join(local_root, *rel.split('/'))
+                try: os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                except OSError as e: errors.append(f"Lỗi tạo thư mục cho '{rel}': {e}"); continue
+                file_jobs.append({'repo': repo_name, 'path': gh_path_of(rel), 'sha': remote_now[rel]['sha'], 'size': remote_now[rel]['size'], 'local_path': local_path, 'rel': rel})
+            self._download_file_jobs(task_id, file_jobs, errors)
+            for job_info in file_jobs:
+                if not job_info.get('ok'): continue
+                rel = job_info['rel']
+                try: st = os.stat(job_info['local_path'])
+                except OSError: continue
+                new_local[rel] = {'size': st.st_size, 'mtime': st.st_mtime, 'sha': job_info['sha']}; new_remote[rel] = remote_now[rel]
+
+        # --- Xóa cục bộ ---
+        for rel in local_deletes:
+            try:
+                os.remove(os.path.join(local_root, *rel.split('/'))); update_queue.put((task_id, f"Đã xóa cục bộ: {rel}", 95, False, None))
+            except FileNotFoundError: pass
+            except OSError as e: errors.append(f"Lỗi xóa cục bộ '{rel}': {e}"); continue
+            new_local.pop(rel, None); new_remote.pop(rel, None)
+
+        # --- Upload + xóa trên GitHub: một commit ---
+        changes = [] # Để cập nhật view GitHub tại chỗ
+        if uploads or remote_deletes:
+            update_queue.put((task_id, f"Đang commit {len(uploads)} file, xóa {len(remote_deletes)} file trên GitHub...", 95, False, None))
+            max_workers = max(1, int(self.settings.get("upload_workers", DEFAULT_SETTINGS["upload_workers"])))
+            modes = {gh_path_of(rel): remote_entries[rel].mode for rel in uploads if rel in remote_entries and remote_entries[rel].mode in ("100644", "100755")}
+            success, commit_message, results = handler.commit_files(
+                repo_name, [(os.path.join(local_root, *rel.split('/')), gh_path_of(rel)) for rel in uploads],
+                commit_message=f"Sync from {os.path.basename(local_root) or local_root}", max_workers=max_workers, modes=modes,
+                deletions=[gh_path_of(rel) for rel in remote_deletes])
+            if success:
+                sha_by_path = {r['path']: r['sha'] for r in results if not r['error']}
+                changes = [('put', gh_path_of(rel), 'file', sha_by_path[gh_path_of(rel)], local_now[rel]['size']) for rel in uploads if gh_path_of(rel) in sha_by_path]
+                changes += [('remove', gh_path_of(rel), 'file', None, None) for rel in remote_deletes]
+                for rel in uploads:
+                    if gh_path_of(rel) in sha_by_path:
+                        new_local[rel] = local_now[rel]; new_remote[rel] = {'size': local_now[rel]['size'], 'sha': sha_by_path[gh_path_of(rel)]}
+                for rel in remote_deletes: new_local.pop(rel, None); new_remote.pop(rel, None)
+            else:
+                if commit_message == "empty_repo": commit_message = "Repository rỗng, hãy upload lần đầu bằng 'Upload Folder'."
+                errors.append(f"Lỗi commit: {commit_message}")
+            for r in results:
+                if r['error']: errors.append(f"Upload error '{r['path']}': {r['error']}")
+
+        # SHA tree chỉ dùng lại được khi manifest phản ánh đúng bên GitHub hiện tại
+        manifest.local = new_local; manifest.remote = new_remote; manifest.remote_tree_sha = tree_sha if new_remote == remote_now else None
+        try: manifest.save()
+        except OSError as e: errors.append(f"Lỗi lưu manifest: {e}")
+
+        if not (uploads or downloads or local_deletes or remote_deletes): final_message = "Hoàn thành đồng bộ. Không có thay đổi."
+        else: final_message = f"Hoàn thành đồng bộ. {len(uploads)} upload, {len(downloads)} tải về, {len(remote_deletes) + len(local_deletes)} xóa."
+        if conflicts: final_message += f" {len(conflicts)} xung đột."
+        if errors: final_message += f" Có {len(errors)} lỗi."; print(f"--- Task {task_id} Sync Errors ---\n" + "\n".join(errors) + "\n------------------------------")
+        refresh_data = {'refresh_view': 'github', 'repo': repo_name, 'path': gh_root, 'action': 'sync', 'changes': changes}
+        update_queue.put((task_id, final_message, 100, True, refresh_data))
+
 # --- Chạy ứng dụng ---
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="GitHub Repository Manager")
+    arg_parser.add_argument("--profile-startup", action="store_true", help="In thời gian từng giai đoạn khởi động rồi thoát")
+    arg_parser.add_argument("--startup-budget-ms", type=float, default=None,
+                            help="Cùng --profile-startup: thoát với mã 1 nếu cửa sổ dùng được sau quá số ms này (kiểm tra hồi quy)")
+    args = arg_parser.parse_args()
+    profiler = StartupProfiler(enabled=args.profile_startup, budget_ms=args.startup_budget_ms)
+    profiler.mark("import + định nghĩa module")
+
     # --- Define load_initial_settings function FIRST ---
     def load_initial_settings():
         """Loads settings from file or returns defaults."""
@@ -2491,12 +4771,15 @@ if __name__ == "__main__":
     try: root.minsize(1200, 950); root.geometry("1300x1050") # Kích thước gốc
     except Exception as e: print(f"Warning: Could not set window size/minisize: {e}")
 
+    profiler.mark("tạo cửa sổ + theme")
+
     # --- Create the App instance ---
-    app = GitHubManagerApp(root)
+    app = GitHubManagerApp(root, profiler)
 
     # --- Start the main event loop ---
     print("Starting mainloop...")
     root.mainloop()
     print("Mainloop finished.")
+    if profiler.enabled: sys.exit(profiler.exit_code)
 
 # --- END OF REFACTORED FILE main.py ---
\ No newline at end of file